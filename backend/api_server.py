@@ -5,12 +5,17 @@ Flask-based REST API for parsing Excel sales data and returning JSON results.
 Designed to be called by n8n workflows or other automation tools.
 """
 
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
 import os
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from parsers.sales_parser import SalesDashboardParser
+import numpy as np
+from parsers.date_ranges import extract_date_range, rep_key
+from parsers.sales_parser import NamedWorkbook, SalesDashboardParser
 import traceback
 
 app = Flask(__name__)
@@ -20,6 +25,9 @@ CORS(app)  # Enable CORS for all routes
 EXCEL_FILE_PATH = '../data/input/Payton YOY 8-18-24 to 8-19-25.xlsx'
 OUTPUT_DIR = 'output'
 
+# Upper bound on worker processes one bulk request may use
+MAX_BULK_WORKERS = int(os.environ.get('MAX_BULK_WORKERS', 4))
+
 # Create output directory if it doesn't exist
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -33,8 +41,9 @@ def home():
         'status': 'running',
         'endpoints': {
             'POST /parse-excel': 'Parse Excel file and return complete dashboard data',
+            'POST /parse-excel/bulk': 'Parse many rep workbooks concurrently and return a merged leaderboard (?stream=true for NDJSON)',
             'GET /data': 'Get the most recent parsed dashboard data',
-            'GET /data/summary': 'Get summary metrics only',
+            'GET /data/summary': 'Get summary metrics only (?fresh=true reads them from the Excel file)',
             'GET /data/accounts': 'Get account data (declining, increasing, new, reactivated)',
             'GET /data/frames': 'Get frame performance data',
             'GET /data/brands': 'Get brand performance data',
@@ -98,16 +107,9 @@ def parse_excel():
         parser.load_data()
 
         # Get complete dashboard summary
-        dashboard_data = parser.get_dashboard_summary()
-
-        # Optionally limit details to reduce response size
-        if not include_details:
-            # Keep only top 5 of each list
-            if 'accounts' in dashboard_data:
-                dashboard_data['accounts']['top_declining'] = dashboard_data['accounts']['top_declining'][:5]
-                dashboard_data['accounts']['top_increasing'] = dashboard_data['accounts']['top_increasing'][:5]
-                dashboard_data['accounts']['new_accounts'] = dashboard_data['accounts']['new_accounts'][:5]
-                dashboard_data['accounts']['reactivated_accounts'] = dashboard_data['accounts']['reactivated_accounts'][:5]
+        # Optionally limit details to reduce response size (keep only top 5 of each list);
+        # only those rows are selected and converted
+        dashboard_data = parser.get_dashboard_summary(limit=None if include_details else 5)
 
         # Save to file for persistence
         output_file = os.path.join(OUTPUT_DIR, 'latest_dashboard_data.json')
@@ -134,6 +136,263 @@ def parse_excel():
         }), 500
 
 
+def parse_rep_workbook(source, filename: str, include_details: bool) -> dict:
+    """
+    Parse one rep workbook for the bulk endpoint (runs in a worker process)
+
+    Args:
+        source: Path to the Excel file, or the uploaded file's bytes
+        filename: Workbook filename (names the rep)
+        include_details: Keep every account in the account lists (otherwise the top 5)
+
+    Returns:
+        Per-rep result with the dashboard summary and its leaderboard entry
+    """
+    rep = rep_key(filename) or os.path.splitext(filename)[0]
+    start = time.perf_counter()
+    try:
+        if isinstance(source, bytes):
+            source = NamedWorkbook(source, filename)
+        elif not os.path.exists(source):
+            raise FileNotFoundError(f"Excel file not found: {source}")
+
+        parser = SalesDashboardParser(source)
+        parser.load_data()
+        dashboard = parser.get_dashboard_summary(limit=None if include_details else 5)
+
+        return {
+            'success': True,
+            'rep': rep,
+            'file': filename,
+            'accounts_parsed': len(parser.account_data),
+            'seconds': round(time.perf_counter() - start, 3),
+            'leaderboard_entry': leaderboard_entry(rep, filename, dashboard),
+            'data': dashboard
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'rep': rep,
+            'file': filename,
+            'seconds': round(time.perf_counter() - start, 3),
+            'error': str(e)
+        }
+
+
+def leaderboard_entry(rep: str, filename: str, dashboard: dict) -> dict:
+    """Leaderboard metrics of one rep, plus the counts needed to merge retention rates"""
+    summary = dashboard['summary']
+    return {
+        'rep': rep,
+        'file': filename,
+        'total_sales_cy': summary.get('total_sales_cy', 0),
+        'total_sales_py': summary.get('total_sales_py', 0),
+        'sales_change': summary.get('total_sales_change', 0),
+        'sales_pct_change': summary.get('total_sales_pct_change', 0),
+        'declining_count': dashboard['accounts']['declining_count'],
+        'retention_rate': summary.get('retention_rate', 0),
+        'total_accounts': summary.get('total_accounts', 0),
+        'total_accounts_py': summary.get('total_accounts_py', 0),
+        # Numerator of retention_rate (see get_dashboard_summary)
+        'retained_accounts': (summary.get('total_accounts', 0) -
+                              summary.get('new_accounts', 0) -
+                              summary.get('reactivated_accounts', 0))
+    }
+
+
+def latest_entry_per_rep(entries: list) -> tuple:
+    """
+    Keep each rep's latest period (by the end date in the filename)
+
+    Returns:
+        Tuple of (kept entries in request order, filenames of the older periods)
+    """
+    def period_end(entry):
+        dates = extract_date_range(entry['file'])
+        return dates[1] if dates else datetime.min
+
+    latest = {}
+    for entry in entries:
+        kept = latest.get(entry['rep'])
+        if kept is None or period_end(entry) > period_end(kept):
+            latest[entry['rep']] = entry
+
+    kept = [entry for entry in entries if latest[entry['rep']] is entry]
+    return kept, [entry['file'] for entry in entries if latest[entry['rep']] is not entry]
+
+
+def merge_leaderboard(entries: list) -> dict:
+    """
+    Consolidated leaderboard from the per-rep entries
+
+    Reps are ranked by sales change, with their rank on retention rate and
+    declining accounts alongside. A rep uploaded for several periods counts
+    once, with its latest period. Totals are merged from the per-rep sums
+    (retention rate from the summed retained and previous-year accounts), so
+    no workbook is read again.
+    """
+    entries, superseded = latest_entry_per_rep(entries)
+    ranked = sorted(entries, key=lambda e: e['sales_change'], reverse=True)
+    retention_rank = {id(e): rank for rank, e in enumerate(
+        sorted(entries, key=lambda e: e['retention_rate'], reverse=True), 1)}
+    declining_rank = {id(e): rank for rank, e in enumerate(
+        sorted(entries, key=lambda e: e['declining_count']), 1)}
+
+    reps = []
+    for rank, entry in enumerate(ranked, 1):
+        row = {key: value for key, value in entry.items() if key != 'retained_accounts'}
+        row['rank'] = rank
+        row['retention_rank'] = retention_rank[id(entry)]
+        row['declining_rank'] = declining_rank[id(entry)]
+        reps.append(row)
+
+    total_sales_cy = sum(e['total_sales_cy'] for e in entries)
+    total_sales_py = sum(e['total_sales_py'] for e in entries)
+    total_accounts_py = sum(e['total_accounts_py'] for e in entries)
+    retained_accounts = sum(e['retained_accounts'] for e in entries)
+
+    return {
+        'reps': reps,
+        'superseded': superseded,
+        'totals': {
+            'reps': len(entries),
+            'total_sales_cy': total_sales_cy,
+            'total_sales_py': total_sales_py,
+            'sales_change': sum(e['sales_change'] for e in entries),
+            'sales_pct_change': round((total_sales_cy - total_sales_py) / total_sales_py * 100, 2) if total_sales_py else 0,
+            'declining_count': sum(e['declining_count'] for e in entries),
+            'total_accounts': sum(e['total_accounts'] for e in entries),
+            'total_accounts_py': total_accounts_py,
+            'retention_rate': (retained_accounts / total_accounts_py * 100) if total_accounts_py > 0 else 0
+        }
+    }
+
+
+def iter_bulk_results(jobs: list, max_workers: int):
+    """
+    Parse rep workbooks concurrently, yielding (job index, result) as each finishes
+
+    Runs in-process when worker processes are unavailable.
+    """
+    done = set()
+    if max_workers > 1 and len(jobs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = {pool.submit(parse_rep_workbook, *job): i for i, job in enumerate(jobs)}
+                for future in as_completed(futures):
+                    done.add(futures[future])
+                    yield futures[future], future.result()
+            return
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            print(f"[INFO] Worker processes unavailable ({e}); parsing in-process")
+
+    for i, job in enumerate(jobs):
+        if i not in done:
+            yield i, parse_rep_workbook(*job)
+
+
+def _json_default(obj):
+    """Serialize numpy scalars (and anything else as a string) in streamed lines"""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    return str(obj)
+
+
+@app.route('/parse-excel/bulk', methods=['POST'])
+def parse_excel_bulk():
+    """
+    Parse many rep workbooks in one request and merge their leaderboard
+
+    Accepts either a JSON body or a multipart upload:
+    - excel_paths: List of Excel file paths (JSON)
+    - workbooks: One or more uploaded .xlsx files (multipart field)
+    - include_details: Boolean to include full account lists (default: False, top 5)
+    - max_workers: Worker processes for this request (capped at MAX_BULK_WORKERS)
+    - stream: 'true' (query or body) to stream one NDJSON line per rep as it
+      finishes, followed by a line with the leaderboard
+
+    Returns:
+        JSON with per-rep results (in request order) and the merged leaderboard
+    """
+    try:
+        if request.is_json:
+            data = request.get_json() or {}
+            if not isinstance(data, dict):
+                raise ValueError('expected a JSON object')
+            paths = data.get('excel_paths', [])
+            if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+                raise ValueError('excel_paths must be a list of file paths')
+            jobs = [(path, os.path.basename(path)) for path in paths]
+        else:
+            data = request.form
+            jobs = [(upload.read(), upload.filename) for upload in request.files.getlist('workbooks')]
+
+        if not jobs:
+            return jsonify({
+                'error': 'Provide excel_paths (JSON) or one or more workbooks (multipart upload)'
+            }), 400
+
+        include_details = str(data.get('include_details', 'false')).lower() == 'true'
+        stream = str(request.args.get('stream', data.get('stream', 'false'))).lower() == 'true'
+        max_workers = min(int(data.get('max_workers') or MAX_BULK_WORKERS), MAX_BULK_WORKERS, len(jobs))
+        jobs = [(source, filename, include_details) for source, filename in jobs]
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid bulk request: {e}'}), 400
+
+    def bulk_results():
+        start = time.perf_counter()
+        results = [None] * len(jobs)
+        for i, result in iter_bulk_results(jobs, max_workers):
+            results[i] = result
+            yield 'rep', result
+
+        entries = [result['leaderboard_entry'] for result in results if result['success']]
+        yield 'leaderboard', {
+            'leaderboard': merge_leaderboard(entries),
+            'results': results,
+            'timing': {
+                'workers': max_workers,
+                'reps': len(jobs),
+                'failed': sum(1 for result in results if not result['success']),
+                'seconds': round(time.perf_counter() - start, 3)
+            }
+        }
+
+    if stream:
+        def generate():
+            for kind, payload in bulk_results():
+                if kind == 'leaderboard':
+                    payload = {key: value for key, value in payload.items() if key != 'results'}
+                yield json.dumps({'type': kind, **payload}, default=_json_default) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    try:
+        final = None
+        for kind, payload in bulk_results():
+            if kind == 'leaderboard':
+                final = payload
+
+        return jsonify({
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'reps': final['results'],
+            'leaderboard': final['leaderboard'],
+            'timing': final['timing']
+        })
+
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': error_trace,
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+
 @app.route('/data', methods=['GET'])
 def get_data():
     """Get the most recently parsed dashboard data"""
@@ -163,10 +422,33 @@ def get_data():
 
 @app.route('/data/summary', methods=['GET'])
 def get_summary():
-    """Get summary metrics only"""
+    """
+    Get summary metrics only
+
+    Optional query parameters:
+    - fresh: 'true' to read the totals straight from the Excel file (summary-only
+      parse of the header block) instead of the last /parse-excel result
+    """
     try:
         data_file = os.path.join(OUTPUT_DIR, 'latest_dashboard_data.json')
 
+        if request.args.get('fresh', 'false').lower() == 'true':
+            if not os.path.exists(EXCEL_FILE_PATH):
+                return jsonify({
+                    'error': 'Excel file not found',
+                    'path': EXCEL_FILE_PATH
+                }), 404
+
+            parser = SalesDashboardParser(EXCEL_FILE_PATH)
+            parser.load_summary()
+
+            return jsonify({
+                'success': True,
+                'timestamp': datetime.now().isoformat(),
+                'summary': parser.summary_data,
+                'frames': parser.frame_data
+            })
+
         if not os.path.exists(data_file):
             return jsonify({
                 'error': 'No data available. Please call POST /parse-excel first.'
@@ -384,6 +666,7 @@ if __name__ == '__main__':
     print(f"Output directory: {OUTPUT_DIR}")
     print("\nAvailable endpoints:")
     print("  POST   http://localhost:3000/parse-excel")
+    print("  POST   http://localhost:3000/parse-excel/bulk")
     print("  GET    http://localhost:3000/data")
     print("  GET    http://localhost:3000/data/summary")
     print("  GET    http://localhost:3000/data/accounts")
@@ -0,0 +1,370 @@
+"""
+Batch Processing of Rep Workbooks
+Parses every YOY workbook under a directory in a pool of worker processes,
+writing one dashboard per workbook, one comparison per pair of consecutive
+report periods and a consolidated index. Workbooks whose contents did not
+change since the last run are skipped.
+
+Usage:
+    python batch_process.py ../data/input
+    python batch_process.py ../data/input --output ../data/output/batch --workers 4
+    python batch_process.py ../data/input --force --verbose
+
+Comparisons pair two workbooks of the same rep (the filename text before the
+date range, e.g. 'PAM') whose periods follow each other: the newer period
+starts within MAX_PERIOD_GAP_DAYS of the end of the older one.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from parsers.date_ranges import extract_date_range, periods_follow, rep_key
+
+
+DEFAULT_OUTPUT_DIR = os.path.join('..', 'data', 'output', 'batch')
+INDEX_FILENAME = 'index.json'
+
+# Bump when the artifact layout changes, so older artifacts are rebuilt
+ARTIFACT_VERSION = 1
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def discover_workbooks(input_dir: str) -> List[Dict]:
+    """
+    Find every .xlsx workbook under a directory
+
+    Returns:
+        One dictionary per workbook with its path, content hash and report
+        period (None when the filename has no date range), sorted by path
+    """
+    workbooks = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            # Skip Office lock files and hidden files
+            if not name.lower().endswith('.xlsx') or name.startswith(('.', '~$')):
+                continue
+            path = os.path.join(root, name)
+            dates = extract_date_range(name)
+            workbooks.append({
+                'path': path,
+                'filename': name,
+                'sha256': file_hash(path),
+                'rep': rep_key(name),
+                'start_date': dates[0] if dates else None,
+                'end_date': dates[1] if dates else None,
+            })
+    return workbooks
+
+
+def pair_workbooks(workbooks: List[Dict]) -> List[Dict]:
+    """
+    Pair each workbook with the same rep's workbook for the period before it
+
+    Returns:
+        List of {'previous', 'current'} workbook pairs
+    """
+    by_rep = {}
+    for workbook in workbooks:
+        if workbook['start_date'] is not None:
+            by_rep.setdefault(workbook['rep'], []).append(workbook)
+
+    pairs = []
+    for rep_workbooks in by_rep.values():
+        rep_workbooks.sort(key=lambda w: (w['end_date'], w['start_date']))
+        for previous, current in zip(rep_workbooks, rep_workbooks[1:]):
+            if periods_follow((previous['start_date'], previous['end_date']),
+                              (current['start_date'], current['end_date'])):
+                pairs.append({'previous': previous, 'current': current})
+    return pairs
+
+
+def _artifact_name(*workbooks: Dict) -> str:
+    stems = [os.path.splitext(workbook['filename'])[0] for workbook in workbooks]
+    return ' vs '.join(reversed(stems)) + '.json'
+
+
+def _write_json(data, path: str):
+    """Write JSON through a temp file so an interrupted run never leaves a partial artifact"""
+    import numpy as np
+    import pandas as pd
+
+    def json_serializer(obj):
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return None if np.isnan(obj) else float(obj)
+        if isinstance(obj, (pd.Timestamp, datetime)):
+            return obj.isoformat()
+        if pd.isna(obj):
+            return None
+        return str(obj)
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, default=json_serializer, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _quiet(verbose: bool):
+    """Silence the parsers' progress output unless verbose"""
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def build_dashboard(path: str, output_path: str, verbose: bool = False) -> Dict:
+    """Parse one workbook and write its dashboard (runs in a worker process)"""
+    from parsers.sales_parser import SalesDashboardParser
+
+    with _quiet(verbose):
+        parser = SalesDashboardParser(path)
+        parser.load_data()
+        dashboard = parser.get_dashboard_summary()
+    _write_json(dashboard, output_path)
+    return {'rows': len(parser.account_data)}
+
+
+def build_comparison(previous_path: str, current_path: str, output_path: str, verbose: bool = False) -> Dict:
+    """Parse a pair of workbooks and write their comparison (runs in a worker process)"""
+    from parsers.sales_comparison_parser import SalesComparisonParser
+
+    with _quiet(verbose):
+        parser = SalesComparisonParser(previous_path, current_path)
+        parser.load_data()
+        comparison = parser.get_complete_comparison_summary()
+    _write_json(comparison, output_path)
+    return {'rows': len(parser.previous_year_data) + len(parser.current_year_data)}
+
+
+def _run_job(job: Dict) -> Dict:
+    """Run one job, timing it and catching its errors"""
+    start = time.perf_counter()
+    try:
+        result = job['function'](*job['arguments'])
+        result['status'] = 'parsed'
+    except Exception as e:
+        result = {'status': 'failed', 'error': f"{type(e).__name__}: {e}", 'rows': 0}
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_jobs(jobs: List[Dict], workers: int) -> List[Dict]:
+    """
+    Run jobs in a process pool (in-process with one worker or when processes are unavailable)
+
+    Returns:
+        Job results in the order of jobs
+    """
+    results = [None] * len(jobs)
+    if workers > 1 and len(jobs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_run_job, job): i for i, job in enumerate(jobs)}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    results[i] = future.result()
+                    print(f"[{results[i]['status'].upper()}] {jobs[i]['name']} ({results[i]['seconds']:.2f}s)")
+            return results
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            print(f"[INFO] Worker processes unavailable ({e}); running in-process")
+
+    for i, job in enumerate(jobs):
+        results[i] = _run_job(job)
+        print(f"[{results[i]['status'].upper()}] {job['name']} ({results[i]['seconds']:.2f}s)")
+    return results
+
+
+def load_index(output_dir: str) -> Dict:
+    """Index written by the previous run (empty if there is none or it cannot be read)"""
+    try:
+        with open(os.path.join(output_dir, INDEX_FILENAME), encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if index.get('version') == ARTIFACT_VERSION else {}
+
+
+def _reusable(previous: Optional[Dict], hashes: Dict, output_dir: str) -> bool:
+    """True when a previous index entry was built from the same files and its artifact still exists"""
+    return (
+        previous is not None
+        and previous.get('status') in ('parsed', 'skipped')
+        and previous.get('hashes') == hashes
+        and os.path.exists(os.path.join(output_dir, previous['artifact']))
+    )
+
+
+def _period(workbook: Dict) -> Optional[Dict]:
+    if workbook['start_date'] is None:
+        return None
+    return {
+        'start_date': workbook['start_date'].strftime('%Y-%m-%d'),
+        'end_date': workbook['end_date'].strftime('%Y-%m-%d'),
+    }
+
+
+def process_directory(input_dir: str, output_dir: str, workers: Optional[int] = None,
+                      force: bool = False, verbose: bool = False) -> Dict:
+    """
+    Build the dashboards and comparisons of every workbook under a directory
+
+    Args:
+        input_dir: Directory searched (recursively) for .xlsx workbooks
+        output_dir: Directory for the artifacts and index.json
+        workers: Worker processes (defaults to the CPU count)
+        force: Rebuild every artifact, even for unchanged workbooks
+        verbose: Show the parsers' own output
+
+    Returns:
+        The consolidated index that was written
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    previous_index = {} if force else load_index(output_dir)
+    previous_entries = {
+        (entry['kind'], entry['artifact']): entry
+        for entry in previous_index.get('dashboards', []) + previous_index.get('comparisons', [])
+    }
+
+    workbooks = discover_workbooks(input_dir)
+    pairs = pair_workbooks(workbooks)
+    print(f"[INFO] Found {len(workbooks)} workbooks and {len(pairs)} comparison pairs in {input_dir}")
+
+    entries, jobs = [], []
+    for workbook in workbooks:
+        artifact = os.path.join('dashboards', _artifact_name(workbook))
+        entries.append({
+            'kind': 'dashboard',
+            'name': workbook['filename'],
+            'files': [workbook['path']],
+            'hashes': {workbook['filename']: workbook['sha256']},
+            'period': _period(workbook),
+            'artifact': artifact,
+        })
+        jobs.append((build_dashboard, (workbook['path'], os.path.join(output_dir, artifact), verbose)))
+
+    for pair in pairs:
+        previous, current = pair['previous'], pair['current']
+        artifact = os.path.join('comparisons', _artifact_name(previous, current))
+        entries.append({
+            'kind': 'comparison',
+            'name': f"{current['filename']} vs {previous['filename']}",
+            'files': [previous['path'], current['path']],
+            'hashes': {previous['filename']: previous['sha256'], current['filename']: current['sha256']},
+            'periods': {'previous_year': _period(previous), 'current_year': _period(current)},
+            'artifact': artifact,
+        })
+        jobs.append((build_comparison, (previous['path'], current['path'],
+                                        os.path.join(output_dir, artifact), verbose)))
+
+    # Unchanged workbooks keep the artifacts of the last run
+    pending = []
+    for entry, (function, arguments) in zip(entries, jobs):
+        previous = previous_entries.get((entry['kind'], entry['artifact']))
+        if _reusable(previous, entry['hashes'], output_dir):
+            entry.update(status='skipped', rows=previous.get('rows', 0), seconds=0.0,
+                         parsed_at=previous.get('parsed_at'))
+            print(f"[SKIPPED] {entry['name']} (unchanged)")
+        else:
+            pending.append((entry, {'name': entry['name'], 'function': function, 'arguments': arguments}))
+
+    parse_started = time.perf_counter()
+    results = run_jobs([job for _, job in pending], workers)
+    parse_seconds = time.perf_counter() - parse_started
+
+    parsed_at = datetime.now().isoformat(timespec='seconds')
+    for (entry, _), result in zip(pending, results):
+        entry.update(result)
+        if result['status'] == 'parsed':
+            entry['parsed_at'] = parsed_at
+
+    parsed = [entry for entry in entries if entry['status'] == 'parsed']
+    files_parsed = sum(len(entry['files']) for entry in parsed)
+    rows_parsed = sum(entry['rows'] for entry in parsed)
+    throughput = {
+        'workers': workers,
+        'parsed': len(parsed),
+        'skipped': sum(1 for entry in entries if entry['status'] == 'skipped'),
+        'failed': sum(1 for entry in entries if entry['status'] == 'failed'),
+        'files_parsed': files_parsed,
+        'rows_parsed': rows_parsed,
+        'parse_seconds': round(parse_seconds, 3),
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'files_per_second': round(files_parsed / parse_seconds, 2) if parse_seconds > 0 else 0,
+        'rows_per_second': round(rows_parsed / parse_seconds, 1) if parse_seconds > 0 else 0,
+    }
+
+    index = {
+        'version': ARTIFACT_VERSION,
+        'generated_at': parsed_at,
+        'input_dir': input_dir,
+        'dashboards': [entry for entry in entries if entry['kind'] == 'dashboard'],
+        'comparisons': [entry for entry in entries if entry['kind'] == 'comparison'],
+        'throughput': throughput,
+    }
+    _write_json(index, os.path.join(output_dir, INDEX_FILENAME))
+    return index
+
+
+def print_summary(index: Dict, output_dir: str):
+    """Print the throughput summary of a run"""
+    throughput = index['throughput']
+    print("\n" + "=" * 60)
+    print("BATCH SUMMARY".center(60))
+    print("=" * 60)
+    print(f"   Dashboards:        {len(index['dashboards']):>8}")
+    print(f"   Comparisons:       {len(index['comparisons']):>8}")
+    print(f"   Parsed:            {throughput['parsed']:>8}")
+    print(f"   Skipped:           {throughput['skipped']:>8}  (unchanged)")
+    print(f"   Failed:            {throughput['failed']:>8}")
+    print(f"   Workers:           {throughput['workers']:>8}")
+    print(f"   Parse time:        {throughput['parse_seconds']:>8.2f}s")
+    print(f"   Files/sec:         {throughput['files_per_second']:>8.2f}")
+    print(f"   Rows/sec:          {throughput['rows_per_second']:>8.1f}")
+    for entry in index['dashboards'] + index['comparisons']:
+        if entry['status'] == 'failed':
+            print(f"   [FAILED] {entry['name']}: {entry['error']}")
+    print(f"\n[OK] Index written to {os.path.join(output_dir, INDEX_FILENAME)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build dashboards and comparisons for a directory of rep workbooks')
+    parser.add_argument('input_dir', help='Directory searched recursively for .xlsx workbooks')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR, help='Directory for the artifacts and index.json')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Rebuild artifacts of unchanged workbooks too')
+    parser.add_argument('--verbose', action='store_true', help="Show the parsers' own output")
+    args = parser.parse_args()
+
+    index = process_directory(args.input_dir, args.output, workers=args.workers,
+                              force=args.force, verbose=args.verbose)
+    print_summary(index, args.output)
+    return 1 if index['throughput']['failed'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -24,7 +24,7 @@ def example_2_top_declining_accounts():
     parser.load_data()
 
     # Get top 10 declining accounts
-    declining = parser.get_declining_accounts().head(10)
+    declining = parser.get_declining_accounts(limit=10)
 
     print("URGENT: Top 10 Accounts Needing Attention\n")
     for idx, account in declining.iterrows():
@@ -61,7 +61,7 @@ def example_4_growth_opportunities():
     parser.load_data()
 
     # Get top 5 growing accounts
-    growing = parser.get_increasing_accounts().head(5)
+    growing = parser.get_increasing_accounts(limit=5)
 
     print("Learn from these successful accounts:\n")
     for idx, account in growing.iterrows():
@@ -201,7 +201,7 @@ def example_9_weekly_action_items():
             print(f"      - {account['Name']}: ${abs(account['Difference']):,.2f}")
 
     # Priority 3: Top performers
-    growing = parser.get_increasing_accounts().head(3)
+    growing = parser.get_increasing_accounts(limit=3)
     if not growing.empty:
         print("\n[PRIORITY 3] Success Stories - Learn & Replicate:")
         for idx, account in growing.iterrows():
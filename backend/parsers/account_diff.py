@@ -0,0 +1,144 @@
+"""
+Account Data Diffs
+Compares two account_data snapshots of the same report period (e.g. a
+workbook and its corrected re-export) row by row, keyed by account number
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+
+ACCOUNT_KEY = 'Acct #'
+
+
+def column_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    Hash every cell of the given columns
+
+    Values hash the same regardless of category codes, so two snapshots with
+    different City categories still compare equal cell by cell.
+
+    Returns:
+        Columns x rows matrix of uint64 hashes (one contiguous row per column)
+    """
+    if not columns:
+        return np.empty((0, len(df)), dtype=np.uint64)
+    return np.vstack([
+        pd.util.hash_pandas_object(df[col], index=False).to_numpy() for col in columns
+    ])
+
+
+def _check_key(df: pd.DataFrame, label: str):
+    if ACCOUNT_KEY not in df.columns:
+        raise ValueError(f"{label} account data has no '{ACCOUNT_KEY}' column")
+    if df[ACCOUNT_KEY].isna().any() or df[ACCOUNT_KEY].duplicated().any():
+        raise ValueError(f"'{ACCOUNT_KEY}' is missing or repeated in the {label} account data")
+
+
+class AccountDiff:
+    """Accounts added, removed and changed between two account_data snapshots"""
+
+    def __init__(self, added: np.ndarray, removed: np.ndarray, changed: np.ndarray,
+                 changed_columns: Dict[int, List[str]], old_rows: np.ndarray, new_rows: np.ndarray):
+        """
+        Args:
+            added: Account numbers only in the new snapshot
+            removed: Account numbers only in the old snapshot
+            changed: Account numbers in both snapshots whose rows differ
+            changed_columns: Account number -> columns that differ, for changed accounts
+            old_rows: Row positions of the removed and changed accounts in the old snapshot
+            new_rows: Row positions of the added and changed accounts in the new snapshot
+        """
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.changed_columns = changed_columns
+        self.old_rows = old_rows
+        self.new_rows = new_rows
+
+    @property
+    def touched(self) -> np.ndarray:
+        """Account numbers whose rows were added, removed or changed"""
+        return np.concatenate([self.added, self.removed, self.changed])
+
+    @property
+    def is_empty(self) -> bool:
+        """True when both snapshots hold the same accounts and values"""
+        return len(self) == 0
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable report of the differences"""
+        return {
+            'added': self.added.tolist(),
+            'removed': self.removed.tolist(),
+            'changed': [
+                {'account_number': acct, 'columns': self.changed_columns[acct]}
+                for acct in self.changed.tolist()
+            ],
+            'added_count': len(self.added),
+            'removed_count': len(self.removed),
+            'changed_count': len(self.changed)
+        }
+
+
+def diff_account_data(old: pd.DataFrame, new: pd.DataFrame) -> AccountDiff:
+    """
+    Compare two account_data snapshots keyed by account number
+
+    Rows are matched on 'Acct #' (row order does not matter) and compared with
+    one hash per cell, so only the accounts that actually differ are reported.
+
+    Args:
+        old: Previously loaded account data
+        new: Account data of the corrected workbook
+
+    Returns:
+        AccountDiff of the added, removed and changed accounts
+
+    Raises:
+        ValueError: If the snapshots have different columns, or an account
+                    number is missing or repeated
+    """
+    if set(old.columns) != set(new.columns):
+        raise ValueError('Account data snapshots have different columns')
+    _check_key(old, 'old')
+    _check_key(new, 'new')
+
+    # Position of every old account in the new snapshot (-1 when removed)
+    new_positions = pd.Index(new[ACCOUNT_KEY]).get_indexer(old[ACCOUNT_KEY])
+    in_new = new_positions >= 0
+    common_old = np.flatnonzero(in_new)
+    common_new = new_positions[common_old]
+    removed_rows = np.flatnonzero(~in_new)
+
+    is_added = np.ones(len(new), dtype=bool)
+    is_added[common_new] = False
+    added_rows = np.flatnonzero(is_added)
+
+    columns = [col for col in new.columns if col != ACCOUNT_KEY]
+    differs = (
+        column_hashes(old, columns)[:, common_old] != column_hashes(new, columns)[:, common_new]
+    )
+    changed = differs.any(axis=0)
+    changed_old, changed_new = common_old[changed], common_new[changed]
+
+    old_accounts = old[ACCOUNT_KEY].to_numpy()
+    new_accounts = new[ACCOUNT_KEY].to_numpy()
+    changed_accounts = old_accounts[changed_old]
+    changed_columns = {
+        acct: [columns[j] for j in np.flatnonzero(row)]
+        for acct, row in zip(changed_accounts.tolist(), differs[:, changed].T)
+    }
+
+    return AccountDiff(
+        added=new_accounts[added_rows],
+        removed=old_accounts[removed_rows],
+        changed=changed_accounts,
+        changed_columns=changed_columns,
+        old_rows=np.concatenate([removed_rows, changed_old]),
+        new_rows=np.concatenate([added_rows, changed_new])
+    )
@@ -0,0 +1,370 @@
+"""
+Brand Matrix
+Compact accounts x brands unit matrix shared by the dashboard and comparison
+parsers, so brand and color group aggregations are NumPy reductions instead
+of loops over DataFrame rows
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class BrandMatrix:
+    """
+    Contiguous int32 unit matrix with one row per account row of a workbook
+
+    Rows keep the workbook order (an account can appear on more than one row);
+    columns follow `brands`, and `brand_groups` maps every brand column to its
+    position in `color_groups`.
+    """
+
+    def __init__(self, accounts: np.ndarray, units: np.ndarray, brands: List[str],
+                 color_map: Dict[str, str], names: Optional[np.ndarray] = None,
+                 cities: Optional[np.ndarray] = None):
+        """
+        Initialize the matrix
+
+        Args:
+            accounts: Account number of each row
+            units: Units per row and brand (rows x brands)
+            brands: Brand column names
+            color_map: Brand -> color group (brands not in the map are 'OTHER')
+            names: Optional account name of each row
+            cities: Optional city of each row
+        """
+        self._set_labels(accounts, brands, color_map, names, cities)
+        self.units = np.ascontiguousarray(units, dtype=np.int32).reshape(len(self.accounts), len(self.brands))
+
+    def _set_labels(self, accounts, brands, color_map, names, cities):
+        """Row labels and brand -> color group vector (shared with SparseBrandMatrix)"""
+        self.accounts = np.ascontiguousarray(accounts, dtype=np.int64)
+        self.brands = list(brands)
+        self.color_map = dict(color_map)
+        self.names = names
+        self.cities = cities
+
+        brand_colors = [self.color_map.get(brand, 'OTHER') for brand in self.brands]
+        self.color_groups = list(dict.fromkeys(brand_colors))
+        self.brand_groups = np.array([self.color_groups.index(c) for c in brand_colors], dtype=np.intp)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, brands: List[str], color_map: Dict[str, str],
+                   sparse: bool = False) -> 'BrandMatrix':
+        """
+        Build the matrix from loaded account data
+
+        Non-numeric unit cells count as 0 and fractional units are truncated,
+        the same conversion the per-row loops used.
+
+        Args:
+            df: Account data with 'Acct #', 'Name', 'City' and brand columns
+            brands: Brand columns to include (in this order)
+            color_map: Brand -> color group
+            sparse: Keep only the non-zero units (SparseBrandMatrix)
+
+        Returns:
+            BrandMatrix with one row per DataFrame row
+        """
+        units = df[brands].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        accounts = pd.to_numeric(df['Acct #'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+        matrix = BrandMatrix(
+            accounts,
+            np.trunc(units).astype(np.int32),
+            brands,
+            color_map,
+            names=df['Name'].to_numpy(dtype=object) if 'Name' in df.columns else None,
+            cities=df['City'].to_numpy(dtype=object) if 'City' in df.columns else None
+        )
+        return matrix.to_sparse() if sparse else matrix
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """(rows, brands)"""
+        return len(self.accounts), len(self.brands)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric arrays"""
+        return self.units.nbytes + self.accounts.nbytes + self.brand_groups.nbytes
+
+    @property
+    def membership(self) -> np.ndarray:
+        """Brand -> color group membership matrix (brands x color groups)"""
+        membership = np.zeros((len(self.brands), len(self.color_groups)), dtype=np.int64)
+        membership[np.arange(len(self.brands)), self.brand_groups] = 1
+        return membership
+
+    def brand_index(self, brands: List[str]) -> np.ndarray:
+        """Column positions of the given brands"""
+        return np.array([self.brands.index(brand) for brand in brands], dtype=np.intp)
+
+    def to_dense(self) -> 'BrandMatrix':
+        """This matrix (already dense)"""
+        return self
+
+    def to_sparse(self) -> 'SparseBrandMatrix':
+        """Compressed sparse row copy holding only the non-zero units"""
+        rows, cols, values = self.nonzero()
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(self.accounts)))))
+        return SparseBrandMatrix(
+            self.accounts, indptr, cols, values, self.brands, self.color_map,
+            names=self.names, cities=self.cities
+        )
+
+    def toarray(self) -> np.ndarray:
+        """Dense rows x brands units"""
+        return self.units
+
+    def nonzero(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Non-zero units in row-major order
+
+        Returns:
+            Tuple of (row positions, brand columns, units)
+        """
+        rows, cols = np.nonzero(self.units)
+        return rows, cols, self.units[rows, cols]
+
+    def take_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Dense units of the given row positions (int64)"""
+        return self.units[rows].astype(np.int64)
+
+    def brand_totals(self) -> np.ndarray:
+        """Total units per brand (int64)"""
+        return self.units.sum(axis=0, dtype=np.int64)
+
+    def color_units(self, units: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Sum units per color group
+
+        Args:
+            units: Rows x brands matrix to reduce (defaults to this matrix)
+
+        Returns:
+            Rows x color groups matrix (int64)
+        """
+        units = self.units if units is None else units
+        units = np.asarray(units, dtype=np.int64)
+        if not self.brands:
+            return np.zeros((len(units), 0), dtype=np.int64)
+
+        # One grouped column reduction: brand columns ordered by color group, summed per run
+        order = np.argsort(self.brand_groups, kind='stable')
+        starts = np.searchsorted(self.brand_groups[order], np.arange(len(self.color_groups)))
+        return np.add.reduceat(units[:, order], starts, axis=1)
+
+    def positive_totals(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per-brand totals over rows that bought the brand
+
+        Returns:
+            Tuple of (rows with units > 0, sum of those units) per brand
+        """
+        _, cols, values = self.nonzero()
+        positive = values > 0
+        cols, values = cols[positive], values[positive]
+
+        counts = np.bincount(cols, minlength=len(self.brands))
+        totals = np.zeros(len(self.brands), dtype=np.int64)
+        np.add.at(totals, cols, values)
+        return counts, totals
+
+    def by_account(self, account_numbers: Optional[List[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sum rows per account number
+
+        Args:
+            account_numbers: Accounts to return, in this order (accounts without
+                             rows get zeros). None for every account, sorted.
+
+        Returns:
+            Tuple of (account numbers, accounts x brands matrix of int64 units)
+        """
+        unique, row_accounts = np.unique(self.accounts, return_inverse=True)
+
+        # Only non-zero units contribute to the sums
+        rows, cols, values = self.nonzero()
+        summed = np.zeros((len(unique), len(self.brands)), dtype=np.int64)
+        np.add.at(summed, (row_accounts.reshape(-1)[rows], cols), values)
+
+        if account_numbers is None:
+            return unique, summed
+
+        requested = np.asarray(account_numbers, dtype=np.int64).reshape(-1)
+        positions = np.searchsorted(unique, requested)
+        found = positions < len(unique)
+        found[found] = unique[positions[found]] == requested[found]
+
+        result = np.zeros((len(requested), len(self.brands)), dtype=np.int64)
+        result[found] = summed[positions[found]]
+        return requested, result
+
+
+class SparseBrandMatrix(BrandMatrix):
+    """
+    BrandMatrix stored in compressed sparse row form
+
+    Most accounts buy only a handful of brands, so for large roll-ups only the
+    non-zero units are kept (`indptr`, `indices`, `data` as in CSR). Every
+    reduction works on the non-zero entries; `units` materializes a dense copy.
+    """
+
+    def __init__(self, accounts: np.ndarray, indptr: np.ndarray, indices: np.ndarray,
+                 data: np.ndarray, brands: List[str], color_map: Dict[str, str],
+                 names: Optional[np.ndarray] = None, cities: Optional[np.ndarray] = None):
+        """
+        Initialize the matrix
+
+        Args:
+            accounts: Account number of each row
+            indptr: Row i holds entries indptr[i]:indptr[i + 1]
+            indices: Brand column of each entry
+            data: Units of each entry
+            brands: Brand column names
+            color_map: Brand -> color group (brands not in the map are 'OTHER')
+            names: Optional account name of each row
+            cities: Optional city of each row
+        """
+        self._set_labels(accounts, brands, color_map, names, cities)
+        self.indptr = np.ascontiguousarray(indptr, dtype=np.int64)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int32)
+        self.data = np.ascontiguousarray(data, dtype=np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric arrays"""
+        return (self.indptr.nbytes + self.indices.nbytes + self.data.nbytes +
+                self.accounts.nbytes + self.brand_groups.nbytes)
+
+    @property
+    def units(self) -> np.ndarray:
+        """Dense rows x brands units (materialized on every access)"""
+        return self.toarray()
+
+    def to_dense(self) -> BrandMatrix:
+        """Dense copy of this matrix"""
+        return BrandMatrix(
+            self.accounts, self.toarray(), self.brands, self.color_map,
+            names=self.names, cities=self.cities
+        )
+
+    def to_sparse(self) -> 'SparseBrandMatrix':
+        """This matrix (already sparse)"""
+        return self
+
+    def toarray(self) -> np.ndarray:
+        """Dense rows x brands units"""
+        rows, cols, values = self.nonzero()
+        dense = np.zeros(self.shape, dtype=np.int32)
+        dense[rows, cols] = values
+        return dense
+
+    def nonzero(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Non-zero units in row-major order
+
+        Returns:
+            Tuple of (row positions, brand columns, units)
+        """
+        rows = np.repeat(np.arange(len(self.accounts)), np.diff(self.indptr))
+        return rows, self.indices.astype(np.intp), self.data
+
+    def take_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Dense units of the given row positions (int64)"""
+        rows = np.asarray(rows, dtype=np.intp).reshape(-1)
+        counts = self.indptr[rows + 1] - self.indptr[rows]
+        out_rows = np.repeat(np.arange(len(rows)), counts)
+        # Entry positions of each requested row, concatenated
+        starts = np.repeat(self.indptr[rows] - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+        entries = starts + np.arange(counts.sum())
+
+        dense = np.zeros((len(rows), len(self.brands)), dtype=np.int64)
+        dense[out_rows, self.indices[entries]] = self.data[entries]
+        return dense
+
+    def brand_totals(self) -> np.ndarray:
+        """Total units per brand (int64)"""
+        totals = np.zeros(len(self.brands), dtype=np.int64)
+        np.add.at(totals, self.indices, self.data)
+        return totals
+
+    def color_units(self, units: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Sum units per color group
+
+        Args:
+            units: Rows x brands matrix to reduce (defaults to this matrix)
+
+        Returns:
+            Rows x color groups matrix (int64)
+        """
+        if units is not None:
+            return super().color_units(units)
+
+        rows, cols, values = self.nonzero()
+        grouped = np.zeros((len(self.accounts), len(self.color_groups)), dtype=np.int64)
+        np.add.at(grouped, (rows, self.brand_groups[cols]), values)
+        return grouped
+
+
+class ColorGroupMatrix:
+    """
+    Accounts x color group units of a previous/current year pair
+
+    Built once when the workbooks are loaded, so color group breakdowns are
+    lookups instead of re-summing brands per call. `first_active_brand` keeps
+    the per-brand detail the breakdown ordering needs.
+    """
+
+    def __init__(self, previous_year: BrandMatrix, current_year: BrandMatrix):
+        """
+        Aggregate both years per account and color group
+
+        Args:
+            previous_year: Previous year brand matrix
+            current_year: Current year brand matrix (same brands)
+        """
+        self.brands = current_year.brands
+        self.color_groups = current_year.color_groups
+        self.brand_groups = current_year.brand_groups
+        self.membership = current_year.membership
+
+        self.accounts = np.union1d(previous_year.by_account()[0], current_year.by_account()[0])
+        _, py_brand_units = previous_year.by_account(self.accounts)
+        _, cy_brand_units = current_year.by_account(self.accounts)
+
+        # A brand counts for an account if it changed or had activity in either year
+        # (the same cells as the customer brand changes, so equal negative returns drop out)
+        active = (cy_brand_units != py_brand_units) | (py_brand_units > 0) | (cy_brand_units > 0)
+        py_brand_units = np.where(active, py_brand_units, 0)
+        cy_brand_units = np.where(active, cy_brand_units, 0)
+
+        self.previous_year = current_year.color_units(py_brand_units)
+        self.current_year = current_year.color_units(cy_brand_units)
+        self.total_previous_year = py_brand_units.sum(axis=1)
+        self.total_current_year = cy_brand_units.sum(axis=1)
+
+        # First active brand (column position) per account and color group
+        active_accounts, active_brands = np.nonzero(active)
+        self.first_active_brand = np.full((len(self.accounts), len(self.color_groups)), len(self.brands), dtype=np.intp)
+        np.minimum.at(self.first_active_brand, (active_accounts, self.brand_groups[active_brands]), active_brands)
+        self.has_activity = (self.first_active_brand < len(self.brands)).any(axis=1)
+
+    def positions(self, account_numbers: List[int]) -> np.ndarray:
+        """
+        Row of each account in this matrix
+
+        Args:
+            account_numbers: Account numbers to look up
+
+        Returns:
+            Row positions, -1 for accounts without rows in either year
+        """
+        requested = np.asarray(account_numbers, dtype=np.int64).reshape(-1)
+        positions = np.searchsorted(self.accounts, requested)
+        found = positions < len(self.accounts)
+        found[found] = self.accounts[positions[found]] == requested[found]
+        return np.where(found, positions, -1)
@@ -7,23 +7,23 @@ import tempfile
 # Add the api directory to path to import parsers
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-try:
-    from parsers.sales_comparison_parser import SalesComparisonParser
-except ImportError:
-    SalesComparisonParser = None
+def load_parser_modules():
+    """Import the comparison parser and session store (pandas/numpy) on first use"""
+    try:
+        from parsers.sales_comparison_parser import SalesComparisonParser
+        from parsers.session_store import SessionStore
+    except ImportError:
+        return None, None
+    return SalesComparisonParser, SessionStore
 
 def clean_nan_values(obj):
     """Recursively clean NaN values from nested dictionaries and lists"""
-    import pandas as pd
-
     if isinstance(obj, dict):
         return {key: clean_nan_values(value) for key, value in obj.items()}
     elif isinstance(obj, list):
         return [clean_nan_values(item) for item in obj]
-    elif pd and pd.isna(obj):
-        return None
     elif isinstance(obj, float):
-        if str(obj) == 'nan' or obj != obj:  # NaN != NaN is True
+        if obj != obj:  # NaN != NaN is True
             return None
         return obj
     return obj
@@ -46,25 +46,57 @@ class handler(BaseHTTPRequestHandler):
             query_params = parse_qs(parsed_url.query)
 
             account_number = query_params.get('account_number', [None])[0]
+            account_numbers = query_params.get('account_numbers', [None])[0]
+            session_id = query_params.get('session', [None])[0]
 
-            if not account_number:
-                raise ValueError("Missing account_number query parameter")
+            if not account_number and not account_numbers:
+                raise ValueError("Missing account_number (or account_numbers) query parameter")
 
-            account_number = int(account_number)
+            # Batch mode: account_numbers=1,2,3 or account_numbers=all
+            if account_numbers:
+                if account_numbers.strip().lower() == 'all':
+                    account_numbers = None
+                else:
+                    account_numbers = [int(a) for a in account_numbers.split(',') if a.strip()]
+                batch = True
+            else:
+                account_number = int(account_number)
+                batch = False
 
-            # Get file paths from environment or use defaults
-            # Note: In production, these should come from the uploaded files
-            # For now, we'll return empty data structure
-            # This will be populated when the frontend uploads files
+            SalesComparisonParser, SessionStore = load_parser_modules()
+            if SalesComparisonParser is None or SessionStore is None:
+                raise RuntimeError("Parser module could not be imported")
 
-            response_data = {
-                'account_number': account_number,
-                'color_groups_cy': [],
-                'color_groups_py': [],
-                'total_units_cy': 0,
-                'total_units_py': 0,
-                'error': 'Account breakdown requires uploaded comparison files'
-            }
+            # The session is saved by parse-sales-data when the files are uploaded
+            session = SessionStore().load(session_id) if session_id else None
+
+            if session is None and batch:
+                response_data = {
+                    'accounts': [],
+                    'count': 0,
+                    'error': 'Account breakdown requires uploaded comparison files (session missing or expired)'
+                }
+            elif session is None:
+                response_data = {
+                    'account_number': account_number,
+                    'color_groups_cy': [],
+                    'color_groups_py': [],
+                    'total_units_cy': 0,
+                    'total_units_py': 0,
+                    'error': 'Account breakdown requires uploaded comparison files (session missing or expired)'
+                }
+            elif batch:
+                parser = SalesComparisonParser.from_session(*session)
+                breakdowns = parser.get_account_color_breakdowns(account_numbers)
+                response_data = {
+                    'session': session_id,
+                    'accounts': list(breakdowns.values()),
+                    'count': len(breakdowns)
+                }
+            else:
+                parser = SalesComparisonParser.from_session(*session)
+                response_data = parser.get_account_color_breakdown(account_number)
+                response_data['session'] = session_id
 
             # Clean and return
             response_data = clean_nan_values(response_data)
@@ -2,8 +2,8 @@ from http.server import BaseHTTPRequestHandler
 import json
 import sys
 import os
-import tempfile
 import re
+import hashlib
 from io import BytesIO
 from datetime import datetime
 
@@ -12,17 +12,46 @@ sys.path.append(os.path.dirname(__file__))
 
 import traceback
 
-# Store import error for debugging
+from parsers.summary_sections import SUMMARY_SECTIONS
+from parsers.upload_archive import read_archive_workbooks, order_workbooks_by_period
+
+# The parser (and with it pandas/numpy/openpyxl) is imported on first use so
+# CORS preflights and rejected requests never pay for the scientific stack
+SalesComparisonParser = None
+SessionStore = None
+WorkbookCache = None
+NamedWorkbook = None
+HistoryEngine = None
 import_error = None
-try:
-    from parsers.sales_comparison_parser import SalesComparisonParser
-    import pandas as pd
-    import openpyxl  # Required for Excel file handling
-except ImportError as e:
-    # Fallback if parser not available
-    SalesComparisonParser = None
-    pd = None
-    import_error = str(e) + "\n" + traceback.format_exc()
+
+def load_parser_modules():
+    """Import the comparison parser, session store, workbook cache and history engine on first use"""
+    global SalesComparisonParser, SessionStore, WorkbookCache, NamedWorkbook, HistoryEngine, import_error
+    if SalesComparisonParser is None and import_error is None:
+        try:
+            from parsers.sales_comparison_parser import SalesComparisonParser as parser_class
+            from parsers.sales_parser import NamedWorkbook as workbook_class
+            from parsers.session_store import SessionStore as store_class
+            from parsers.workbook_cache import WorkbookCache as cache_class
+            from parsers.history import HistoryEngine as history_class
+            import openpyxl  # Required for Excel file handling
+            SalesComparisonParser, SessionStore, NamedWorkbook = parser_class, store_class, workbook_class
+            WorkbookCache = cache_class
+            HistoryEngine = history_class
+        except ImportError as e:
+            # Fallback if parser not available
+            import_error = str(e) + "\n" + traceback.format_exc()
+    return SalesComparisonParser
+
+def is_nan(obj):
+    """NaN/NaT check that only uses pandas if it is already loaded"""
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        try:
+            return bool(pd.isna(obj))
+        except (TypeError, ValueError):
+            return False
+    return isinstance(obj, float) and obj != obj
 
 def parse_multipart_form_data(data, boundary):
     """Parse multipart/form-data to extract BOTH files"""
@@ -55,108 +84,258 @@ def parse_multipart_form_data(data, boundary):
 
     return files
 
+def collect_workbooks(files):
+    """
+    Pick the previous and current year workbooks from the upload
+
+    Either two workbooks (previousYearFile + currentYearFile) or one zip /
+    tar.gz / gzip archive (archiveFile) holding two or more workbooks. Archive
+    members must be consecutive periods of one rep, ordered by the date range
+    in their filenames: the newest is the current year, the one before it the
+    previous year, and any older ones are returned as extra periods.
+
+    Returns:
+        Tuple of (previous_year, current_year, extra_periods) file dictionaries
+
+    Raises:
+        ValueError: If the upload is incomplete, or the archive mixes reps or
+                    holds overlapping or non-consecutive periods
+    """
+    if 'archiveFile' in files:
+        archive = files['archiveFile']
+        workbooks = order_workbooks_by_period(
+            read_archive_workbooks(archive['content'], archive['filename'])
+        )
+        if len(workbooks) < 2:
+            raise ValueError('archiveFile must contain at least two YOY workbooks')
+        return workbooks[-2], workbooks[-1], workbooks[:-2]
+
+    if 'previousYearFile' not in files or 'currentYearFile' not in files:
+        raise ValueError('Both previousYearFile and currentYearFile (or one archiveFile) are required')
+
+    return files['previousYearFile'], files['currentYearFile'], []
+
+def describe_periods(previous_year, current_year, extra_periods):
+    """Describe which uploaded workbook was used for which period"""
+    periods = []
+    for role, workbooks in (('extra', extra_periods), ('previous_year', [previous_year]), ('current_year', [current_year])):
+        for workbook in workbooks:
+            period = {'filename': workbook['filename'], 'role': role}
+            if 'start_date' in workbook:
+                period['start_date'] = workbook['start_date'].strftime('%Y-%m-%d')
+                period['end_date'] = workbook['end_date'].strftime('%Y-%m-%d')
+            periods.append(period)
+    return periods
+
+def build_history(workbooks):
+    """
+    Multi-period account history over every uploaded workbook
+
+    Args:
+        workbooks: Archive workbooks with 'start_date'/'end_date' (see order_workbooks_by_period)
+
+    Returns:
+        HistoryEngine summary (status counts per period, brand units, latest changes)
+    """
+    engine = HistoryEngine()
+    engine.add_workbooks(
+        [NamedWorkbook(workbook['content'], workbook['filename']) for workbook in workbooks],
+        date_ranges=[(workbook['start_date'], workbook['end_date']) for workbook in workbooks]
+    )
+    return engine.get_summary()
+
+def build_session_id(*contents):
+    """Derive a session id from the uploaded file contents"""
+    digest = hashlib.sha256()
+    for content in contents:
+        digest.update(hashlib.sha256(content).digest())
+    return digest.hexdigest()[:32]
+
+def save_session(parser, session_id):
+    """Persist the parsed comparison so other endpoints can reuse it"""
+    try:
+        arrays, metadata = parser.to_session()
+        SessionStore().save(session_id, arrays, metadata)
+        return session_id
+    except Exception as e:
+        # The dashboard response does not depend on the session store
+        print(f"[WARNING] Could not save parsed session: {e}")
+        return None
+
+def parse_sections_param(path):
+    """Read the optional comma-separated ``sections`` query parameter"""
+    from urllib.parse import urlparse, parse_qs
+
+    query_params = parse_qs(urlparse(path).query)
+    values = query_params.get('sections')
+    if not values:
+        return None
+
+    sections = [name.strip() for value in values for name in value.split(',') if name.strip()]
+    return sections or None
+
+def parse_snapshot_param(path):
+    """
+    Read the optional ``snapshot`` and ``distinct_error`` query parameters
+
+    Returns:
+        (include a roll-up snapshot, HyperLogLog error or None for exact distinct accounts)
+
+    Raises:
+        ValueError: If distinct_error is not a number between 0 and 1
+    """
+    from urllib.parse import urlparse, parse_qs
+
+    query_params = parse_qs(urlparse(path).query)
+    include = any(value.strip().lower() == 'true' for value in query_params.get('snapshot', []))
+
+    error = query_params.get('distinct_error', [None])[0]
+    if error is not None:
+        try:
+            error = float(error)
+        except ValueError:
+            error = -1.0
+        if not 0 < error < 1:
+            raise ValueError('distinct_error must be a number between 0 and 1')
+    return include, error
+
 def clean_nan_values(obj):
     """Recursively clean NaN values from nested dictionaries and lists"""
     if isinstance(obj, dict):
         return {key: clean_nan_values(value) for key, value in obj.items()}
     elif isinstance(obj, list):
         return [clean_nan_values(item) for item in obj]
-    elif pd and pd.isna(obj):
+    elif is_nan(obj):
         return None
-    elif isinstance(obj, float):
-        # Check if it's NaN using string comparison as fallback
-        if str(obj) == 'nan' or obj != obj:  # NaN != NaN is True
-            return None
-        return obj
     else:
         return obj
 
 def json_serializer(obj):
     """Custom JSON serializer to handle pandas types and datetime objects"""
-    if pd and pd.isna(obj):
+    if is_nan(obj):
         return None  # Convert NaN to null
     if isinstance(obj, (datetime,)):
         return obj.isoformat()
     return str(obj)
 
 class handler(BaseHTTPRequestHandler):
+    def send_json(self, status, payload):
+        """Send a JSON response with CORS headers"""
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
+
+    def read_upload(self):
+        """
+        Validate the request and extract the uploaded files
+
+        Raises:
+            ValueError: If the request is not a valid comparison upload
+        """
+        # Get content type and boundary
+        content_type = self.headers.get('Content-Type', '')
+        if 'multipart/form-data' not in content_type:
+            raise ValueError('Expected multipart/form-data')
+
+        # Extract boundary
+        boundary_match = re.search(r'boundary=([^;]+)', content_type)
+        if not boundary_match:
+            raise ValueError('No boundary found in Content-Type')
+
+        boundary = '--' + boundary_match.group(1)
+
+        content_length = self.headers.get('Content-Length')
+        if not content_length or not content_length.isdigit():
+            raise ValueError('Content-Length header is required')
+
+        # Read the uploaded file data
+        post_data = self.rfile.read(int(content_length))
+
+        # Parse multipart data to extract BOTH files
+        files = parse_multipart_form_data(post_data, boundary)
+
+        return files
+
     def do_POST(self):
-        """Handle TWO file uploads and parse sales comparison data"""
-        previous_year_temp = None
-        current_year_temp = None
+        """Handle TWO file uploads (or one archive) and parse sales comparison data"""
+        # Reject invalid requests before importing the parser
         try:
-            # Check if parser is available
-            if SalesComparisonParser is None:
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-
-                error_response = {
-                    'error': 'Sales comparison parser not available',
-                    'message': 'Parser module could not be imported',
-                    'import_error': import_error
-                }
-                self.wfile.write(json.dumps(error_response).encode())
-                return
-
-            # Get content type and boundary
-            content_type = self.headers.get('Content-Type', '')
-            if 'multipart/form-data' not in content_type:
-                raise ValueError('Expected multipart/form-data')
-
-            # Extract boundary
-            boundary_match = re.search(r'boundary=([^;]+)', content_type)
-            if not boundary_match:
-                raise ValueError('No boundary found in Content-Type')
-
-            boundary = '--' + boundary_match.group(1)
-
-            # Read the uploaded file data
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-
-            # Parse multipart data to extract BOTH files
-            files = parse_multipart_form_data(post_data, boundary)
-
-            if 'previousYearFile' not in files or 'currentYearFile' not in files:
-                raise ValueError('Both previousYearFile and currentYearFile are required')
-
-            # Save previous year file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix='_py.xlsx') as temp_file:
-                temp_file.write(files['previousYearFile']['content'])
-                previous_year_temp = temp_file.name
-
-            # Save current year file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix='_cy.xlsx') as temp_file:
-                temp_file.write(files['currentYearFile']['content'])
-                current_year_temp = temp_file.name
+            files = self.read_upload()
+            previous_year_file, current_year_file, extra_periods = collect_workbooks(files)
+
+            # Optional section selector, e.g. ?sections=accounts_per_brand,sales_per_working_day
+            sections = parse_sections_param(self.path)
+            unknown = [name for name in sections or [] if name not in SUMMARY_SECTIONS]
+
+            # Optional mergeable snapshot for territory/region roll-ups, e.g.
+            # ?snapshot=true (exact) or ?snapshot=true&distinct_error=0.02 (HyperLogLog)
+            include_snapshot, distinct_error = parse_snapshot_param(self.path)
+        except ValueError as e:
+            self.send_json(400, {
+                'error': str(e),
+                'message': 'Invalid upload request'
+            })
+            return
+
+        if unknown:
+            self.send_json(400, {
+                'error': f"Unknown section(s): {', '.join(unknown)}",
+                'message': 'Invalid upload request',
+                'valid_sections': list(SUMMARY_SECTIONS)
+            })
+            return
+
+        # Check if parser is available
+        if load_parser_modules() is None:
+            self.send_json(500, {
+                'error': 'Sales comparison parser not available',
+                'message': 'Parser module could not be imported',
+                'import_error': import_error
+            })
+            return
+
+        try:
+            # Workbooks are parsed straight from memory (no temp files)
+            previous_year_source = NamedWorkbook(previous_year_file['content'], previous_year_file['filename'])
+            current_year_source = NamedWorkbook(current_year_file['content'], current_year_file['filename'])
 
             # Parse BOTH Excel files with comparison parser
             import time
             start_time = time.time()
             print(f"[TIMING] Starting parser at {start_time}")
 
-            parser = SalesComparisonParser(previous_year_temp, current_year_temp)
+            # A previous year file uploaded before is restored from the workbook cache
+            parser = SalesComparisonParser(previous_year_source, current_year_source,
+                                           workbook_cache=WorkbookCache())
             print(f"[TIMING] Parser created: {time.time() - start_time:.2f}s")
 
             parser.load_data()
             print(f"[TIMING] Data loaded: {time.time() - start_time:.2f}s")
 
-            dashboard_data = parser.get_complete_comparison_summary()
+            session_id = save_session(parser, build_session_id(
+                previous_year_file['content'],
+                current_year_file['content']
+            ))
+
+            dashboard_data = parser.get_complete_comparison_summary(sections=sections)
             print(f"[TIMING] Summary complete: {time.time() - start_time:.2f}s")
 
+            # Archives with older workbooks also get the history across all periods
+            history = None
+            if extra_periods:
+                history = clean_nan_values(build_history(extra_periods + [previous_year_file, current_year_file]))
+                print(f"[TIMING] History complete: {time.time() - start_time:.2f}s")
+
+            snapshot = None
+            if include_snapshot:
+                snapshot = parser.get_aggregate_snapshot(distinct_error=distinct_error).to_dict()
+                print(f"[TIMING] Snapshot complete: {time.time() - start_time:.2f}s")
+
             # Clean NaN values from the data
             dashboard_data = clean_nan_values(dashboard_data)
 
-            # Clean up temp files
-            if previous_year_temp and os.path.exists(previous_year_temp):
-                os.remove(previous_year_temp)
-                previous_year_temp = None
-            if current_year_temp and os.path.exists(current_year_temp):
-                os.remove(current_year_temp)
-                current_year_temp = None
-
             # Return success with parsed data
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
@@ -166,24 +345,18 @@ class handler(BaseHTTPRequestHandler):
             response = {
                 'success': True,
                 'message': 'Files processed successfully with brand-level comparison',
+                'session_id': session_id,
+                'periods': describe_periods(previous_year_file, current_year_file, extra_periods),
                 'data': dashboard_data
             }
+            if history is not None:
+                response['history'] = history
+            if snapshot is not None:
+                response['snapshot'] = snapshot
 
             self.wfile.write(json.dumps(response, default=json_serializer).encode())
 
         except Exception as e:
-            # Clean up temp files on error
-            if previous_year_temp and os.path.exists(previous_year_temp):
-                try:
-                    os.remove(previous_year_temp)
-                except:
-                    pass
-            if current_year_temp and os.path.exists(current_year_temp):
-                try:
-                    os.remove(current_year_temp)
-                except:
-                    pass
-
             # Return error response
             self.send_response(500)
             self.send_header('Content-type', 'application/json')
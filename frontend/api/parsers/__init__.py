@@ -1,3 +1,16 @@
 # Sales Dashboard Parsers
-from .sales_parser import SalesDashboardParser
-from .sales_comparison_parser import SalesComparisonParser
+# Parsers are imported on first access so that lightweight modules in this
+# package (e.g. session_store) can be used without importing pandas
+
+
+def __getattr__(name):
+    if name == 'SalesDashboardParser':
+        from .sales_parser import SalesDashboardParser
+        return SalesDashboardParser
+    if name == 'SalesComparisonParser':
+        from .sales_comparison_parser import SalesComparisonParser
+        return SalesComparisonParser
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['SalesDashboardParser', 'SalesComparisonParser']
@@ -0,0 +1,416 @@
+"""
+Aggregate Snapshots
+Compact, mergeable aggregates of one parsed comparison (brand totals, per-city
+sums, account category counts, top-K candidate lists and distinct-account
+sets or sketches), so territory and region dashboards are rolled up from snapshots
+instead of re-parsing every rep's workbooks
+"""
+
+import heapq
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .comparison_aggregates import ACCOUNT_CATEGORIES, classify_accounts
+    from .distinct_counts import AccountSet, HyperLogLog, distinct_accounts, distinct_from_dict
+except ImportError:
+    # Imported by a parser run as a script from the parsers directory
+    from comparison_aggregates import ACCOUNT_CATEGORIES, classify_accounts
+    from distinct_counts import AccountSet, HyperLogLog, distinct_accounts, distinct_from_dict
+
+
+YEARS = ('py', 'cy')
+
+# Per section: summed count fields, then distinct-account fields
+SECTION_FIELDS = {
+    'brands': (
+        ('total_units_py', 'total_units_cy'),
+        ('accounts_py', 'accounts_cy', 'qualifying_py', 'qualifying_cy')
+    ),
+    'cities': (
+        ('total_units_py', 'total_units_cy') + tuple(f'{category}_count' for category in ACCOUNT_CATEGORIES),
+        ('accounts',)
+    ),
+    'color_groups': (
+        ('total_units_py', 'total_units_cy'),
+        ('accounts_py', 'accounts_cy')
+    ),
+}
+
+# Bump when the layout of to_dict() changes
+SNAPSHOT_VERSION = 1
+
+
+def _grouped_sets(labels: np.ndarray, accounts: np.ndarray, error: Optional[float] = None) -> Dict:
+    """Distinct accounts per label, from one sort of the (label, account) pairs"""
+    pairs = pd.DataFrame({'label': labels, 'account': accounts}).drop_duplicates()
+    pairs = pairs.sort_values(['label', 'account'], kind='stable')
+    grouped = pairs.groupby('label', sort=False)['account']
+    return {
+        str(label): distinct_accounts(values.to_numpy(), error, is_unique=True) for label, values in grouped
+    }
+
+
+class AggregateSnapshot:
+    """
+    Mergeable aggregates of one or more parsed comparisons
+
+    merge() is associative and commutative: counts and units are summed,
+    distinct-account sets are unioned (an account shared by two snapshots is
+    counted once) and the ranked lists are a sorted union cut to top_k.
+    Category counts are classified within each snapshot and summed. A
+    snapshot records the sources it covers and refuses to merge a source
+    twice.
+
+    With distinct_error set, distinct accounts are HyperLogLog sketches of
+    a fixed size instead of exact sets, and their counts are estimates.
+    """
+
+    def __init__(self, threshold: int, top_k: int, sources: Iterable[str] = (),
+                 distinct_error: Optional[float] = None):
+        """
+        Empty snapshot (the identity of merge)
+
+        Args:
+            threshold: Minimum units for a purchase to qualify
+            top_k: Length of the ranked lists
+            sources: Labels of the comparisons covered (e.g. rep workbooks)
+            distinct_error: None for exact distinct-account sets, otherwise the
+                            target relative error of HyperLogLog sketches
+        """
+        self.threshold = threshold
+        self.top_k = top_k
+        self.sources = sorted(sources)
+        self.distinct_error = distinct_error
+        # Section -> label -> {'counts': int64 array, 'accounts': {field: AccountSet or HyperLogLog}}
+        self.sections: Dict[str, Dict[str, Dict]] = {section: {} for section in SECTION_FIELDS}
+        self.brand_color_groups: Dict[str, str] = {}
+        self.categories = np.zeros(len(ACCOUNT_CATEGORIES), dtype=np.int64)
+        self.accounts = distinct_accounts(error=distinct_error)
+        # Largest qualifying purchases per year and brand as (-units, account number, name)
+        self.top_qualifying: Dict[str, Dict[str, List]] = {year: {} for year in YEARS}
+        # Largest increase / decrease as (rank key, account number, name, py, cy)
+        self.top_growing: List = []
+        self.top_declining: List = []
+
+    def _entry(self, section: str, label: str) -> Dict:
+        """Aggregates of one label, created empty on first use"""
+        entries = self.sections[section]
+        if label not in entries:
+            counts, sets = SECTION_FIELDS[section]
+            entries[label] = {
+                'counts': np.zeros(len(counts), dtype=np.int64),
+                'accounts': {field: distinct_accounts(error=self.distinct_error) for field in sets}
+            }
+        return entries[label]
+
+    def _add_counts(self, section: str, field: str, counts: pd.Series):
+        """Add per-label counts to one count field of a section"""
+        position = SECTION_FIELDS[section][0].index(field)
+        for label, count in counts.items():
+            self._entry(section, str(label))['counts'][position] += int(count)
+
+    def _set_accounts(self, section: str, field: str, sets: Dict):
+        """Store per-label distinct-account sets of a section"""
+        for label, accounts in sets.items():
+            self._entry(section, label)['accounts'][field] = accounts
+
+    @classmethod
+    def from_partition(cls, partition: Dict[str, np.ndarray], brands: List[str], color_groups: List[str],
+                       names: Dict[int, str], threshold: int = 12, top_k: int = 10,
+                       source: str = 'comparison', distinct_error: Optional[float] = None) -> 'AggregateSnapshot':
+        """
+        Snapshot of one comparison
+
+        Args:
+            partition: Arrays of the whole comparison as one partition
+                       (see ComparisonAggregator.partition_inputs)
+            brands: Brand name of each brand column
+            color_groups: Color group of each brand column
+            names: Account number -> account name
+            threshold: Minimum units for a purchase to qualify
+            top_k: Length of the ranked lists
+            source: Label of the comparison (e.g. the rep workbook)
+            distinct_error: None for exact distinct-account sets, otherwise the
+                            target relative error of HyperLogLog sketches
+
+        Returns:
+            AggregateSnapshot of the comparison
+        """
+        snapshot = cls(threshold, top_k, [source], distinct_error)
+        error = distinct_error
+        brands = np.array(brands, dtype=object)
+        color_groups = np.array(color_groups, dtype=object)
+        snapshot.brand_color_groups = dict(zip(brands.tolist(), color_groups.tolist()))
+
+        for year in YEARS:
+            accounts = partition[f'{year}_accounts']
+            cols = partition[f'{year}_cols']
+            units = partition[f'{year}_units']
+            qualifying = units >= threshold
+
+            brand_units = pd.Series(units).groupby(brands[cols], sort=False).sum()
+            snapshot._add_counts('brands', f'total_units_{year}', brand_units)
+            snapshot._set_accounts('brands', f'accounts_{year}', _grouped_sets(brands[cols], accounts, error))
+            snapshot._set_accounts('brands', f'qualifying_{year}',
+                                   _grouped_sets(brands[cols[qualifying]], accounts[qualifying], error))
+
+            color_units = pd.Series(units).groupby(color_groups[cols], sort=False).sum()
+            snapshot._add_counts('color_groups', f'total_units_{year}', color_units)
+            snapshot._set_accounts('color_groups', f'accounts_{year}', _grouped_sets(color_groups[cols], accounts, error))
+
+            city_units = pd.Series(units).groupby(partition[f'{year}_groups'], sort=False).sum()
+            snapshot._add_counts('cities', f'total_units_{year}', city_units)
+
+            # Largest purchases first per brand (lowest account number on ties), cut to top_k
+            q_accounts, q_cols, q_units = accounts[qualifying], cols[qualifying], units[qualifying]
+            order = np.lexsort((q_accounts, -q_units, q_cols))
+            q_accounts, q_cols, q_units = q_accounts[order], q_cols[order], q_units[order]
+            starts = np.searchsorted(q_cols, np.arange(len(brands) + 1))
+            for col, brand in enumerate(brands.tolist()):
+                end = min(starts[col + 1], starts[col] + top_k)
+                if end > starts[col]:
+                    snapshot.top_qualifying[year][brand] = [
+                        (-int(u), int(a), names.get(int(a), 'nan'))
+                        for u, a in zip(q_units[starts[col]:end], q_accounts[starts[col]:end])
+                    ]
+
+        # Distinct accounts with rows in each city (either year) and overall
+        row_groups = np.concatenate([partition['py_rows_groups'], partition['cy_rows_groups']])
+        row_accounts = np.concatenate([partition['py_rows_accounts'], partition['cy_rows_accounts']])
+        snapshot._set_accounts('cities', 'accounts', _grouped_sets(row_groups, row_accounts, error))
+        snapshot.accounts = distinct_accounts(row_accounts, error)
+
+        # Account categories per city, and overall, from the summed active cells
+        cells = pd.DataFrame({
+            'group': partition['joined_groups'],
+            'account_number': partition['joined_accounts'],
+            'py': partition['joined_py'],
+            'cy': partition['joined_cy']
+        })
+        by_group = cells.groupby(['group', 'account_number'], sort=False)[['py', 'cy']].sum()
+        categories = pd.Series(classify_accounts(by_group['py'], by_group['cy']), index=by_group.index)
+        for category in ACCOUNT_CATEGORIES:
+            matches = categories[categories == category]
+            snapshot._add_counts('cities', f'{category}_count', matches.groupby(level='group', sort=False).size())
+
+        by_account = cells.groupby('account_number')[['py', 'cy']].sum()
+        account_categories = classify_accounts(by_account['py'], by_account['cy'])
+        snapshot.categories = np.array(
+            [np.count_nonzero(account_categories == category) for category in ACCOUNT_CATEGORIES], dtype=np.int64
+        )
+
+        # Ranked accounts by their total change (all cities)
+        change = (by_account['cy'] - by_account['py']).tolist()
+        entries = [
+            (c, int(a), names.get(int(a), 'nan'), int(py), int(cy))
+            for c, a, py, cy in zip(change, by_account.index, by_account['py'], by_account['cy'])
+        ]
+        snapshot.top_growing = heapq.nsmallest(top_k, [(-c, a, n, py, cy) for c, a, n, py, cy in entries if c > 0])
+        snapshot.top_declining = heapq.nsmallest(top_k, [(c, a, n, py, cy) for c, a, n, py, cy in entries if c < 0])
+        return snapshot
+
+    def merge(self, other: 'AggregateSnapshot') -> 'AggregateSnapshot':
+        """
+        Combine two snapshots into a new one
+
+        Args:
+            other: Snapshot of other comparisons (same threshold, top_k and distinct_error)
+
+        Returns:
+            Snapshot covering the sources of both
+        """
+        return merge_snapshots([self, other])
+
+    def get_dashboard(self) -> Dict:
+        """
+        Rolled-up dashboard of the snapshot
+
+        Returns:
+            Dictionary with per-brand, per-city and per-color-group totals and
+            distinct accounts, the ranked account lists and a summary
+        """
+        def fields(section: str, entry: Dict) -> Dict:
+            counts, sets = SECTION_FIELDS[section]
+            values = {field: int(value) for field, value in zip(counts, entry['counts'])}
+            values.update({field: entry['accounts'][field].count() for field in sets})
+            return values
+
+        def accounts(entries):
+            return [{'account_number': a, 'account_name': n, 'units': -u} for u, a, n in entries]
+
+        def ranked(entries):
+            return [
+                {'account_number': a, 'account_name': n, 'previous_year_units': py,
+                 'current_year_units': cy, 'change': cy - py}
+                for _, a, n, py, cy in entries
+            ]
+
+        brands = []
+        for brand, entry in self.sections['brands'].items():
+            values = fields('brands', entry)
+            row = {'brand': brand, 'color_group': self.brand_color_groups.get(brand, 'OTHER')}
+            for year in YEARS:
+                row[f'accounts_buying_12_plus_{year}'] = values[f'qualifying_{year}']
+                row[f'total_accounts_buying_{year}'] = values[f'accounts_{year}']
+                row[f'total_units_{year}'] = values[f'total_units_{year}']
+                row[f'top_accounts_{year}'] = accounts(self.top_qualifying[year].get(brand, []))
+            brands.append(row)
+        brands.sort(key=lambda x: (-x['accounts_buying_12_plus_cy'], x['brand']))
+
+        cities = []
+        for city, entry in self.sections['cities'].items():
+            values = fields('cities', entry)
+            values['total_accounts'] = values.pop('accounts')
+            cities.append(dict({'city': city}, **values))
+        cities.sort(key=lambda x: (-x['total_units_cy'], x['city']))
+
+        color_groups = [
+            dict({'color_group': group}, **fields('color_groups', entry))
+            for group, entry in self.sections['color_groups'].items()
+        ]
+        color_groups.sort(key=lambda x: (-x['total_units_cy'], x['color_group']))
+
+        summary = {
+            'sources': len(self.sources),
+            'total_accounts': self.accounts.count(),
+            'total_units_py': sum(city['total_units_py'] for city in cities),
+            'total_units_cy': sum(city['total_units_cy'] for city in cities)
+        }
+        summary.update({
+            f'{category}_count': int(count) for category, count in zip(ACCOUNT_CATEGORIES, self.categories)
+        })
+
+        return {
+            'threshold': self.threshold,
+            'distinct_error': self.distinct_error,
+            'sources': self.sources,
+            'brands': brands,
+            'cities': cities,
+            'color_groups': color_groups,
+            'top_growing_accounts': ranked(self.top_growing),
+            'top_declining_accounts': ranked(self.top_declining),
+            'summary': summary
+        }
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form of the snapshot (see from_dict)"""
+        return {
+            'version': SNAPSHOT_VERSION,
+            'threshold': self.threshold,
+            'top_k': self.top_k,
+            'distinct_error': self.distinct_error,
+            'sources': self.sources,
+            'sections': {
+                section: {
+                    label: {
+                        'counts': entry['counts'].tolist(),
+                        'accounts': {field: s.to_dict() for field, s in entry['accounts'].items()}
+                    }
+                    for label, entry in entries.items()
+                }
+                for section, entries in self.sections.items()
+            },
+            'brand_color_groups': self.brand_color_groups,
+            'categories': self.categories.tolist(),
+            'accounts': self.accounts.to_dict(),
+            'top_qualifying': {
+                year: {brand: [list(e) for e in entries] for brand, entries in by_brand.items()}
+                for year, by_brand in self.top_qualifying.items()
+            },
+            'top_growing': [list(e) for e in self.top_growing],
+            'top_declining': [list(e) for e in self.top_declining]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AggregateSnapshot':
+        """
+        Restore a snapshot from to_dict() output
+
+        Raises:
+            ValueError: If the snapshot was written by an incompatible version
+        """
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {data.get('version')}")
+
+        error = data.get('distinct_error')
+        snapshot = cls(data['threshold'], data['top_k'], data['sources'], error)
+        for section, entries in data['sections'].items():
+            for label, entry in entries.items():
+                snapshot.sections[section][label] = {
+                    'counts': np.array(entry['counts'], dtype=np.int64),
+                    'accounts': {field: distinct_from_dict(s, error) for field, s in entry['accounts'].items()}
+                }
+        snapshot.brand_color_groups = dict(data['brand_color_groups'])
+        snapshot.categories = np.array(data['categories'], dtype=np.int64)
+        snapshot.accounts = distinct_from_dict(data['accounts'], error)
+        snapshot.top_qualifying = {
+            year: {brand: [tuple(e) for e in entries] for brand, entries in by_brand.items()}
+            for year, by_brand in data['top_qualifying'].items()
+        }
+        snapshot.top_growing = [tuple(e) for e in data['top_growing']]
+        snapshot.top_declining = [tuple(e) for e in data['top_declining']]
+        return snapshot
+
+
+def merge_snapshots(snapshots: List[AggregateSnapshot]) -> AggregateSnapshot:
+    """
+    Merge any number of snapshots in one pass
+
+    Equivalent to folding AggregateSnapshot.merge over the list in any order,
+    but each distinct-account set is unioned once instead of once per step.
+
+    Args:
+        snapshots: Snapshots with the same threshold, top_k and distinct_error
+
+    Returns:
+        Snapshot covering every source
+
+    Raises:
+        ValueError: If the snapshots differ in threshold, top_k or
+                    distinct_error, or a source appears in more than one of them
+    """
+    if not snapshots:
+        raise ValueError('No snapshots to merge')
+    threshold, top_k, error = snapshots[0].threshold, snapshots[0].top_k, snapshots[0].distinct_error
+    if any((s.threshold, s.top_k, s.distinct_error) != (threshold, top_k, error) for s in snapshots):
+        raise ValueError('Cannot merge snapshots computed with different parameters')
+
+    sources = [source for s in snapshots for source in s.sources]
+    repeated = sorted(source for source, count in Counter(sources).items() if count > 1)
+    if repeated:
+        raise ValueError(f"Source(s) already included in the roll-up: {', '.join(repeated)}")
+
+    merged = AggregateSnapshot(threshold, top_k, sources, error)
+    counter = AccountSet if error is None else HyperLogLog
+    for section in SECTION_FIELDS:
+        labels = {}
+        for s in snapshots:
+            for label, entry in s.sections[section].items():
+                labels.setdefault(label, []).append(entry)
+        for label, entries in labels.items():
+            merged.sections[section][label] = {
+                'counts': np.sum([entry['counts'] for entry in entries], axis=0),
+                'accounts': {
+                    field: counter.merge_all([entry['accounts'][field] for entry in entries])
+                    for field in SECTION_FIELDS[section][1]
+                }
+            }
+
+    for s in snapshots:
+        merged.brand_color_groups.update(s.brand_color_groups)
+    merged.categories = np.sum([s.categories for s in snapshots], axis=0)
+    merged.accounts = counter.merge_all([s.accounts for s in snapshots])
+
+    for year in YEARS:
+        brands = sorted({brand for s in snapshots for brand in s.top_qualifying[year]})
+        merged.top_qualifying[year] = {
+            brand: heapq.nsmallest(top_k, [e for s in snapshots for e in s.top_qualifying[year].get(brand, [])])
+            for brand in brands
+        }
+    merged.top_growing = heapq.nsmallest(top_k, [e for s in snapshots for e in s.top_growing])
+    merged.top_declining = heapq.nsmallest(top_k, [e for s in snapshots for e in s.top_declining])
+    return merged
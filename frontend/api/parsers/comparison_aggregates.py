@@ -0,0 +1,588 @@
+"""
+Comparison Aggregates
+Fills every brand-level aggregate of a previous/current year comparison
+(per-brand and threshold counts, group totals, color group sums and account
+classifications) from one scan over each year's purchases and one over the
+joined PY/CY rows, so the comparison sections are views over shared results
+"""
+
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .brand_matrix import BrandMatrix
+except ImportError:
+    # Imported by a parser run as a script from the parsers directory
+    from brand_matrix import BrandMatrix
+
+
+# Row labels the group aggregates can be keyed by (BrandMatrix attribute, joined rows key)
+GROUP_BY_FIELDS = {
+    'city': ('cities', 'cities'),
+    'name': ('names', 'names'),
+}
+
+
+# Account categories, in the order they are tested (mutually exclusive)
+ACCOUNT_CATEGORIES = ('lost', 'new', 'growing', 'declining')
+
+
+def classify_accounts(previous_year_units, current_year_units) -> np.ndarray:
+    """
+    Category of each account from its summed active units
+
+    Args:
+        previous_year_units: Previous year units per account
+        current_year_units: Current year units per account
+
+    Returns:
+        'lost', 'new', 'growing', 'declining' or '' (unchanged) per account
+    """
+    py = np.asarray(previous_year_units)
+    cy = np.asarray(current_year_units)
+    change = cy - py
+    return np.select(
+        [(py > 0) & (cy == 0), (py == 0) & (cy > 0), change > 0, change < 0],
+        list(ACCOUNT_CATEGORIES),
+        default=''
+    )
+
+
+def group_labels(values) -> np.ndarray:
+    """Normalized group label of each row (blank and missing values become 'Unknown')"""
+    labels = []
+    for value in values:
+        value = str(value).strip()
+        labels.append('Unknown' if not value or value == 'nan' else value)
+    return np.array(labels, dtype=object)
+
+
+class YearPurchases:
+    """Purchases (units > 0) of one year as (row, brand, units) entries, scanned once"""
+
+    def __init__(self, matrix: BrandMatrix):
+        """
+        Scan the year's non-zero units
+
+        Args:
+            matrix: Brand matrix of the year (dense or sparse)
+        """
+        self.matrix = matrix
+        rows, cols, units = matrix.nonzero()
+        positive = units > 0
+        self.rows = rows[positive]
+        self.cols = cols[positive]
+        self.units = units[positive].astype(np.int64)
+
+        # Accounts buying each brand and their units
+        self.brand_accounts = np.bincount(self.cols, minlength=len(matrix.brands))
+        self.brand_units = np.zeros(len(matrix.brands), dtype=np.int64)
+        np.add.at(self.brand_units, self.cols, self.units)
+
+    ARRAYS = ('rows', 'cols', 'units', 'brand_accounts', 'brand_units')
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Numeric arrays of the scan (see from_arrays)"""
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, matrix: BrandMatrix, arrays: Dict[str, np.ndarray]) -> 'YearPurchases':
+        """
+        Restore a stored scan without rescanning the matrix
+
+        Args:
+            matrix: Brand matrix the scan was taken from
+            arrays: Arrays produced by to_arrays()
+        """
+        purchases = cls.__new__(cls)
+        purchases.matrix = matrix
+        for name in cls.ARRAYS:
+            setattr(purchases, name, arrays[name])
+        return purchases
+
+
+class YearAggregates:
+    """Threshold and group aggregates of one year's purchases"""
+
+    def __init__(self, purchases: YearPurchases, threshold: int, labels: np.ndarray):
+        """
+        Reduce the year's purchases for one threshold and grouping
+
+        Args:
+            purchases: Scanned purchases of the year
+            threshold: Minimum units for a purchase to qualify
+            labels: Group label of each matrix row
+        """
+        matrix = purchases.matrix
+        rows, cols, units = purchases.rows, purchases.cols, purchases.units
+        num_brands = len(matrix.brands)
+
+        self.matrix = matrix
+        self.brand_accounts = purchases.brand_accounts
+        self.brand_units = purchases.brand_units
+
+        # Qualifying purchases grouped by brand, largest first (row order on ties)
+        qualifying = units >= threshold
+        q_rows, q_cols, q_units = rows[qualifying], cols[qualifying], units[qualifying]
+        order = np.lexsort((q_rows, -q_units, q_cols))
+        self.qualifying_rows = q_rows[order]
+        self.qualifying_units = q_units[order]
+        self.qualifying_starts = np.searchsorted(q_cols[order], np.arange(num_brands + 1))
+
+        # Purchases keyed by (group, brand) cell
+        codes, groups = pd.factorize(pd.Series(labels, dtype=object))
+        num_groups = len(groups)
+        self.groups = list(groups)
+        cells = codes[rows] * num_brands + cols
+
+        brand_units = np.zeros(num_groups * num_brands, dtype=np.int64)
+        np.add.at(brand_units, cells, units)
+        self.group_brand_units = brand_units.reshape(num_groups, num_brands)
+        self.group_brand_accounts = np.bincount(cells, minlength=num_groups * num_brands).reshape(num_groups, num_brands)
+        self.group_brand_qualifying = np.bincount(
+            cells[qualifying], minlength=num_groups * num_brands
+        ).reshape(num_groups, num_brands)
+        self.group_color_units = matrix.color_units(self.group_brand_units)
+
+        # Order in which each brand / color group first appears in the group's rows
+        self.not_seen = len(matrix.accounts) * num_brands
+        seen_at = rows * num_brands + cols
+        first_seen = np.full(num_groups * num_brands, self.not_seen, dtype=np.int64)
+        np.minimum.at(first_seen, cells, seen_at)
+        self.group_brand_first_seen = first_seen.reshape(num_groups, num_brands)
+        self.group_color_first_seen = np.full((num_groups, len(matrix.color_groups)), self.not_seen, dtype=np.int64)
+        np.minimum.at(self.group_color_first_seen, (codes[rows], matrix.brand_groups[cols]), seen_at)
+
+        # Account numbers of each group's rows
+        group_order = np.argsort(codes, kind='stable')
+        self.group_accounts = np.split(
+            matrix.accounts[group_order], np.cumsum(np.bincount(codes, minlength=num_groups))[:-1]
+        )
+
+    ARRAYS = (
+        'brand_accounts', 'brand_units', 'qualifying_rows', 'qualifying_units', 'qualifying_starts',
+        'group_brand_units', 'group_brand_accounts', 'group_brand_qualifying', 'group_color_units',
+        'group_brand_first_seen', 'group_color_first_seen'
+    )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Numeric and unicode arrays of the aggregates (see from_arrays)"""
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays['groups'] = np.array(self.groups, dtype=str)
+        arrays['group_account_counts'] = np.array([len(a) for a in self.group_accounts], dtype=np.int64)
+        arrays['group_accounts'] = (np.concatenate(self.group_accounts) if self.group_accounts
+                                    else np.zeros(0, dtype=np.int64))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, matrix: BrandMatrix, arrays: Dict[str, np.ndarray]) -> 'YearAggregates':
+        """
+        Restore stored aggregates without reducing the purchases again
+
+        Args:
+            matrix: Brand matrix the aggregates were computed from
+            arrays: Arrays produced by to_arrays()
+        """
+        aggregates = cls.__new__(cls)
+        aggregates.matrix = matrix
+        for name in cls.ARRAYS:
+            setattr(aggregates, name, arrays[name])
+        aggregates.groups = [str(group) for group in arrays['groups']]
+        aggregates.not_seen = len(matrix.accounts) * len(matrix.brands)
+        aggregates.group_accounts = np.split(arrays['group_accounts'], np.cumsum(arrays['group_account_counts'])[:-1])
+        return aggregates
+
+    def qualifying_accounts(self, col: int):
+        """(row positions, units) of the qualifying purchases of one brand column"""
+        start, end = self.qualifying_starts[col], self.qualifying_starts[col + 1]
+        return self.qualifying_rows[start:end], self.qualifying_units[start:end]
+
+
+class ComparisonAggregates:
+    """Aggregates of both years for one threshold and grouping"""
+
+    def __init__(self, previous_year: YearAggregates, current_year: YearAggregates,
+                 account_totals: pd.DataFrame, threshold: int, group_by: str):
+        self.previous_year = previous_year
+        self.current_year = current_year
+        self.account_totals = account_totals
+        self.threshold = threshold
+        self.group_by = group_by
+
+
+class ComparisonAggregator:
+    """
+    Scans a loaded comparison once and serves every aggregate from the scan
+
+    The joined scan covers the active (account row, brand) cells of the
+    joined PY/CY rows: brand changes, color group customer totals and the
+    inputs of the account classifications. Threshold and grouping dependent
+    aggregates are reductions over the scans, memoized per parameter set.
+    """
+
+    def __init__(self, previous_year: BrandMatrix, current_year: BrandMatrix, joined: Dict,
+                 previous_year_purchases: Optional[YearPurchases] = None,
+                 current_year_purchases: Optional[YearPurchases] = None):
+        """
+        Scan both years and the joined rows
+
+        Args:
+            previous_year: Previous year brand matrix
+            current_year: Current year brand matrix (same brands)
+            joined: Joined PY/CY rows (see SalesComparisonParser._get_merged_rows)
+            previous_year_purchases: Stored scan of the previous year (skips rescanning it)
+            current_year_purchases: Stored scan of the current year
+        """
+        self.previous_year = previous_year_purchases or YearPurchases(previous_year)
+        self.current_year = current_year_purchases or YearPurchases(current_year)
+        self.joined = joined
+        self.accounts = np.asarray(joined['accounts'], dtype=np.int64)
+
+        # Active cells in row-major order (the order brand changes are listed in)
+        self.change_rows, self.change_cols = np.nonzero(joined['active'])
+        self.change_previous_year = joined['py_units'][self.change_rows, self.change_cols]
+        self.change_current_year = joined['cy_units'][self.change_rows, self.change_cols]
+
+        self.color_group_customers = self._color_group_customers()
+        self._aggregates = {}
+        self._year_aggregates = {}
+        # Concurrent summary sections ask for the same aggregates; each is reduced once
+        self._memo_lock = threading.RLock()
+
+    def seed_year_aggregates(self, year: str, aggregates: YearAggregates, threshold: int = 12,
+                             group_by: str = 'city'):
+        """
+        Use stored aggregates of one year instead of reducing its purchases again
+
+        Args:
+            year: 'py' or 'cy'
+            aggregates: Aggregates of that year for the threshold and grouping
+            threshold: Threshold the aggregates were computed with
+            group_by: Grouping the aggregates were computed with
+        """
+        self._year_aggregates[(year, threshold, group_by)] = aggregates
+
+    def year_aggregates(self, year: str, threshold: int = 12, group_by: str = 'city') -> YearAggregates:
+        """
+        Aggregates of one year for a threshold and grouping (memoized)
+
+        Args:
+            year: 'py' or 'cy'
+            threshold: Minimum units for a purchase to qualify
+            group_by: Row label to group by (see GROUP_BY_FIELDS)
+        """
+        key = (year, threshold, group_by)
+        with self._memo_lock:
+            if key not in self._year_aggregates:
+                if group_by not in GROUP_BY_FIELDS:
+                    raise ValueError(
+                        f"Unknown group_by: {group_by}. Valid values: {', '.join(GROUP_BY_FIELDS)}"
+                    )
+                purchases = self.previous_year if year == 'py' else self.current_year
+                labels = self._matrix_labels(purchases.matrix, GROUP_BY_FIELDS[group_by][0])
+                self._year_aggregates[key] = YearAggregates(purchases, threshold, labels)
+            return self._year_aggregates[key]
+
+    def _color_group_customers(self) -> pd.DataFrame:
+        """
+        Active color group units summed per (color group, account), in row order
+
+        Returns:
+            DataFrame indexed by (group position, account number) with the joined
+            rows of each customer and their previous/current year units
+        """
+        rows, groups = np.nonzero(self.joined['active_color_groups'])
+        pairs = pd.DataFrame({
+            'group': groups,
+            'account_number': self.accounts[rows],
+            'row': rows,
+            'previous_year_units': self.joined['py_color_units'][rows, groups],
+            'current_year_units': self.joined['cy_color_units'][rows, groups]
+        })
+        grouped = pairs.groupby(['group', 'account_number'], sort=False)
+        totals = grouped[['previous_year_units', 'current_year_units']].sum()
+
+        # Joined rows of each customer, split from one stable sort by group number
+        codes = grouped.ngroup().to_numpy()
+        order = np.argsort(codes, kind='stable')
+        customer_rows = np.empty(len(totals), dtype=object)
+        for i, part in enumerate(np.split(rows[order], np.cumsum(np.bincount(codes, minlength=len(totals)))[:-1])):
+            customer_rows[i] = part
+        totals.insert(0, 'rows', customer_rows)
+        return totals
+
+    def _account_totals(self, labels: np.ndarray) -> pd.DataFrame:
+        """
+        Active units summed per (group, account) of the joined rows and classified
+
+        Args:
+            labels: Group label of each joined row
+
+        Returns:
+            DataFrame indexed by (group, account number) in first-appearance order,
+            with the first joined row, previous/current year units, change and
+            category ('lost', 'new', 'growing', 'declining' or '' when unchanged)
+        """
+        rows = self.change_rows
+        cells = pd.DataFrame({
+            'group': labels[rows],
+            'account_number': self.accounts[rows],
+            'row': rows,
+            'previous_year_units': self.change_previous_year,
+            'current_year_units': self.change_current_year
+        })
+        totals = cells.groupby(['group', 'account_number'], sort=False).agg(
+            first_row=('row', 'first'),
+            previous_year_units=('previous_year_units', 'sum'),
+            current_year_units=('current_year_units', 'sum')
+        )
+        totals['change'] = totals['current_year_units'] - totals['previous_year_units']
+        totals['category'] = classify_accounts(totals['previous_year_units'], totals['current_year_units'])
+        return totals
+
+    def aggregate(self, threshold: int = 12, group_by: str = 'city') -> ComparisonAggregates:
+        """
+        Aggregates of both years for a threshold and grouping
+
+        Args:
+            threshold: Minimum units for a purchase to qualify (e.g. 12+ accounts)
+            group_by: Row label to group by (see GROUP_BY_FIELDS)
+
+        Returns:
+            ComparisonAggregates (memoized per parameter set)
+        """
+        key = (threshold, group_by)
+        with self._memo_lock:
+            if key not in self._aggregates:
+                self._aggregates[key] = ComparisonAggregates(
+                    self.year_aggregates('py', threshold, group_by),
+                    self.year_aggregates('cy', threshold, group_by),
+                    self._account_totals(group_labels(self.joined[GROUP_BY_FIELDS[group_by][1]])),
+                    threshold,
+                    group_by
+                )
+            return self._aggregates[key]
+
+    @staticmethod
+    def _matrix_labels(matrix: BrandMatrix, field: str) -> np.ndarray:
+        """Group labels of a matrix's rows ('Unknown' when the matrix has no such labels)"""
+        values = getattr(matrix, field)
+        if values is None:
+            values = [''] * len(matrix.accounts)
+        return group_labels(values)
+
+    def partition_inputs(self, partitions: int, group_by: str = 'city') -> List[Dict[str, np.ndarray]]:
+        """
+        Split the scanned purchases and joined cells into account partitions
+
+        Args:
+            partitions: Number of partitions
+            group_by: Row label the group totals are keyed by (see GROUP_BY_FIELDS)
+
+        Returns:
+            One dictionary of arrays per partition (see compute_partial)
+        """
+        if group_by not in GROUP_BY_FIELDS:
+            raise ValueError(
+                f"Unknown group_by: {group_by}. Valid values: {', '.join(GROUP_BY_FIELDS)}"
+            )
+        matrix_field, joined_field = GROUP_BY_FIELDS[group_by]
+
+        columns = {}
+        for year, purchases in (('py', self.previous_year), ('cy', self.current_year)):
+            matrix = purchases.matrix
+            labels = self._matrix_labels(matrix, matrix_field)
+            columns[year] = {
+                'accounts': matrix.accounts[purchases.rows],
+                'cols': purchases.cols,
+                'units': purchases.units,
+                'groups': labels[purchases.rows]
+            }
+            columns[f'{year}_rows'] = {'accounts': matrix.accounts, 'groups': labels}
+
+        columns['joined'] = {
+            'accounts': self.accounts[self.change_rows],
+            'groups': group_labels(self.joined[joined_field])[self.change_rows],
+            'py': self.change_previous_year,
+            'cy': self.change_current_year
+        }
+
+        inputs = [{} for _ in range(partitions)]
+        for prefix, arrays in columns.items():
+            assignment = partition_accounts(arrays['accounts'], partitions)
+            order = np.argsort(assignment, kind='stable')
+            bounds = np.cumsum(np.bincount(assignment, minlength=partitions))[:-1]
+            for name, values in arrays.items():
+                for partition, part in enumerate(np.split(values[order], bounds)):
+                    inputs[partition][f'{prefix}_{name}'] = part
+        return inputs
+
+
+def partition_accounts(account_numbers: np.ndarray, partitions: int) -> np.ndarray:
+    """
+    Partition of each account number (multiplicative hash, stable across runs)
+
+    Every row of an account lands in the same partition, so distinct-account
+    counts of different partitions add up.
+    """
+    hashed = np.asarray(account_numbers, dtype=np.int64).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return ((hashed >> np.uint64(32)) % np.uint64(partitions)).astype(np.intp)
+
+
+class PartialAggregates:
+    """
+    Mergeable aggregates of one account partition
+
+    merge() is associative and commutative (sums for totals and counts, a
+    sorted union cut to top_k for the ranked lists), so partitions can be
+    computed anywhere and combined in any order.
+    """
+
+    YEARS = ('py', 'cy')
+
+    # Per group: units and distinct accounts, then account counts per category
+    GROUP_FIELDS = ('total_units_py', 'total_units_cy', 'total_accounts') + tuple(
+        f'{category}_count' for category in ACCOUNT_CATEGORIES
+    )
+
+    def __init__(self, num_brands: int, threshold: int, top_k: int):
+        """
+        Empty aggregates (the identity of merge)
+
+        Args:
+            num_brands: Number of brand columns
+            threshold: Minimum units for a purchase to qualify
+            top_k: Length of the ranked lists
+        """
+        self.num_brands = num_brands
+        self.threshold = threshold
+        self.top_k = top_k
+        self.brand_accounts = {year: np.zeros(num_brands, dtype=np.int64) for year in self.YEARS}
+        self.brand_units = {year: np.zeros(num_brands, dtype=np.int64) for year in self.YEARS}
+        self.brand_qualifying = {year: np.zeros(num_brands, dtype=np.int64) for year in self.YEARS}
+        # Largest qualifying purchases per year and brand as (-units, account number)
+        self.top_qualifying = {year: [[] for _ in range(num_brands)] for year in self.YEARS}
+        # Group label -> counts in GROUP_FIELDS order
+        self.groups: Dict[str, np.ndarray] = {}
+        # Accounts with the largest increase / decrease as (rank key, account number, py, cy)
+        self.top_growing: List[Tuple] = []
+        self.top_declining: List[Tuple] = []
+
+    def _add_group_counts(self, field: str, counts: pd.Series):
+        """Add per-group counts to one of GROUP_FIELDS"""
+        position = self.GROUP_FIELDS.index(field)
+        for group, count in counts.items():
+            if group not in self.groups:
+                self.groups[group] = np.zeros(len(self.GROUP_FIELDS), dtype=np.int64)
+            self.groups[group][position] += int(count)
+
+    def merge(self, other: 'PartialAggregates') -> 'PartialAggregates':
+        """
+        Combine two partials into a new one
+
+        Args:
+            other: Aggregates of a disjoint set of accounts (same parameters)
+
+        Returns:
+            Aggregates of both account sets
+        """
+        if (self.num_brands, self.threshold, self.top_k) != (other.num_brands, other.threshold, other.top_k):
+            raise ValueError('Cannot merge aggregates computed with different parameters')
+
+        merged = PartialAggregates(self.num_brands, self.threshold, self.top_k)
+        for year in self.YEARS:
+            merged.brand_accounts[year] = self.brand_accounts[year] + other.brand_accounts[year]
+            merged.brand_units[year] = self.brand_units[year] + other.brand_units[year]
+            merged.brand_qualifying[year] = self.brand_qualifying[year] + other.brand_qualifying[year]
+            merged.top_qualifying[year] = [
+                heapq.nsmallest(self.top_k, ours + theirs)
+                for ours, theirs in zip(self.top_qualifying[year], other.top_qualifying[year])
+            ]
+
+        for groups in (self.groups, other.groups):
+            for group, counts in groups.items():
+                if group in merged.groups:
+                    merged.groups[group] = merged.groups[group] + counts
+                else:
+                    merged.groups[group] = counts.copy()
+
+        merged.top_growing = heapq.nsmallest(self.top_k, self.top_growing + other.top_growing)
+        merged.top_declining = heapq.nsmallest(self.top_k, self.top_declining + other.top_declining)
+        return merged
+
+
+def compute_partial(partition: Dict[str, np.ndarray], num_brands: int, threshold: int,
+                    top_k: int) -> PartialAggregates:
+    """
+    Aggregate one account partition (picklable, so it can run in a worker process)
+
+    Args:
+        partition: Arrays of one partition (see ComparisonAggregator.partition_inputs)
+        num_brands: Number of brand columns
+        threshold: Minimum units for a purchase to qualify
+        top_k: Length of the ranked lists
+
+    Returns:
+        PartialAggregates of the partition
+    """
+    partial = PartialAggregates(num_brands, threshold, top_k)
+
+    for year in PartialAggregates.YEARS:
+        accounts = partition[f'{year}_accounts']
+        cols = partition[f'{year}_cols']
+        units = partition[f'{year}_units']
+
+        partial.brand_accounts[year] = np.bincount(cols, minlength=num_brands).astype(np.int64)
+        np.add.at(partial.brand_units[year], cols, units)
+
+        qualifying = units >= threshold
+        q_accounts, q_cols, q_units = accounts[qualifying], cols[qualifying], units[qualifying]
+        partial.brand_qualifying[year] = np.bincount(q_cols, minlength=num_brands).astype(np.int64)
+
+        # Largest purchases first per brand (lowest account number on ties), cut to top_k
+        order = np.lexsort((q_accounts, -q_units, q_cols))
+        q_accounts, q_cols, q_units = q_accounts[order], q_cols[order], q_units[order]
+        starts = np.searchsorted(q_cols, np.arange(num_brands + 1))
+        for col in range(num_brands):
+            end = min(starts[col + 1], starts[col] + top_k)
+            partial.top_qualifying[year][col] = list(zip(
+                (-q_units[starts[col]:end]).tolist(), q_accounts[starts[col]:end].tolist()
+            ))
+
+        partial._add_group_counts(
+            f'total_units_{year}',
+            pd.Series(units).groupby(partition[f'{year}_groups'], sort=False).sum()
+        )
+
+    # Distinct accounts with rows in each group (either year)
+    rows = pd.DataFrame({
+        'group': np.concatenate([partition['py_rows_groups'], partition['cy_rows_groups']]),
+        'account_number': np.concatenate([partition['py_rows_accounts'], partition['cy_rows_accounts']])
+    }).drop_duplicates()
+    partial._add_group_counts('total_accounts', rows.groupby('group', sort=False).size())
+
+    # Account categories per group from the summed active cells
+    cells = pd.DataFrame({
+        'group': partition['joined_groups'],
+        'account_number': partition['joined_accounts'],
+        'py': partition['joined_py'],
+        'cy': partition['joined_cy']
+    })
+    by_group = cells.groupby(['group', 'account_number'], sort=False)[['py', 'cy']].sum()
+    categories = pd.Series(classify_accounts(by_group['py'], by_group['cy']), index=by_group.index)
+    for category in ACCOUNT_CATEGORIES:
+        matches = categories[categories == category]
+        partial._add_group_counts(f'{category}_count', matches.groupby(level='group', sort=False).size())
+
+    # Ranked accounts by their total change (all groups)
+    by_account = cells.groupby('account_number')[['py', 'cy']].sum()
+    change = by_account['cy'] - by_account['py']
+    entries = list(zip(change.tolist(), by_account.index.tolist(), by_account['py'].tolist(), by_account['cy'].tolist()))
+    partial.top_growing = heapq.nsmallest(top_k, [(-c, a, py, cy) for c, a, py, cy in entries if c > 0])
+    partial.top_declining = heapq.nsmallest(top_k, [(c, a, py, cy) for c, a, py, cy in entries if c < 0])
+
+    return partial
@@ -0,0 +1,105 @@
+"""
+Report Date Ranges
+Detects the reporting period of a YOY export from text such as its filename
+('PAM 11-20-24 to 11-19-25.xlsx') or the 'Date Range:' cell of the sheet
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+# Pattern 1: Month-Day-Year to Month-Day-Year (dashes with "to")
+PATTERN_DASHES_TO = r'(\d{1,2})-(\d{1,2})-(\d{2,4})\s+to\s+(\d{1,2})-(\d{1,2})-(\d{2,4})'
+
+# Pattern 2: Month/Day/Year..Month/Day/Year (slashes with "..")
+PATTERN_SLASHES_DOTS = r'(\d{1,2})/(\d{1,2})/(\d{2,4})\.\.(\d{1,2})/(\d{1,2})/(\d{2,4})'
+
+# Pattern 3: Month/Day/Year to Month/Day/Year (slashes with "to")
+PATTERN_SLASHES_TO = r'(\d{1,2})/(\d{1,2})/(\d{2,4})\s+to\s+(\d{1,2})/(\d{1,2})/(\d{2,4})'
+
+# Pattern 4: Month-Day-Year..Month-Day-Year (dashes with "..")
+PATTERN_DASHES_DOTS = r'(\d{1,2})-(\d{1,2})-(\d{2,4})\.\.(\d{1,2})-(\d{1,2})-(\d{2,4})'
+
+DATE_RANGE_PATTERNS = [PATTERN_DASHES_TO, PATTERN_SLASHES_DOTS, PATTERN_SLASHES_TO, PATTERN_DASHES_DOTS]
+
+# Largest gap (days) between one period's end and the next period's start for them to be compared
+MAX_PERIOD_GAP_DAYS = 7
+
+
+def _parse_match(match) -> Optional[Tuple[datetime, datetime]]:
+    """Parse a regex match into a (start_date, end_date) tuple"""
+    if not match:
+        return None
+    start_month, start_day, start_year, end_month, end_day, end_year = match.groups()
+
+    # Convert 2-digit years to 4-digit
+    start_year = int(start_year)
+    if start_year < 100:
+        start_year += 2000
+
+    end_year = int(end_year)
+    if end_year < 100:
+        end_year += 2000
+
+    try:
+        start_date = datetime(start_year, int(start_month), int(start_day))
+        end_date = datetime(end_year, int(end_month), int(end_day))
+        return (start_date, end_date)
+    except ValueError:
+        return None
+
+
+def extract_date_range(text: str) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Find a reporting date range in a piece of text
+
+    Supported formats:
+    - "MM-DD-YY to MM-DD-YY" (e.g., "PAM 11-20-24 to 11-19-25.xlsx")
+    - "MM/DD/YY..MM/DD/YY" (e.g., "Date Range: 11/20/24..11/19/25")
+    - "MM/DD/YY to MM/DD/YY" and "MM-DD-YY..MM-DD-YY"
+
+    Args:
+        text: Filename or cell value
+
+    Returns:
+        Tuple of (start_date, end_date) or None if not found
+    """
+    if not text:
+        return None
+
+    for pattern in DATE_RANGE_PATTERNS:
+        result = _parse_match(re.search(pattern, text))
+        if result:
+            return result
+
+    return None
+
+
+def rep_key(filename: str) -> str:
+    """Normalized filename text before the date range ('PAM 11-20-24 to 11-19-25.xlsx' -> 'pam')"""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    for pattern in DATE_RANGE_PATTERNS:
+        match = re.search(pattern, stem)
+        if match:
+            stem = stem[:match.start()]
+            break
+    words = [word for word in re.split(r'[\s_-]+', stem.lower()) if word and word != 'yoy']
+    return ' '.join(words)
+
+
+def periods_follow(older: Tuple[datetime, datetime], newer: Tuple[datetime, datetime]) -> bool:
+    """
+    True when the newer period starts right after the older one ends
+
+    Args:
+        older: (start_date, end_date) of the earlier period
+        newer: (start_date, end_date) of the later period
+
+    Returns:
+        True if the newer period starts within MAX_PERIOD_GAP_DAYS after the
+        older one ends (False when they overlap or leave a longer gap)
+    """
+    gap = (newer[0] - older[1]).days
+    return 0 <= gap <= MAX_PERIOD_GAP_DAYS
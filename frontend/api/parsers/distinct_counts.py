@@ -0,0 +1,203 @@
+"""
+Distinct Account Counts
+Exact account sets and HyperLogLog sketches behind the same interface, so
+distinct-account counts of brands, cities and color groups merge across
+partitions and files either exactly or in a small fixed size
+"""
+
+import base64
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class AccountSet:
+    """Exact set of distinct account numbers (sorted and unique)"""
+
+    def __init__(self, accounts=None, is_unique: bool = False):
+        """
+        Args:
+            accounts: Account numbers (repeats allowed)
+            is_unique: True when accounts are already sorted and unique
+        """
+        accounts = np.zeros(0, dtype=np.int64) if accounts is None else np.asarray(accounts, dtype=np.int64)
+        self.accounts = accounts if is_unique else np.unique(accounts)
+
+    def merge(self, other: 'AccountSet') -> 'AccountSet':
+        """Union of two sets"""
+        return AccountSet(np.union1d(self.accounts, other.accounts), is_unique=True)
+
+    @classmethod
+    def merge_all(cls, sets: List['AccountSet']) -> 'AccountSet':
+        """Union of any number of sets in one pass"""
+        return cls(np.concatenate([s.accounts for s in sets]))
+
+    def count(self) -> int:
+        """Number of distinct accounts"""
+        return len(self.accounts)
+
+    def to_dict(self) -> Dict:
+        return {'accounts': self.accounts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AccountSet':
+        return cls(data['accounts'], is_unique=True)
+
+
+def hash_accounts(accounts) -> np.ndarray:
+    """64-bit hash of each account number (splitmix64 finalizer, stable across runs)"""
+    x = np.asarray(accounts, dtype=np.int64).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _leading_zeros(x: np.ndarray) -> np.ndarray:
+    """Leading zero bits of each uint64 (64 for zero)"""
+    zeros = np.zeros(len(x), dtype=np.uint8)
+    x = x.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = x < (np.uint64(1) << np.uint64(64 - shift))
+        zeros[empty] += shift
+        x[empty] <<= np.uint64(shift)
+    zeros[x == 0] += 1
+    return zeros
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch of distinct account numbers
+
+    Each account lands in one of 2^precision registers, which keeps the
+    longest run of leading zero bits seen. merge() takes the register-wise
+    maximum, so sketches of any partitions or files combine in any order and
+    an account seen twice still counts once. The relative standard error is
+    about 1.04 / sqrt(2^precision).
+    """
+
+    MIN_PRECISION = 4
+    MAX_PRECISION = 16
+
+    def __init__(self, error: float = 0.02, precision: Optional[int] = None):
+        """
+        Empty sketch
+
+        Args:
+            error: Target relative standard error (picks the precision)
+            precision: Number of register index bits (overrides error)
+        """
+        if precision is None:
+            precision = self.precision_for(error)
+        if not self.MIN_PRECISION <= precision <= self.MAX_PRECISION:
+            raise ValueError(
+                f"HyperLogLog precision must be between {self.MIN_PRECISION} and {self.MAX_PRECISION}"
+            )
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def precision_for(cls, error: float) -> int:
+        """Smallest precision whose standard error is at most error (clamped to the supported range)"""
+        if not 0 < error < 1:
+            raise ValueError('HyperLogLog error must be between 0 and 1')
+        precision = math.ceil(math.log2((1.04 / error) ** 2))
+        return min(max(precision, cls.MIN_PRECISION), cls.MAX_PRECISION)
+
+    @property
+    def error(self) -> float:
+        """Relative standard error of the estimate"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, accounts) -> 'HyperLogLog':
+        """
+        Add account numbers to the sketch (in place)
+
+        Returns:
+            The sketch itself
+        """
+        hashed = hash_accounts(accounts)
+        if len(hashed):
+            index = (hashed >> np.uint64(64 - self.precision)).astype(np.intp)
+            rest = hashed << np.uint64(self.precision)
+            ranks = np.minimum(_leading_zeros(rest), 64 - self.precision) + 1
+            np.maximum.at(self.registers, index, ranks.astype(np.uint8))
+        return self
+
+    def _check(self, other: 'HyperLogLog'):
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLog sketches with different precisions')
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Sketch of the union of both sketches' accounts"""
+        self._check(other)
+        merged = HyperLogLog(precision=self.precision)
+        merged.registers = np.maximum(self.registers, other.registers)
+        return merged
+
+    @classmethod
+    def merge_all(cls, sketches: List['HyperLogLog']) -> 'HyperLogLog':
+        """Union of any number of sketches in one pass"""
+        for sketch in sketches[1:]:
+            sketches[0]._check(sketch)
+        merged = cls(precision=sketches[0].precision)
+        merged.registers = np.max([sketch.registers for sketch in sketches], axis=0)
+        return merged
+
+    def count(self) -> int:
+        """Estimated number of distinct accounts"""
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+
+        # Small cardinalities: linear counting over the empty registers is more accurate
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            estimate = m * math.log(m / empty)
+        return int(round(estimate))
+
+    def to_dict(self) -> Dict:
+        """Registers as (index, rank) pairs while mostly empty, otherwise base64"""
+        used = np.flatnonzero(self.registers)
+        if len(used) * 4 < len(self.registers):
+            return {
+                'precision': self.precision,
+                'indices': used.tolist(),
+                'ranks': self.registers[used].tolist()
+            }
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HyperLogLog':
+        sketch = cls(precision=data['precision'])
+        if 'registers' in data:
+            sketch.registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        else:
+            sketch.registers[np.asarray(data['indices'], dtype=np.intp)] = data['ranks']
+        return sketch
+
+
+def distinct_accounts(accounts=None, error: Optional[float] = None, is_unique: bool = False):
+    """
+    Distinct-account counter of the requested mode
+
+    Args:
+        accounts: Account numbers to start with
+        error: None for an exact AccountSet, otherwise the HyperLogLog target error
+        is_unique: True when accounts are already sorted and unique (exact mode)
+
+    Returns:
+        AccountSet or HyperLogLog holding the accounts
+    """
+    if error is None:
+        return AccountSet(accounts, is_unique=is_unique)
+    sketch = HyperLogLog(error)
+    return sketch if accounts is None else sketch.add(accounts)
+
+
+def distinct_from_dict(data: Dict, error: Optional[float] = None):
+    """Restore a counter written by to_dict() in the given mode"""
+    return AccountSet.from_dict(data) if error is None else HyperLogLog.from_dict(data)
@@ -0,0 +1,498 @@
+"""
+Sales History
+Stacks any number of YOY workbooks into one period-indexed account x brand
+cube and classifies every account in every period (new, retained,
+reactivated, lost) from its whole purchase history
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .date_ranges import extract_date_range
+from .sales_comparison_parser import (
+    PARALLEL_LOAD_MIN_BYTES, SalesComparisonParser, _read_workbook_accounts, _run_in_processes, _source_size
+)
+from .sales_parser import source_name
+
+
+# Status of an account in a period; the index is its int8 code
+ACCOUNT_STATUSES = ('inactive', 'new', 'retained', 'reactivated', 'lost')
+INACTIVE, NEW, RETAINED, REACTIVATED, LOST = range(len(ACCOUNT_STATUSES))
+
+
+def classify_history(active, previous, earlier) -> np.ndarray:
+    """
+    Status code of each account (element-wise, any shape)
+
+    Args:
+        active: Account bought in the period
+        previous: Account bought in the period before it
+        earlier: Account bought in any period before that one
+
+    Returns:
+        int8 codes into ACCOUNT_STATUSES
+    """
+    active, previous, earlier = np.asarray(active), np.asarray(previous), np.asarray(earlier)
+    return np.select(
+        [active & previous, active & earlier, active, previous],
+        [RETAINED, REACTIVATED, NEW, LOST],
+        default=INACTIVE
+    ).astype(np.int8)
+
+
+class HistoryPeriod:
+    """Account rows of one workbook, placed on the history's account axis"""
+
+    def __init__(self, label: str, start_date: datetime, end_date: datetime, rows: np.ndarray,
+                 units: np.ndarray, sales: np.ndarray, prior_sales: np.ndarray):
+        """
+        Args:
+            label: Display name (the workbook filename)
+            start_date: First day of the report period
+            end_date: Last day of the report period
+            rows: Position of each account on the history's account axis
+            units: Rows x brands matrix of units bought (int32)
+            sales: CY Total of each account
+            prior_sales: PY Total of each account (the year before the period)
+        """
+        self.label = label
+        self.start_date = start_date
+        self.end_date = end_date
+        self.rows = rows
+        self.units = units
+        self.sales = sales
+        self.prior_sales = prior_sales
+        # An account counts as active when it had sales or bought any units
+        self.active = (sales > 0) | (units > 0).any(axis=1)
+        self.brand_units = units.sum(axis=0, dtype=np.int64)
+
+    def dense(self, values: np.ndarray, num_accounts: int, fill=0) -> np.ndarray:
+        """Spread per-row values over the first num_accounts accounts"""
+        result = np.full(num_accounts, fill, dtype=values.dtype)
+        result[self.rows] = values
+        return result
+
+
+class HistoryEngine:
+    """Period-indexed account x brand history built from any number of YOY workbooks"""
+
+    # Columns read from each workbook (brand columns are added to these)
+    ACCOUNT_COLUMNS = SalesComparisonParser.ACCOUNT_COLUMNS + ['CY Total', 'PY Total']
+
+    # Brand axis of the cube (brands missing from a workbook hold 0 units)
+    BRANDS = list(SalesComparisonParser.BRAND_COLOR_MAP)
+
+    def __init__(self):
+        self.periods: List[HistoryPeriod] = []
+        self.accounts = np.empty(0, dtype=np.int64)
+        self.names = np.empty(0, dtype=object)
+        self.cities = np.empty(0, dtype=object)
+        self.skipped_columns = []
+        self._account_index = pd.Index(self.accounts)
+        self._brand_present = np.zeros(len(self.BRANDS), dtype=bool)
+        # Status codes of each period, over the accounts known when it was classified
+        self._statuses: List[np.ndarray] = []
+        # Activity in the latest period, and in any period before it
+        self._last_active = np.zeros(0, dtype=bool)
+        self._earlier_active = np.zeros(0, dtype=bool)
+
+    def add_workbook(self, source, start_date: Optional[datetime] = None,
+                     end_date: Optional[datetime] = None) -> HistoryPeriod:
+        """
+        Read one YOY workbook and add it as a period
+
+        Args:
+            source: Workbook path or in-memory workbook
+            start_date: First day of the report period (from the filename if None)
+            end_date: Last day of the report period (from the filename if None)
+
+        Returns:
+            The added HistoryPeriod
+        """
+        start_date, end_date = self._period_dates(source, start_date, end_date)
+        self._check_new_period(start_date, end_date, os.path.basename(source_name(source)))
+        df, skipped = self._read_workbook(source)
+        self._merge_skipped_columns(skipped)
+        return self.add_period(df, start_date, end_date, label=os.path.basename(source_name(source)))
+
+    def add_workbooks(self, sources: List, date_ranges: Optional[List[Tuple[datetime, datetime]]] = None,
+                      max_workers: Optional[int] = None) -> List[HistoryPeriod]:
+        """
+        Read several YOY workbooks and add them as periods, oldest first
+
+        Workbooks are decoded in worker processes on a multi-core machine once
+        they reach PARALLEL_LOAD_MIN_BYTES combined.
+
+        Args:
+            sources: Workbook paths or in-memory workbooks, in any order
+            date_ranges: (start_date, end_date) of each source (from the filenames if None)
+            max_workers: Worker processes (defaults to one per workbook, up to the CPU count)
+
+        Returns:
+            The added periods, oldest first
+        """
+        if date_ranges is None:
+            date_ranges = [(None, None)] * len(sources)
+        dates = [self._period_dates(source, *dates) for source, dates in zip(sources, date_ranges)]
+        pending = []
+        for source, (start_date, end_date) in zip(sources, dates):
+            label = os.path.basename(source_name(source))
+            self._check_new_period(start_date, end_date, label, pending)
+            pending.append((label, start_date, end_date))
+
+        loaded = None
+        workers = max_workers or min(len(sources), os.cpu_count() or 1)
+        if workers > 1 and sum(_source_size(source) for source in sources) >= PARALLEL_LOAD_MIN_BYTES:
+            columns, unit_columns = self._read_columns()
+            loaded = _run_in_processes(
+                [(_read_workbook_accounts, (source, columns, unit_columns)) for source in sources],
+                max_workers=workers
+            )
+        if loaded is None:
+            loaded = [self._read_workbook(source) for source in sources]
+
+        # Oldest first, so every period is appended after the ones before it
+        order = sorted(range(len(sources)), key=lambda i: (dates[i][1], dates[i][0]))
+        added = []
+        for i in order:
+            df, skipped = loaded[i]
+            self._merge_skipped_columns(skipped)
+            added.append(self.add_period(df, *dates[i], label=os.path.basename(source_name(sources[i]))))
+        return added
+
+    def add_period(self, df: pd.DataFrame, start_date: datetime, end_date: datetime,
+                   label: Optional[str] = None) -> HistoryPeriod:
+        """
+        Add the account data of one report period
+
+        A period newer than every loaded one is appended: only its own rows are
+        placed on the cube and classified. An older period is inserted in date
+        order and every period is reclassified in one vectorized pass.
+
+        Args:
+            df: Account data with 'Acct #', 'CY Total', 'PY Total' and brand columns
+                ('Name' and 'City' are used for labels when present)
+            start_date: First day of the report period
+            end_date: Last day of the report period
+            label: Display name of the period (defaults to the date range)
+
+        Returns:
+            The added HistoryPeriod
+
+        Raises:
+            ValueError: If the period overlaps one that was already added
+        """
+        self._check_new_period(start_date, end_date, label)
+
+        df = self._one_row_per_account(df)
+        accounts = df['Acct #'].to_numpy(dtype=np.int64)
+
+        # New accounts are appended to the account axis; known ones keep their position
+        rows = self._account_index.get_indexer(accounts)
+        is_new = rows < 0
+        rows[is_new] = len(self.accounts) + np.arange(int(is_new.sum()))
+        self.accounts = np.concatenate([self.accounts, accounts[is_new]])
+        self.names = np.concatenate([self.names, self._labels(df, 'Name')[is_new]])
+        self.cities = np.concatenate([self.cities, self._labels(df, 'City')[is_new]])
+        self._account_index = pd.Index(self.accounts)
+
+        present = np.isin(self.BRANDS, df.columns)
+        self._brand_present |= present
+        units = np.zeros((len(df), len(self.BRANDS)), dtype=np.int32)
+        if present.any():
+            units[:, present] = df[[brand for brand, has in zip(self.BRANDS, present) if has]].to_numpy(dtype=np.int32)
+
+        period = HistoryPeriod(
+            label=label or f"{start_date:%m-%d-%y} to {end_date:%m-%d-%y}",
+            start_date=start_date,
+            end_date=end_date,
+            rows=rows,
+            units=units,
+            sales=pd.to_numeric(df['CY Total'], errors='coerce').fillna(0).to_numpy(dtype=np.float64),
+            prior_sales=pd.to_numeric(df['PY Total'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        )
+
+        position = sum(1 for other in self.periods if (other.end_date, other.start_date) < (end_date, start_date))
+        self.periods.insert(position, period)
+
+        if position == len(self.periods) - 1:
+            # Names and cities follow the latest export
+            self.names[rows] = self._labels(df, 'Name')
+            self.cities[rows] = self._labels(df, 'City')
+            self._classify_latest()
+        else:
+            self._classify_all()
+
+        print(f"[OK] Added period {period.label}: {len(accounts)} accounts ({int(is_new.sum())} new to the history)")
+        return period
+
+    def _check_new_period(self, start_date: datetime, end_date: datetime, label: Optional[str],
+                          pending: List[Tuple[str, datetime, datetime]] = ()):
+        # Overlapping exports (the same rep twice, or two reps) would be stacked as
+        # consecutive history and count the overlapping sales twice
+        added = [(period.label, period.start_date, period.end_date) for period in self.periods]
+        for other_label, other_start, other_end in added + list(pending):
+            if start_date <= other_end and other_start <= end_date:
+                raise ValueError(
+                    f"'{label}' ({start_date:%m-%d-%y} to {end_date:%m-%d-%y}) overlaps "
+                    f"'{other_label}' ({other_start:%m-%d-%y} to {other_end:%m-%d-%y})"
+                )
+
+    def _classify_latest(self):
+        """Classify the period just appended from the activity carried over from earlier periods"""
+        num_accounts = len(self.accounts)
+        period = self.periods[-1]
+
+        if len(self.periods) == 1:
+            # The first workbook's PY Total stands in for the period before it
+            previous = period.dense(period.prior_sales > 0, num_accounts, fill=False)
+            earlier = np.zeros(num_accounts, dtype=bool)
+        else:
+            previous = self._pad(self._last_active, num_accounts)
+            earlier = self._pad(self._earlier_active, num_accounts)
+
+        active = period.dense(period.active, num_accounts, fill=False)
+        self._statuses.append(classify_history(active, previous, earlier))
+        self._earlier_active = earlier | previous
+        self._last_active = active
+
+    def _classify_all(self):
+        """Classify every period at once from the periods x accounts activity matrix"""
+        num_accounts = len(self.accounts)
+
+        # Row 0 is the year before the first period (its PY Total), row p + 1 is period p
+        activity = np.zeros((len(self.periods) + 1, num_accounts), dtype=bool)
+        first = self.periods[0]
+        activity[0, first.rows] = first.prior_sales > 0
+        for p, period in enumerate(self.periods):
+            activity[p + 1, period.rows] = period.active
+
+        seen = np.logical_or.accumulate(activity, axis=0)
+        earlier = np.zeros((len(self.periods), num_accounts), dtype=bool)
+        earlier[1:] = seen[:-2]
+
+        statuses = classify_history(activity[1:], activity[:-1], earlier)
+        self._statuses = list(statuses)
+        self._last_active = activity[-1]
+        self._earlier_active = seen[-2]
+
+    @staticmethod
+    def _pad(values: np.ndarray, length: int, fill=0) -> np.ndarray:
+        """Extend a per-account array to accounts added since it was computed"""
+        if len(values) == length:
+            return values
+        return np.concatenate([values, np.full(length - len(values), fill, dtype=values.dtype)])
+
+    @staticmethod
+    def _labels(df: pd.DataFrame, column: str) -> np.ndarray:
+        if column not in df.columns:
+            return np.full(len(df), '', dtype=object)
+        return df[column].astype(object).where(df[column].notna(), '').to_numpy(dtype=object)
+
+    def _one_row_per_account(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Sum repeated account rows so each account has one row per period"""
+        if not df['Acct #'].duplicated().any():
+            return df
+        numeric = [col for col in df.columns if col in self.BRANDS or col in ('CY Total', 'PY Total')]
+        labels = [col for col in ('Name', 'City') if col in df.columns]
+        aggregations = {**{col: 'sum' for col in numeric}, **{col: 'first' for col in labels}}
+        return df.groupby('Acct #', sort=False, observed=True).agg(aggregations).reset_index()
+
+    def _read_columns(self):
+        return set(self.ACCOUNT_COLUMNS) | set(self.BRANDS), set(self.BRANDS)
+
+    def _read_workbook(self, source) -> Tuple[pd.DataFrame, List[str]]:
+        print(f"[INFO] Loading history file: {source_name(source)}")
+        columns, unit_columns = self._read_columns()
+        return _read_workbook_accounts(source, columns, unit_columns)
+
+    def _merge_skipped_columns(self, skipped: List[str]):
+        for col in skipped:
+            if col not in self.skipped_columns:
+                self.skipped_columns.append(col)
+
+    @staticmethod
+    def _period_dates(source, start_date, end_date) -> Tuple[datetime, datetime]:
+        if start_date is not None and end_date is not None:
+            return start_date, end_date
+        dates = extract_date_range(os.path.basename(source_name(source)))
+        if dates is None:
+            raise ValueError(
+                f"Could not infer the report period from: {source_name(source)} "
+                "(expected e.g. 'PAM 11-20-24 to 11-19-25.xlsx')"
+            )
+        return dates
+
+    def _period_position(self, period) -> int:
+        """Index of a period given by position (negative from the end) or label"""
+        if isinstance(period, str):
+            for p, candidate in enumerate(self.periods):
+                if candidate.label == period:
+                    return p
+            raise ValueError(f"Unknown period: {period}")
+        return range(len(self.periods))[period]
+
+    def status_matrix(self) -> np.ndarray:
+        """Periods x accounts matrix of ACCOUNT_STATUSES codes (int8)"""
+        num_accounts = len(self.accounts)
+        if not self._statuses:
+            return np.zeros((0, num_accounts), dtype=np.int8)
+        return np.vstack([self._pad(statuses, num_accounts, INACTIVE) for statuses in self._statuses])
+
+    def sales_matrix(self) -> np.ndarray:
+        """Periods x accounts matrix of CY Total sales"""
+        num_accounts = len(self.accounts)
+        sales = np.zeros((len(self.periods), num_accounts), dtype=np.float64)
+        for p, period in enumerate(self.periods):
+            sales[p, period.rows] = period.sales
+        return sales
+
+    def units_cube(self) -> np.ndarray:
+        """Periods x accounts x brands cube of units bought (int32), assembled from the periods"""
+        cube = np.zeros((len(self.periods), len(self.accounts), len(self.BRANDS)), dtype=np.int32)
+        for p, period in enumerate(self.periods):
+            cube[p, period.rows] = period.units
+        return cube
+
+    def get_status_counts(self) -> List[Dict]:
+        """
+        Accounts and sales per status in each period
+
+        Sales of new, retained and reactivated accounts are their sales in the
+        period; sales of lost accounts are what they bought the period before.
+
+        Returns:
+            One dictionary per period, oldest first
+        """
+        statuses = self.status_matrix()
+        sales = self.sales_matrix()
+        previous_sales = np.zeros_like(sales)
+        previous_sales[1:] = sales[:-1]
+        if self.periods:
+            first = self.periods[0]
+            previous_sales[0] = first.dense(first.prior_sales, len(self.accounts))
+        status_sales = np.where(statuses == LOST, previous_sales, sales)
+
+        results = []
+        for p, period in enumerate(self.periods):
+            counts = np.bincount(statuses[p], minlength=len(ACCOUNT_STATUSES))
+            totals = np.bincount(statuses[p], weights=status_sales[p], minlength=len(ACCOUNT_STATUSES))
+            results.append({
+                'period': period.label,
+                'start_date': period.start_date.strftime('%Y-%m-%d'),
+                'end_date': period.end_date.strftime('%Y-%m-%d'),
+                'accounts': len(period.rows),
+                'active_accounts': int(period.active.sum()),
+                'total_sales': float(np.round(period.sales.sum(), 2)),
+                'statuses': {
+                    status: {'count': int(counts[code]), 'sales': float(np.round(totals[code], 2))}
+                    for code, status in enumerate(ACCOUNT_STATUSES) if code != INACTIVE
+                }
+            })
+        return results
+
+    def get_accounts(self, status: str, period=-1) -> List[Dict]:
+        """
+        Accounts with a given status in one period
+
+        Args:
+            status: One of ACCOUNT_STATUSES
+            period: Period position (negative counts from the latest) or label
+
+        Returns:
+            List of account dictionaries sorted by sales (descending); lost
+            accounts are sorted by the sales they had the period before
+        """
+        if status not in ACCOUNT_STATUSES:
+            raise ValueError(f"Unknown status: {status}")
+        p = self._period_position(period)
+        code = ACCOUNT_STATUSES.index(status)
+
+        positions = np.flatnonzero(self._pad(self._statuses[p], len(self.accounts), INACTIVE) == code)
+        sales = self.periods[p].dense(self.periods[p].sales, len(self.accounts))[positions]
+        if p > 0:
+            previous = self.periods[p - 1].dense(self.periods[p - 1].sales, len(self.accounts))[positions]
+        else:
+            previous = self.periods[0].dense(self.periods[0].prior_sales, len(self.accounts))[positions]
+
+        # Latest earlier period each account was active in (for reactivated accounts)
+        last_active = np.full(len(positions), -1)
+        for q in range(p):
+            active = self.periods[q].dense(self.periods[q].active, len(self.accounts), fill=False)
+            last_active[active[positions]] = q
+
+        order = np.argsort(-(previous if status == 'lost' else sales), kind='stable')
+        return [
+            {
+                'account_number': int(self.accounts[row]),
+                'account_name': self.names[row],
+                'city': self.cities[row],
+                'sales': float(sales[i]),
+                'previous_period_sales': float(previous[i]),
+                'last_active_period': self.periods[last_active[i]].label if last_active[i] >= 0 else None
+            }
+            for i, row in ((i, positions[i]) for i in order)
+        ]
+
+    def get_account_history(self, account_number: int) -> Dict:
+        """
+        Status, sales and brand units of one account in every period
+
+        Returns:
+            Dictionary with the account's labels and one entry per period
+            (empty dictionary for an unknown account)
+        """
+        row = self._account_index.get_indexer([account_number])[0]
+        if row < 0:
+            return {}
+
+        periods = []
+        for p, period in enumerate(self.periods):
+            statuses = self._statuses[p]
+            status = ACCOUNT_STATUSES[statuses[row] if row < len(statuses) else INACTIVE]
+            match = np.flatnonzero(period.rows == row)
+            units = period.units[match[0]] if len(match) else np.zeros(len(self.BRANDS), dtype=np.int32)
+            periods.append({
+                'period': period.label,
+                'status': status,
+                'sales': float(period.sales[match[0]]) if len(match) else 0.0,
+                'brand_units': {
+                    brand: int(units[col]) for col, brand in enumerate(self.BRANDS) if units[col]
+                }
+            })
+
+        return {
+            'account_number': int(self.accounts[row]),
+            'account_name': self.names[row],
+            'city': self.cities[row],
+            'periods': periods
+        }
+
+    def get_summary(self, limit: int = 25) -> Dict:
+        """
+        History summary for the dashboard
+
+        Args:
+            limit: Accounts listed per status for the latest period
+
+        Returns:
+            Dictionary with per-period status counts, brand units per period
+            and the latest period's reactivated, new and lost accounts
+        """
+        brand_units = [period.brand_units for period in self.periods]
+        return {
+            'periods': self.get_status_counts(),
+            'total_accounts': len(self.accounts),
+            'brands': [
+                {'brand': brand, 'units': [int(units[col]) for units in brand_units]}
+                for col, brand in enumerate(self.BRANDS) if self._brand_present[col]
+            ],
+            'latest_period': {
+                status: self.get_accounts(status)[:limit]
+                for status in ('reactivated', 'new', 'lost')
+            } if self.periods else {}
+        }
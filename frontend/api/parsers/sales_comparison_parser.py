@@ -5,12 +5,96 @@ Compares two YOY Excel files to extract brand-level customer insights
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
+import io
 import json
+from functools import reduce
 from datetime import datetime, timedelta
 import re
 import os
-import openpyxl
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from .aggregate_snapshot import AggregateSnapshot
+    from .brand_matrix import BrandMatrix, ColorGroupMatrix
+    from .comparison_aggregates import (
+        ComparisonAggregator, PartialAggregates, YearAggregates, YearPurchases, compute_partial
+    )
+    from .date_ranges import extract_date_range
+    from .sales_parser import (
+        ACCOUNT_NUMBER_DTYPE, UNIT_DTYPE, SalesDashboardParser, read_account_table, read_summary_block,
+        rewind_source, source_name
+    )
+    from .summary_sections import SUMMARY_INPUTS, SUMMARY_SECTIONS
+except ImportError:
+    # Run as a script (python sales_comparison_parser.py) from the parsers directory
+    from aggregate_snapshot import AggregateSnapshot
+    from brand_matrix import BrandMatrix, ColorGroupMatrix
+    from comparison_aggregates import (
+        ComparisonAggregator, PartialAggregates, YearAggregates, YearPurchases, compute_partial
+    )
+    from date_ranges import extract_date_range
+    from sales_parser import (
+        ACCOUNT_NUMBER_DTYPE, UNIT_DTYPE, SalesDashboardParser, read_account_table, read_summary_block,
+        rewind_source, source_name
+    )
+    from summary_sections import SUMMARY_INPUTS, SUMMARY_SECTIONS
+
+
+# Combined workbook size from which both files are decoded in worker processes;
+# below it, starting the processes costs more than the overlapped parse saves
+PARALLEL_LOAD_MIN_BYTES = int(os.environ.get('PARALLEL_LOAD_MIN_BYTES', 2 * 1024 * 1024))
+
+# Header rows above the account details section of a YOY workbook
+ACCOUNT_DATA_SKIPROWS = 24
+
+
+def _source_size(source) -> int:
+    """Size in bytes of a workbook path or in-memory workbook (0 if unknown)"""
+    if hasattr(source, 'seek'):
+        size = source.seek(0, io.SEEK_END)
+        source.seek(0)
+        return size
+    try:
+        return os.path.getsize(source)
+    except OSError:
+        return 0
+
+
+def _run_in_processes(tasks: List[Tuple[Callable, tuple]], max_workers: int) -> Optional[List]:
+    """
+    Run picklable tasks in worker processes
+
+    Args:
+        tasks: (function, arguments) pairs
+        max_workers: Worker processes to start
+
+    Returns:
+        Task results in order, or None if worker processes are unavailable
+        (e.g. no shared memory on a serverless host), in which case the
+        caller runs the work in-process
+    """
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(function, *arguments) for function, arguments in tasks]
+            return [future.result() for future in futures]
+    except (OSError, NotImplementedError, BrokenProcessPool) as e:
+        print(f"[INFO] Worker processes unavailable ({e}); running in-process")
+        return None
+
+
+def _read_workbook_accounts(source, columns, unit_columns) -> Tuple[pd.DataFrame, List[str]]:
+    """Decode the account details section of one workbook (picklable, so it can run in a worker process)"""
+    return read_account_table(
+        source,
+        skiprows=ACCOUNT_DATA_SKIPROWS,
+        columns=columns,
+        unit_columns=unit_columns,
+        drop_invalid_accounts=True
+    )
 
 
 class SalesComparisonParser:
@@ -58,106 +142,497 @@ class SalesComparisonParser:
         (12, 25),  # Christmas Day
     ]
 
-    def __init__(self, previous_year_path: str, current_year_path: str):
+    # Account identity columns read alongside the brand columns
+    ACCOUNT_COLUMNS = ['Acct #', 'Name', 'City']
+
+    # Sections of the comparison summary, each mapped to the sections and inputs it needs
+    SUMMARY_SECTIONS = SUMMARY_SECTIONS
+
+    # Inputs shared by several sections (computed as steps of their own)
+    SUMMARY_INPUTS = SUMMARY_INPUTS
+
+    def __init__(self, previous_year_path: str, current_year_path: str, sparse_units: bool = False,
+                 workbook_cache=None):
         """
         Initialize with paths to both YOY Excel files
 
         Args:
-            previous_year_path: Path to previous year YOY Excel (e.g., 2024)
-            current_year_path: Path to current year YOY Excel (e.g., 2025)
+            previous_year_path: Path to previous year YOY Excel (e.g., 2024),
+                                or a named in-memory workbook (see NamedWorkbook)
+            current_year_path: Path to current year YOY Excel (e.g., 2025),
+                               or a named in-memory workbook
+            sparse_units: Keep brand units in sparse (CSR) form, for large
+                          mostly-zero roll-ups
+            workbook_cache: Optional WorkbookCache; a workbook whose contents were
+                            parsed before is restored from it (with its per-year
+                            aggregates) instead of being parsed again
         """
         self.previous_year_path = previous_year_path
         self.current_year_path = current_year_path
         self.previous_year_data = None
         self.current_year_data = None
         self.brand_columns = None
+        self.previous_year_matrix = None
+        self.current_year_matrix = None
+        self._color_group_matrix = None
+        self._aggregator = None
+        self._cached_scan_seeds = {}
+        self._unscanned_cache_entries = {}
+        self.sparse_units = sparse_units
+        self.workbook_cache = workbook_cache
+        self.skipped_columns = []
+        self._brand_changes = None
+        self._merged_rows = None
+        self._color_group_drill_downs = None
+        self._current_parser = None
+        self._current_parser_lock = threading.Lock()
+        # Summary sections running on a thread pool share these lazily built inputs;
+        # each one is built once, by whichever section asks first
+        self._merged_rows_lock = threading.Lock()
+        self._color_group_matrix_lock = threading.Lock()
+        self._aggregator_lock = threading.Lock()
+        self._brand_changes_lock = threading.Lock()
+        self._color_group_drill_downs_lock = threading.Lock()
+        self._cached_years = {}
+
+    def load_data(self, parallel: Optional[bool] = None):
+        """
+        Load both Excel files and extract account-level brand data
 
-    def load_data(self):
-        """Load both Excel files and extract account-level brand data"""
-        print(f"[INFO] Loading previous year file: {self.previous_year_path}")
-        self.previous_year_data = self._load_excel_file(self.previous_year_path)
+        Args:
+            parallel: Decode both workbooks (and the current year summary block)
+                      concurrently in worker processes. None decides automatically:
+                      only on a multi-core machine for workbooks of at least
+                      PARALLEL_LOAD_MIN_BYTES combined
+        """
+        self.skipped_columns = []
 
-        print(f"[INFO] Loading current year file: {self.current_year_path}")
-        self.current_year_data = self._load_excel_file(self.current_year_path)
+        cache_keys = {'py': self._cache_key(self.previous_year_path), 'cy': self._cache_key(self.current_year_path)}
+        cached = {year: self._load_cached_year(key) for year, key in cache_keys.items()}
+
+        if parallel is None:
+            parallel = self._should_load_in_parallel()
+
+        # Worker processes only pay off when both workbooks need parsing
+        loaded = self._load_workbooks_in_parallel() if parallel and not any(cached.values()) else None
+        summary_block = None
+        if loaded is None:
+            previous = self._load_year(self.previous_year_path, 'previous', cached['py'])
+            current = self._load_year(self.current_year_path, 'current', cached['cy'])
+        else:
+            previous, current, summary_block = loaded
+
+        (self.previous_year_data, previous_skipped), (self.current_year_data, current_skipped) = previous, current
+        self._merge_skipped_columns(previous_skipped)
+        self._merge_skipped_columns(current_skipped)
 
         # Get brand columns (same in both files)
         self.brand_columns = [col for col in self.previous_year_data.columns
                              if col in self.BRAND_COLOR_MAP]
 
+        # Drop anything derived from previously loaded data
+        self._brand_changes = None
+        self._merged_rows = None
+        self._color_group_drill_downs = None
+        self._current_parser = None
+
+        if summary_block is not None:
+            # Seed the current year parser with the summary block decoded alongside the workbooks
+            self._current_parser = SalesDashboardParser(self.current_year_path)
+            self._current_parser.load_summary(summary_block)
+
+        self._cached_years = {year: entry for year, entry in cached.items() if entry is not None}
+        self._build_matrices()
+        self._cached_years = {}
+
+        # Parsed workbooks are cached now; their scans are added once the aggregator is built
+        self._unscanned_cache_entries = {}
+        for year, df, skipped in (('py', self.previous_year_data, previous_skipped),
+                                  ('cy', self.current_year_data, current_skipped)):
+            if cache_keys[year] is None or year in self._cached_scan_seeds:
+                continue
+            self._unscanned_cache_entries[year] = (cache_keys[year], df, skipped)
+            if cached[year] is None:
+                self._save_cached_year(cache_keys[year], year, df, skipped)
+
         print(f"[OK] Loaded {len(self.previous_year_data)} accounts from previous year")
         print(f"[OK] Loaded {len(self.current_year_data)} accounts from current year")
         print(f"[OK] Found {len(self.brand_columns)} brand columns for comparison")
+        if self.skipped_columns:
+            print(f"[INFO] Skipped {len(self.skipped_columns)} unused columns: {', '.join(self.skipped_columns)}")
+
+    def _should_load_in_parallel(self) -> bool:
+        """True when worker processes are worth their start-up cost"""
+        if (os.cpu_count() or 1) < 2:
+            return False
+        total_bytes = _source_size(self.previous_year_path) + _source_size(self.current_year_path)
+        return total_bytes >= PARALLEL_LOAD_MIN_BYTES
 
-    def _load_excel_file(self, file_path: str) -> pd.DataFrame:
+    def _load_workbooks_in_parallel(self):
+        """
+        Decode both workbooks and the current year summary block in worker processes
+
+        Returns:
+            Tuple of ((previous_df, skipped), (current_df, skipped), summary_block),
+            or None if worker processes are unavailable, in which case the caller
+            loads sequentially
+        """
+        columns = set(self.ACCOUNT_COLUMNS) | set(self.BRAND_COLOR_MAP)
+        unit_columns = self.BRAND_COLOR_MAP
+
+        print(f"[INFO] Loading {source_name(self.previous_year_path)} and "
+              f"{source_name(self.current_year_path)} in parallel")
+        return _run_in_processes([
+            (_read_workbook_accounts, (self.previous_year_path, columns, unit_columns)),
+            (_read_workbook_accounts, (self.current_year_path, columns, unit_columns)),
+            (read_summary_block, (self.current_year_path, ACCOUNT_DATA_SKIPROWS))
+        ], max_workers=3)
+
+    def _load_year(self, file_path, label: str, cached: Optional[Dict]) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Account data of one workbook, from the workbook cache when available
+
+        Args:
+            file_path: Workbook path or in-memory workbook
+            label: 'previous' or 'current' (for log messages)
+            cached: Entry returned by _load_cached_year, or None to parse the file
+
+        Returns:
+            Tuple of (account data, skipped column names)
+        """
+        if cached is not None:
+            print(f"[INFO] Using cached {label} year file: {source_name(file_path)}")
+            return cached['frame'], cached['skipped_columns']
+
+        print(f"[INFO] Loading {label} year file: {source_name(file_path)}")
+        return self._load_excel_file(file_path)
+
+    def _load_excel_file(self, file_path) -> Tuple[pd.DataFrame, List[str]]:
         """Load Excel file starting at row 24 (account data section)"""
-        df = pd.read_excel(file_path, sheet_name=0, skiprows=24)
-        df.columns = df.columns.str.strip()
-        df = df.dropna(how='all')
+        # Only account identity and brand columns are used; brand units are
+        # int32 with blanks as 0 and rows with a non-numeric Acct # (footer rows) are dropped
+        return _read_workbook_accounts(
+            file_path,
+            set(self.ACCOUNT_COLUMNS) | set(self.BRAND_COLOR_MAP),
+            self.BRAND_COLOR_MAP
+        )
+
+    def _cache_key(self, file_path) -> Optional[str]:
+        """Workbook cache key of a file (None without a cache)"""
+        if self.workbook_cache is None:
+            return None
+        schema = {
+            'columns': self.ACCOUNT_COLUMNS,
+            'brands': self.BRAND_COLOR_MAP,
+            'skiprows': ACCOUNT_DATA_SKIPROWS
+        }
+        try:
+            return self.workbook_cache.key_for(file_path, schema)
+        except OSError as e:
+            print(f"[WARNING] Could not hash workbook for the cache: {e}")
+            return None
+
+    def _load_cached_year(self, key: Optional[str]) -> Optional[Dict]:
+        """
+        Restore a parsed workbook from the workbook cache
+
+        Args:
+            key: Cache key (see _cache_key)
+
+        Returns:
+            Dictionary with the account data 'frame', its 'skipped_columns' and
+            the stored 'arrays'/'metadata', or None on a cache miss
+        """
+        if key is None:
+            return None
+        try:
+            entry = self.workbook_cache.load(key)
+        except Exception as e:
+            # A damaged entry only costs a re-parse
+            print(f"[WARNING] Could not read cached workbook: {e}")
+            return None
+        if entry is None:
+            return None
+
+        arrays, metadata = entry
+        return {
+            'frame': self._frame_from_arrays(arrays, '', metadata['brand_columns']),
+            'skipped_columns': list(metadata['skipped_columns']),
+            'arrays': arrays,
+            'metadata': metadata
+        }
+
+    def _save_cached_year(self, key: str, year: str, df: pd.DataFrame, skipped: List[str],
+                          aggregator: Optional[ComparisonAggregator] = None):
+        """
+        Store a parsed workbook, plus the aggregates derived from it alone
+        when an aggregator is given
+
+        Args:
+            key: Cache key (see _cache_key)
+            year: 'py' or 'cy' (which side of this comparison the workbook is)
+            df: Account data of the workbook
+            skipped: Column names skipped while reading it
+            aggregator: Aggregator whose scan of this side is stored with it
+        """
+        brand_columns = [col for col in df.columns if col in self.BRAND_COLOR_MAP]
+        arrays = self._frame_to_arrays(df, '', brand_columns)
+
+        if aggregator is not None:
+            purchases = aggregator.previous_year if year == 'py' else aggregator.current_year
+            for name, values in purchases.to_arrays().items():
+                arrays[f'purchases_{name}'] = values
+            for name, values in aggregator.year_aggregates(year).to_arrays().items():
+                arrays[f'aggregates_{name}'] = values
+
+        metadata = {
+            'brand_columns': brand_columns,
+            'skipped_columns': skipped,
+            # Scans and aggregates index brands in the comparison's column order
+            'matrix_brand_columns': self.brand_columns,
+            'created_at': datetime.now().isoformat()
+        }
+        try:
+            self.workbook_cache.save(key, arrays, metadata)
+        except Exception as e:
+            # Loading does not depend on the cache
+            print(f"[WARNING] Could not cache parsed workbook: {e}")
+
+    def _cached_scans(self, year: str, matrix: BrandMatrix) -> Tuple[Optional[YearPurchases], Optional[YearAggregates]]:
+        """Stored purchases scan and default aggregates of a cached side (if usable)"""
+        entry = self._cached_years.get(year)
+        if entry is None or entry['metadata']['matrix_brand_columns'] != self.brand_columns:
+            return None, None
+        if 'purchases_rows' not in entry['arrays']:
+            # Cached before any brand section needed the scans
+            return None, None
+
+        def stored(prefix):
+            return {name[len(prefix):]: values for name, values in entry['arrays'].items() if name.startswith(prefix)}
+
+        return (YearPurchases.from_arrays(matrix, stored('purchases_')),
+                YearAggregates.from_arrays(matrix, stored('aggregates_')))
+
+    def _merge_skipped_columns(self, skipped: List[str]):
+        """Record columns skipped in one workbook (union over both files)"""
+        for col in skipped:
+            if col not in self.skipped_columns:
+                self.skipped_columns.append(col)
+
+    def _build_matrices(self):
+        """
+        Build the brand unit matrices every brand-level analysis reduces over
+
+        The color group matrix and the aggregator are built from them on first
+        use, so sections that never touch brands (e.g. sales_per_working_day)
+        skip the brand scans.
+        """
+        self.previous_year_matrix = BrandMatrix.from_frame(
+            self.previous_year_data, self.brand_columns, self.BRAND_COLOR_MAP, sparse=self.sparse_units
+        )
+        self.current_year_matrix = BrandMatrix.from_frame(
+            self.current_year_data, self.brand_columns, self.BRAND_COLOR_MAP, sparse=self.sparse_units
+        )
+        self._color_group_matrix = None
+        self._aggregator = None
+
+        # Sides restored from the workbook cache bring their scan and default aggregates
+        self._cached_scan_seeds = {}
+        for year, matrix in (('py', self.previous_year_matrix), ('cy', self.current_year_matrix)):
+            purchases, aggregates = self._cached_scans(year, matrix)
+            if purchases is not None:
+                self._cached_scan_seeds[year] = (purchases, aggregates)
+
+    @property
+    def color_group_matrix(self) -> ColorGroupMatrix:
+        """Accounts x color group units of both years (built on first use)"""
+        with self._color_group_matrix_lock:
+            if self._color_group_matrix is None:
+                self._color_group_matrix = ColorGroupMatrix(self.previous_year_matrix, self.current_year_matrix)
+            return self._color_group_matrix
+
+    @property
+    def aggregator(self) -> ComparisonAggregator:
+        """Scans of both years and the joined rows (built on first use)"""
+        with self._aggregator_lock:
+            if self._aggregator is None:
+                seeds = self._cached_scan_seeds
+                aggregator = ComparisonAggregator(
+                    self.previous_year_matrix, self.current_year_matrix, self._get_merged_rows(),
+                    previous_year_purchases=seeds.get('py', (None, None))[0],
+                    current_year_purchases=seeds.get('cy', (None, None))[0]
+                )
+                for year, (_, aggregates) in seeds.items():
+                    aggregator.seed_year_aggregates(year, aggregates)
+
+                # Complete the cache entries of workbooks stored without their scans
+                for year, (key, df, skipped) in self._unscanned_cache_entries.items():
+                    self._save_cached_year(key, year, df, skipped, aggregator)
+                self._unscanned_cache_entries = {}
+
+                # Published only once seeded, so no caller reduces the cached sides again
+                self._aggregator = aggregator
+            return self._aggregator
+
+    def to_session(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """
+        Build a compact copy of the loaded data for the session store
+
+        Returns:
+            Tuple of (arrays, metadata): account x brand unit matrices plus
+            account numbers, names and cities for each year
+        """
+        arrays = {}
+        for prefix, df in (('py_', self.previous_year_data), ('cy_', self.current_year_data)):
+            arrays.update(self._frame_to_arrays(df, prefix, self.brand_columns))
+
+        metadata = {
+            'previous_year_file': os.path.basename(source_name(self.previous_year_path)),
+            'current_year_file': os.path.basename(source_name(self.current_year_path)),
+            'brand_columns': self.brand_columns,
+            'created_at': datetime.now().isoformat()
+        }
+
+        return arrays, metadata
+
+    @classmethod
+    def from_session(cls, arrays: Dict[str, np.ndarray], metadata: Dict) -> 'SalesComparisonParser':
+        """
+        Rebuild a loaded parser from a stored session (no Excel parsing)
+
+        Args:
+            arrays: Arrays produced by to_session()
+            metadata: Metadata produced by to_session()
 
-        # Remove rows where Acct # is not numeric (footer rows)
-        if 'Acct #' in df.columns:
-            df = df[pd.to_numeric(df['Acct #'], errors='coerce').notna()]
+        Returns:
+            Parser ready for brand-level analysis
+        """
+        parser = cls(metadata['previous_year_file'], metadata['current_year_file'])
+        parser.brand_columns = list(metadata['brand_columns'])
 
-        # Fill NaN values in brand columns with 0
-        for col in df.columns:
-            if col in self.BRAND_COLOR_MAP:
-                df[col] = df[col].fillna(0)
+        parser.previous_year_data, parser.current_year_data = (
+            parser._frame_from_arrays(arrays, prefix, parser.brand_columns) for prefix in ('py_', 'cy_')
+        )
+        parser._build_matrices()
+        return parser
 
+    @staticmethod
+    def _frame_to_arrays(df: pd.DataFrame, prefix: str, brand_columns: List[str]) -> Dict[str, np.ndarray]:
+        """Account numbers, names, cities and brand units of loaded account data"""
+        return {
+            f'{prefix}accounts': pd.to_numeric(df['Acct #'], errors='coerce').fillna(0).to_numpy(dtype=np.int64),
+            f'{prefix}names': df['Name'].astype(str).to_numpy(dtype=str),
+            f'{prefix}cities': df['City'].astype(str).to_numpy(dtype=str),
+            f'{prefix}units': df[brand_columns].fillna(0).to_numpy(dtype=np.int32)
+        }
+
+    @staticmethod
+    def _frame_from_arrays(arrays: Dict[str, np.ndarray], prefix: str, brand_columns: List[str]) -> pd.DataFrame:
+        """Account data rebuilt from _frame_to_arrays output"""
+        # Same schema as a loaded workbook (see read_account_table)
+        df = pd.DataFrame(arrays[f'{prefix}units'].astype(UNIT_DTYPE), columns=list(brand_columns))
+        df.insert(0, 'Acct #', arrays[f'{prefix}accounts'].astype(ACCOUNT_NUMBER_DTYPE))
+        df.insert(1, 'Name', arrays[f'{prefix}names'].astype(object))
+        df.insert(2, 'City', pd.Categorical(arrays[f'{prefix}cities'].astype(object)))
         return df
 
-    def get_customer_brand_changes(self) -> List[Dict]:
+    def _get_merged_rows(self) -> Dict:
         """
-        Compare brand purchases between years for each customer
+        Pair previous and current year rows by account number (outer join)
 
         Returns:
-            List of customer brand changes with details
+            Dictionary with the account number, name and city of each pair and
+            its previous/current year unit rows (zeros where a year has no row)
         """
-        changes = []
+        with self._merged_rows_lock:
+            if self._merged_rows is None:
+                self._merged_rows = self._merge_rows()
+            return self._merged_rows
+
+    def _merge_rows(self) -> Dict:
+        """Build the joined rows returned by _get_merged_rows"""
+        py_matrix, cy_matrix = self.previous_year_matrix, self.current_year_matrix
 
-        # Merge datasets on Account #
+        # Merge row positions on Account # (same pairing and order as merging the full frames)
         merged = pd.merge(
-            self.previous_year_data[['Acct #', 'Name', 'City'] + self.brand_columns],
-            self.current_year_data[['Acct #', 'Name', 'City'] + self.brand_columns],
+            pd.DataFrame({'Acct #': self.previous_year_data['Acct #'].to_numpy(),
+                          'row_py': np.arange(len(self.previous_year_data))}),
+            pd.DataFrame({'Acct #': self.current_year_data['Acct #'].to_numpy(),
+                          'row_cy': np.arange(len(self.current_year_data))}),
             on='Acct #',
-            how='outer',
-            suffixes=('_py', '_cy')
+            how='outer'
         )
 
-        # Iterate through each account
-        for _, row in merged.iterrows():
-            acct_num = row['Acct #']
-            # Use current year name/city if available, otherwise previous year
-            name = row.get('Name_cy', row.get('Name_py', 'Unknown'))
-            city = row.get('City_cy', row.get('City_py', 'Unknown'))
-
-            # Compare each brand
-            for brand in self.brand_columns:
-                py_col = f'{brand}_py'
-                cy_col = f'{brand}_cy'
-
-                py_units = row.get(py_col, 0) if pd.notna(row.get(py_col)) else 0
-                cy_units = row.get(cy_col, 0) if pd.notna(row.get(cy_col)) else 0
-
-                # Convert to int
-                py_units = int(py_units) if isinstance(py_units, (int, float)) else 0
-                cy_units = int(cy_units) if isinstance(cy_units, (int, float)) else 0
-
-                # Calculate change
-                change = cy_units - py_units
-
-                # Only include if there's a change or current/previous activity
-                if change != 0 or py_units > 0 or cy_units > 0:
-                    changes.append({
-                        'account_number': int(acct_num) if pd.notna(acct_num) else 0,
-                        'account_name': str(name),
-                        'city': str(city),
-                        'brand': brand,
-                        'color_group': self.BRAND_COLOR_MAP.get(brand, 'OTHER'),
-                        'previous_year_units': py_units,
-                        'current_year_units': cy_units,
-                        'change': change,
-                        'pct_change': ((change / py_units) * 100) if py_units > 0 else 0
-                    })
+        py_rows = merged['row_py'].to_numpy()
+        cy_rows = merged['row_cy'].to_numpy()
+        has_py = pd.notna(py_rows)
+        has_cy = pd.notna(cy_rows)
+        py_rows = np.where(has_py, py_rows, 0).astype(np.intp)
+        cy_rows = np.where(has_cy, cy_rows, 0).astype(np.intp)
+
+        py_units = np.zeros((len(merged), len(self.brand_columns)), dtype=np.int64)
+        cy_units = np.zeros((len(merged), len(self.brand_columns)), dtype=np.int64)
+        py_units[has_py] = py_matrix.take_rows(py_rows[has_py])
+        cy_units[has_cy] = cy_matrix.take_rows(cy_rows[has_cy])
+
+        # Name and city come from the current year row (missing when the account has none)
+        names = np.full(len(merged), np.nan, dtype=object)
+        cities = np.full(len(merged), np.nan, dtype=object)
+        names[has_cy] = cy_matrix.names[cy_rows[has_cy]]
+        cities[has_cy] = cy_matrix.cities[cy_rows[has_cy]]
+
+        # A brand counts for a pair if it changed or had activity in either year
+        active = (cy_units != py_units) | (py_units > 0) | (cy_units > 0)
+        cy_matrix = self.current_year_matrix
+
+        return {
+            'accounts': merged['Acct #'].fillna(0).astype(np.int64).tolist(),
+            'names': [str(name) for name in names],
+            'cities': [str(city) for city in cities],
+            'py_units': py_units,
+            'cy_units': cy_units,
+            'active': active,
+            # Units of the active brands summed per color group
+            'py_color_units': cy_matrix.color_units(np.where(active, py_units, 0)),
+            'cy_color_units': cy_matrix.color_units(np.where(active, cy_units, 0)),
+            'active_color_groups': cy_matrix.color_units(active) > 0
+        }
+
+    def get_customer_brand_changes(self) -> List[Dict]:
+        """
+        Compare brand purchases between years for each customer
+
+        Returns:
+            List of customer brand changes with details
+        """
+        with self._brand_changes_lock:
+            if self._brand_changes is None:
+                self._brand_changes = self._list_brand_changes()
+            return self._brand_changes
+
+    def _list_brand_changes(self) -> List[Dict]:
+        """Build the brand changes returned by get_customer_brand_changes"""
+        merged = self._get_merged_rows()
+        aggregator = self.aggregator
+        brand_colors = [self.BRAND_COLOR_MAP.get(brand, 'OTHER') for brand in self.brand_columns]
+
+        # Active cells only: a change or current/previous activity
+        changes = []
+        for row, col, py, cy in zip(aggregator.change_rows, aggregator.change_cols,
+                                    aggregator.change_previous_year.tolist(),
+                                    aggregator.change_current_year.tolist()):
+            change = cy - py
+            changes.append({
+                'account_number': merged['accounts'][row],
+                'account_name': merged['names'][row],
+                'city': merged['cities'][row],
+                'brand': self.brand_columns[col],
+                'color_group': brand_colors[col],
+                'previous_year_units': py,
+                'current_year_units': cy,
+                'change': change,
+                'pct_change': ((change / py) * 100) if py > 0 else 0
+            })
 
         return changes
 
@@ -171,64 +646,124 @@ class SalesComparisonParser:
         Returns:
             Dictionary with color group breakdown for this account
         """
-        all_changes = self.get_customer_brand_changes()
-
-        # Filter to this account
-        account_changes = [c for c in all_changes if c['account_number'] == account_number]
-
-        if not account_changes:
-            return {
-                'account_number': account_number,
-                'color_groups_cy': [],
-                'color_groups_py': []
-            }
+        breakdown = self.get_account_color_breakdowns([account_number])[int(account_number)]
+        breakdown['account_number'] = account_number
+        return breakdown
 
-        # Aggregate by color group for Current Year
-        color_totals_cy = {}
-        color_totals_py = {}
-
-        for change in account_changes:
-            color = change['color_group']
+    def get_account_color_breakdowns(self, account_numbers: Optional[List[int]] = None) -> Dict[int, Dict]:
+        """
+        Get color group breakdowns for many accounts from the color group matrix built at load
 
-            if color not in color_totals_cy:
-                color_totals_cy[color] = 0
-                color_totals_py[color] = 0
+        Args:
+            account_numbers: Accounts to analyze (None for every account)
 
-            color_totals_cy[color] += change['current_year_units']
-            color_totals_py[color] += change['previous_year_units']
+        Returns:
+            Dictionary of account number -> breakdown in the same format as
+            get_account_color_breakdown
+        """
+        color_groups = self.color_group_matrix
+        colors = color_groups.color_groups
+
+        if account_numbers is None:
+            accounts = color_groups.accounts
+            positions = np.arange(len(accounts))
+        else:
+            accounts = list(dict.fromkeys(int(a) for a in account_numbers))
+            positions = color_groups.positions(accounts)
+
+        def color_group_list(units_row, total, order):
+            groups = [
+                {
+                    'color_group': colors[i],
+                    'units': int(units_row[i]),
+                    'percentage': (int(units_row[i]) / int(total) * 100) if total > 0 else 0
+                }
+                for i in order if units_row[i] > 0
+            ]
+            # Sort by units descending
+            groups.sort(key=lambda x: x['units'], reverse=True)
+            return groups
+
+        breakdowns = {}
+        for account_number, i in zip(accounts, positions):
+            account_number = int(account_number)
+
+            if i < 0 or not color_groups.has_activity[i]:
+                breakdowns[account_number] = {
+                    'account_number': account_number,
+                    'color_groups_cy': [],
+                    'color_groups_py': []
+                }
+                continue
 
-        # Convert to list format with percentages
-        total_cy = sum(color_totals_cy.values())
-        total_py = sum(color_totals_py.values())
+            # Color groups are listed in the order their first active brand appears (ties keep it)
+            first_active = color_groups.first_active_brand[i]
+            order = [j for j in np.argsort(first_active, kind='stable') if first_active[j] < len(self.brand_columns)]
+            total_cy = color_groups.total_current_year[i]
+            total_py = color_groups.total_previous_year[i]
+            breakdowns[account_number] = {
+                'account_number': account_number,
+                'color_groups_cy': color_group_list(color_groups.current_year[i], total_cy, order),
+                'color_groups_py': color_group_list(color_groups.previous_year[i], total_py, order),
+                'total_units_cy': int(total_cy),
+                'total_units_py': int(total_py)
+            }
 
-        color_groups_cy = []
-        color_groups_py = []
+        return breakdowns
 
-        for color in color_totals_cy.keys():
-            if color_totals_cy[color] > 0:
-                color_groups_cy.append({
-                    'color_group': color,
-                    'units': color_totals_cy[color],
-                    'percentage': (color_totals_cy[color] / total_cy * 100) if total_cy > 0 else 0
-                })
+    def get_color_group_drill_downs(self) -> Dict[str, Dict]:
+        """
+        Get drill-downs for every color group in one grouped pass
 
-            if color_totals_py[color] > 0:
-                color_groups_py.append({
-                    'color_group': color,
-                    'units': color_totals_py[color],
-                    'percentage': (color_totals_py[color] / total_py * 100) if total_py > 0 else 0
-                })
+        Customers come from the (color group, account) totals of the joined
+        scan (see ComparisonAggregator).
 
-        # Sort by units descending
-        color_groups_cy.sort(key=lambda x: x['units'], reverse=True)
-        color_groups_py.sort(key=lambda x: x['units'], reverse=True)
+        Returns:
+            Dictionary of color group -> drill-down in the same format as
+            get_color_group_drill_down
+        """
+        with self._color_group_drill_downs_lock:
+            if self._color_group_drill_downs is None:
+                self._color_group_drill_downs = self._build_color_group_drill_downs()
+            return self._color_group_drill_downs
+
+    def _build_color_group_drill_downs(self) -> Dict[str, Dict]:
+        """Build the drill-downs returned by get_color_group_drill_downs"""
+        merged = self._get_merged_rows()
+        color_groups = self.color_group_matrix
+        totals = self.aggregator.color_group_customers
+
+        customers_by_group = {color: [] for color in dict.fromkeys(self.BRAND_COLOR_MAP.values())}
+        for (group, acct), group_rows, py_total, cy_total in zip(
+            totals.index, totals['rows'], totals['previous_year_units'], totals['current_year_units']
+        ):
+            color_group = color_groups.color_groups[group]
+            brand_mask = color_groups.brand_groups == group
+            first_row = group_rows[0]
+
+            customers_by_group.setdefault(color_group, []).append({
+                'account_number': int(acct),
+                'account_name': merged['names'][first_row],
+                'city': merged['cities'][first_row],
+                'color_group': color_group,
+                'previous_year_units': int(py_total),
+                'current_year_units': int(cy_total),
+                'change': int(cy_total) - int(py_total),
+                'brands': [
+                    {
+                        'brand': self.brand_columns[col],
+                        'previous_year_units': int(merged['py_units'][row, col]),
+                        'current_year_units': int(merged['cy_units'][row, col]),
+                        'change': int(merged['cy_units'][row, col] - merged['py_units'][row, col])
+                    }
+                    for row in group_rows
+                    for col in np.nonzero(merged['active'][row] & brand_mask)[0]
+                ]
+            })
 
         return {
-            'account_number': account_number,
-            'color_groups_cy': color_groups_cy,
-            'color_groups_py': color_groups_py,
-            'total_units_cy': total_cy,
-            'total_units_py': total_py
+            color_group: self._summarize_drill_down(color_group, customers)
+            for color_group, customers in customers_by_group.items()
         }
 
     def get_color_group_drill_down(self, color_group: str) -> Dict:
@@ -242,39 +777,13 @@ class SalesComparisonParser:
         Returns:
             Dictionary with declining, growing, lost, and new customers for that color
         """
-        all_changes = self.get_customer_brand_changes()
-
-        # Filter to this color group
-        color_changes = [c for c in all_changes if c['color_group'] == color_group]
-
-        # Aggregate by customer (sum all brands in this color group)
-        customer_totals = {}
-        for change in color_changes:
-            acct = change['account_number']
-            if acct not in customer_totals:
-                customer_totals[acct] = {
-                    'account_number': acct,
-                    'account_name': change['account_name'],
-                    'city': change['city'],
-                    'color_group': color_group,
-                    'previous_year_units': 0,
-                    'current_year_units': 0,
-                    'change': 0,
-                    'brands': []
-                }
-
-            customer_totals[acct]['previous_year_units'] += change['previous_year_units']
-            customer_totals[acct]['current_year_units'] += change['current_year_units']
-            customer_totals[acct]['change'] += change['change']
-            customer_totals[acct]['brands'].append({
-                'brand': change['brand'],
-                'previous_year_units': change['previous_year_units'],
-                'current_year_units': change['current_year_units'],
-                'change': change['change']
-            })
-
-        customers = list(customer_totals.values())
+        drill_downs = self.get_color_group_drill_downs()
+        if color_group in drill_downs:
+            return drill_downs[color_group]
+        return self._summarize_drill_down(color_group, [])
 
+    def _summarize_drill_down(self, color_group: str, customers: List[Dict]) -> Dict:
+        """Categorize and sort the customers of one color group"""
         # Categorize customers (mutually exclusive categories)
         lost = [c for c in customers if c['previous_year_units'] > 0 and c['current_year_units'] == 0]
         new = [c for c in customers if c['previous_year_units'] == 0 and c['current_year_units'] > 0]
@@ -311,78 +820,9 @@ class SalesComparisonParser:
         Returns:
             Dictionary with accounts per brand metrics for CY and PY
         """
-        brand_metrics_cy = {}
-        brand_metrics_py = {}
-
-        # Initialize metrics for all tracked brands
-        for brand in self.brand_columns:
-            brand_metrics_cy[brand] = {
-                'brand': brand,
-                'color_group': self.BRAND_COLOR_MAP.get(brand, 'OTHER'),
-                'accounts_buying_12_plus': 0,
-                'total_accounts_buying': 0,
-                'total_units': 0,
-                'qualifying_accounts': []
-            }
-            brand_metrics_py[brand] = {
-                'brand': brand,
-                'color_group': self.BRAND_COLOR_MAP.get(brand, 'OTHER'),
-                'accounts_buying_12_plus': 0,
-                'total_accounts_buying': 0,
-                'total_units': 0,
-                'qualifying_accounts': []
-            }
-
-        # Analyze current year data
-        for _, row in self.current_year_data.iterrows():
-            acct_num = row.get('Acct #', 0)
-            acct_name = row.get('Name', 'Unknown')
-
-            for brand in self.brand_columns:
-                if brand in row and pd.notna(row[brand]):
-                    units = int(row[brand]) if isinstance(row[brand], (int, float)) else 0
-
-                    if units > 0:
-                        brand_metrics_cy[brand]['total_accounts_buying'] += 1
-                        brand_metrics_cy[brand]['total_units'] += units
-
-                        if units >= threshold:
-                            brand_metrics_cy[brand]['accounts_buying_12_plus'] += 1
-                            brand_metrics_cy[brand]['qualifying_accounts'].append({
-                                'account_number': int(acct_num) if pd.notna(acct_num) else 0,
-                                'account_name': str(acct_name),
-                                'units': units
-                            })
-
-        # Analyze previous year data
-        for _, row in self.previous_year_data.iterrows():
-            acct_num = row.get('Acct #', 0)
-            acct_name = row.get('Name', 'Unknown')
-
-            for brand in self.brand_columns:
-                if brand in row and pd.notna(row[brand]):
-                    units = int(row[brand]) if isinstance(row[brand], (int, float)) else 0
-
-                    if units > 0:
-                        brand_metrics_py[brand]['total_accounts_buying'] += 1
-                        brand_metrics_py[brand]['total_units'] += units
-
-                        if units >= threshold:
-                            brand_metrics_py[brand]['accounts_buying_12_plus'] += 1
-                            brand_metrics_py[brand]['qualifying_accounts'].append({
-                                'account_number': int(acct_num) if pd.notna(acct_num) else 0,
-                                'account_name': str(acct_name),
-                                'units': units
-                            })
-
-        # Sort qualifying accounts by units for each brand
-        for brand in self.brand_columns:
-            brand_metrics_cy[brand]['qualifying_accounts'].sort(
-                key=lambda x: x['units'], reverse=True
-            )
-            brand_metrics_py[brand]['qualifying_accounts'].sort(
-                key=lambda x: x['units'], reverse=True
-            )
+        aggregates = self.aggregator.aggregate(threshold=threshold)
+        brand_metrics_cy = self._brand_threshold_metrics(aggregates.current_year)
+        brand_metrics_py = self._brand_threshold_metrics(aggregates.previous_year)
 
         # Convert to lists and sort by accounts_buying_12_plus
         brands_cy = list(brand_metrics_cy.values())
@@ -403,69 +843,194 @@ class SalesComparisonParser:
             }
         }
 
-    def _extract_dates_from_filename(self, file_path: str) -> Optional[Tuple[datetime, datetime]]:
+    def get_partitioned_aggregates(self, partitions: Optional[int] = None, threshold: int = 12,
+                                   top_k: int = 10, max_workers: Optional[int] = None) -> Dict:
         """
-        Extract start and end dates from filename pattern like 'Payton YOY 8-18-24 to 8-19-25.xlsx'
-        or from Excel cell C1 if filename doesn't contain dates
+        Brand, city and account-category aggregates computed per account partition
 
-        Supported formats:
-        - Filename: "MM-DD-YY to MM-DD-YY" (e.g., "PAM 11-20-24 to 11-19-25.xlsx")
-        - Cell C1: "Date Range: MM/DD/YY..MM/DD/YY" (e.g., "Date Range: 11/20/24..11/19/25")
+        Accounts are split by a hash of Acct # and each partition is aggregated
+        in its own worker process; the partial results are merged with
+        PartialAggregates.merge. Meant for regional roll-ups of many reps'
+        exports, where one core is the bottleneck.
 
         Args:
-            file_path: Path to the Excel file
+            partitions: Number of account partitions (default: number of CPUs)
+            threshold: Minimum units for an account to count as buying a brand
+            top_k: Length of the ranked account lists
+            max_workers: Worker processes (default: one per partition, at most
+                         the number of CPUs); 1 aggregates in-process
 
         Returns:
-            Tuple of (start_date, end_date) or None if not found
+            Dictionary with per-brand totals and top qualifying accounts for CY
+            and PY, per-city totals and category counts, and the accounts with
+            the largest increase and decrease
         """
-        filename = os.path.basename(file_path)
+        cpus = os.cpu_count() or 1
+        partitions = max(1, partitions or cpus)
+        if max_workers is None:
+            max_workers = min(partitions, cpus)
 
-        # Pattern 1: Month-Day-Year to Month-Day-Year (dashes with "to")
-        pattern_dashes_to = r'(\d{1,2})-(\d{1,2})-(\d{2,4})\s+to\s+(\d{1,2})-(\d{1,2})-(\d{2,4})'
+        inputs = self.aggregator.partition_inputs(partitions, group_by='city')
+        arguments = [(partition, len(self.brand_columns), threshold, top_k) for partition in inputs]
 
-        # Pattern 2: Month/Day/Year..Month/Day/Year (slashes with "..")
-        pattern_slashes_dots = r'(\d{1,2})/(\d{1,2})/(\d{2,4})\.\.(\d{1,2})/(\d{1,2})/(\d{2,4})'
+        partials = None
+        if max_workers > 1 and partitions > 1:
+            partials = _run_in_processes([(compute_partial, args) for args in arguments], max_workers)
+        if partials is None:
+            partials = [compute_partial(*args) for args in arguments]
 
-        # Pattern 3: Month/Day/Year to Month/Day/Year (slashes with "to")
-        pattern_slashes_to = r'(\d{1,2})/(\d{1,2})/(\d{2,4})\s+to\s+(\d{1,2})/(\d{1,2})/(\d{2,4})'
+        merged = reduce(PartialAggregates.merge, partials)
+        return self._format_partial_aggregates(merged, partitions)
 
-        # Pattern 4: Month-Day-Year..Month-Day-Year (dashes with "..")
-        pattern_dashes_dots = r'(\d{1,2})-(\d{1,2})-(\d{2,4})\.\.(\d{1,2})-(\d{1,2})-(\d{2,4})'
+    def get_aggregate_snapshot(self, threshold: int = 12, top_k: int = 10, source: Optional[str] = None,
+                               distinct_error: Optional[float] = None) -> AggregateSnapshot:
+        """
+        Mergeable snapshot of this comparison for territory and region roll-ups
 
-        patterns = [pattern_dashes_to, pattern_slashes_dots, pattern_slashes_to, pattern_dashes_dots]
+        The snapshot holds brand, city and color group totals, account category
+        counts, top-K candidate lists and distinct-account sets; snapshots of
+        many reps merge (see merge_snapshots) without their workbooks.
 
-        def try_parse_match(match) -> Optional[Tuple[datetime, datetime]]:
-            """Helper to parse a regex match into datetime tuple"""
-            if not match:
-                return None
-            start_month, start_day, start_year, end_month, end_day, end_year = match.groups()
-
-            # Convert 2-digit years to 4-digit
-            start_year = int(start_year)
-            if start_year < 100:
-                start_year += 2000
-
-            end_year = int(end_year)
-            if end_year < 100:
-                end_year += 2000
-
-            try:
-                start_date = datetime(start_year, int(start_month), int(start_day))
-                end_date = datetime(end_year, int(end_month), int(end_day))
-                return (start_date, end_date)
-            except ValueError:
-                return None
+        Args:
+            threshold: Minimum units for an account to count as buying a brand
+            top_k: Length of the ranked account lists
+            source: Label of this comparison (default: the current year file name)
+            distinct_error: None for exact distinct-account sets, otherwise the
+                            target relative error of HyperLogLog sketches (for
+                            roll-ups too large to keep every account number)
+
+        Returns:
+            AggregateSnapshot of the comparison
+        """
+        partition = self.aggregator.partition_inputs(1, group_by='city')[0]
+        return AggregateSnapshot.from_partition(
+            partition,
+            self.brand_columns,
+            [self.BRAND_COLOR_MAP.get(brand, 'OTHER') for brand in self.brand_columns],
+            self._account_names(),
+            threshold=threshold,
+            top_k=top_k,
+            source=source or os.path.basename(source_name(self.current_year_path)),
+            distinct_error=distinct_error
+        )
+
+    def _account_names(self) -> Dict[int, str]:
+        """Account number -> name (current year names win; the first row of an account names it)"""
+        names = {}
+        for matrix in (self.previous_year_matrix, self.current_year_matrix):
+            names.update(dict(zip(matrix.accounts[::-1].tolist(), [str(name) for name in matrix.names[::-1]])))
+        return names
+
+    def _format_partial_aggregates(self, aggregates: PartialAggregates, partitions: int) -> Dict:
+        """Response structure of get_partitioned_aggregates from merged partials"""
+        names = self._account_names()
+
+        brands = []
+        for col, brand in enumerate(self.brand_columns):
+            entry = {'brand': brand, 'color_group': self.BRAND_COLOR_MAP.get(brand, 'OTHER')}
+            for year in PartialAggregates.YEARS:
+                entry[f'accounts_buying_12_plus_{year}'] = int(aggregates.brand_qualifying[year][col])
+                entry[f'total_accounts_buying_{year}'] = int(aggregates.brand_accounts[year][col])
+                entry[f'total_units_{year}'] = int(aggregates.brand_units[year][col])
+                entry[f'top_accounts_{year}'] = [
+                    {'account_number': account, 'account_name': names.get(account, 'nan'), 'units': -units}
+                    for units, account in aggregates.top_qualifying[year][col]
+                ]
+            brands.append(entry)
+        brands.sort(key=lambda x: x['accounts_buying_12_plus_cy'], reverse=True)
+
+        # Groups without rows of their own (e.g. 'Unknown' for accounts missing a city) are left out
+        cities = [
+            dict({'city': city}, **{field: int(value) for field, value in zip(PartialAggregates.GROUP_FIELDS, counts)})
+            for city, counts in aggregates.groups.items()
+            if counts[PartialAggregates.GROUP_FIELDS.index('total_accounts')] > 0
+        ]
+        cities.sort(key=lambda x: (-x['total_units_cy'], x['city']))
+
+        def ranked(entries):
+            return [
+                {
+                    'account_number': account,
+                    'account_name': names.get(account, 'nan'),
+                    'previous_year_units': py,
+                    'current_year_units': cy,
+                    'change': cy - py
+                }
+                for _, account, py, cy in entries
+            ]
+
+        return {
+            'partitions': partitions,
+            'threshold': aggregates.threshold,
+            'brands': brands,
+            'cities': cities,
+            'top_growing_accounts': ranked(aggregates.top_growing),
+            'top_declining_accounts': ranked(aggregates.top_declining),
+            'summary': {
+                field: sum(city[field] for city in cities) for field in PartialAggregates.GROUP_FIELDS
+            }
+        }
+
+    def _brand_threshold_metrics(self, year: YearAggregates) -> Dict[str, Dict]:
+        """
+        Accounts buying each brand (and buying threshold+ units) for one year
+
+        Args:
+            year: Aggregates of the year for the threshold
+
+        Returns:
+            Dictionary of brand -> metrics, qualifying accounts sorted by units
+        """
+        matrix = year.matrix
+
+        metrics = {}
+        for col, brand in enumerate(self.brand_columns):
+            brand_rows, brand_units = year.qualifying_accounts(col)
+
+            metrics[brand] = {
+                'brand': brand,
+                'color_group': self.BRAND_COLOR_MAP.get(brand, 'OTHER'),
+                'accounts_buying_12_plus': len(brand_rows),
+                'total_accounts_buying': int(year.brand_accounts[col]),
+                'total_units': int(year.brand_units[col]),
+                'qualifying_accounts': [
+                    {
+                        'account_number': int(matrix.accounts[row]),
+                        'account_name': str(matrix.names[row]),
+                        'units': int(row_units)
+                    }
+                    for row, row_units in zip(brand_rows, brand_units)
+                ]
+            }
+
+        return metrics
+
+    def _extract_dates_from_filename(self, file_path) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Extract start and end dates from filename pattern like 'Payton YOY 8-18-24 to 8-19-25.xlsx'
+        or from Excel cell C1 if filename doesn't contain dates
+
+        Supported formats:
+        - Filename: "MM-DD-YY to MM-DD-YY" (e.g., "PAM 11-20-24 to 11-19-25.xlsx")
+        - Cell C1: "Date Range: MM/DD/YY..MM/DD/YY" (e.g., "Date Range: 11/20/24..11/19/25")
 
-        # Try all patterns on filename
-        for pattern in patterns:
-            match = re.search(pattern, filename)
-            result = try_parse_match(match)
-            if result:
-                return result
+        Args:
+            file_path: Path to the Excel file (or a named in-memory workbook)
+
+        Returns:
+            Tuple of (start_date, end_date) or None if not found
+        """
+        filename = os.path.basename(source_name(file_path))
+
+        result = extract_date_range(filename)
+        if result:
+            return result
 
         # If not found in filename, try reading from Excel cell C1
         try:
-            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            import openpyxl
+
+            wb = openpyxl.load_workbook(rewind_source(file_path), read_only=True, data_only=True)
             sheet = wb.active
 
             # Try cell C1 (row 1, column 3)
@@ -473,12 +1038,9 @@ class SalesComparisonParser:
             wb.close()
 
             if cell_value and isinstance(cell_value, str):
-                # Try all patterns on cell value
-                for pattern in patterns:
-                    match = re.search(pattern, cell_value)
-                    result = try_parse_match(match)
-                    if result:
-                        return result
+                result = extract_date_range(cell_value)
+                if result:
+                    return result
         except Exception as e:
             print(f"[WARNING] Could not read date from Excel cell C1: {e}")
 
@@ -564,10 +1126,14 @@ class SalesComparisonParser:
 
         return working_days
 
-    def get_city_insights(self) -> Dict:
+    def get_city_insights(self, threshold: int = 12) -> Dict:
         """
         Aggregate all metrics by city for city-level insights
 
+        Args:
+            threshold: Minimum units for an account to count as buying a brand
+                       (default: 12)
+
         Returns:
             Dictionary with city-level aggregated data including:
             - Total accounts per city
@@ -577,163 +1143,31 @@ class SalesComparisonParser:
             - Color group breakdown by city
         """
         cities_data = {}
-
-        # Get all brand changes (already has city info)
-        all_changes = self.get_customer_brand_changes()
+        aggregates = self.aggregator.aggregate(threshold=threshold, group_by='city')
 
         # Step 1: Aggregate base metrics by city from current year data
-        for _, row in self.current_year_data.iterrows():
-            city = str(row.get('City', 'Unknown')).strip()
-            if not city or city == 'nan':
-                city = 'Unknown'
-
-            if city not in cities_data:
-                cities_data[city] = {
-                    'city': city,
-                    'total_accounts': 0,
-                    'total_units_cy': 0,
-                    'total_units_py': 0,
-                    'accounts_by_brand_cy': {},
-                    'accounts_by_brand_py': {},
-                    'accounts_by_color_group_cy': {},
-                    'accounts_by_color_group_py': {},
-                    'growing_accounts': [],
-                    'declining_accounts': [],
-                    'lost_accounts': [],
-                    'new_accounts': [],
-                    'account_numbers': set()
-                }
-
-            acct_num = row.get('Acct #')
-            if pd.notna(acct_num):
-                cities_data[city]['account_numbers'].add(int(acct_num))
-
-            # Sum units by brand for CY
-            for brand in self.brand_columns:
-                if brand in row and pd.notna(row[brand]):
-                    units = int(row[brand]) if isinstance(row[brand], (int, float)) else 0
-                    if units > 0:
-                        cities_data[city]['total_units_cy'] += units
-
-                        if brand not in cities_data[city]['accounts_by_brand_cy']:
-                            cities_data[city]['accounts_by_brand_cy'][brand] = {
-                                'brand': brand,
-                                'color_group': self.BRAND_COLOR_MAP.get(brand, 'OTHER'),
-                                'accounts_buying_12_plus': 0,
-                                'total_accounts_buying': 0,
-                                'total_units': 0
-                            }
-
-                        cities_data[city]['accounts_by_brand_cy'][brand]['total_accounts_buying'] += 1
-                        cities_data[city]['accounts_by_brand_cy'][brand]['total_units'] += units
-                        if units >= 12:
-                            cities_data[city]['accounts_by_brand_cy'][brand]['accounts_buying_12_plus'] += 1
-
-                        # Aggregate by color group
-                        color_group = self.BRAND_COLOR_MAP.get(brand, 'OTHER')
-                        if color_group not in cities_data[city]['accounts_by_color_group_cy']:
-                            cities_data[city]['accounts_by_color_group_cy'][color_group] = 0
-                        cities_data[city]['accounts_by_color_group_cy'][color_group] += units
+        self._add_city_units(aggregates.current_year, cities_data, 'cy')
 
         # Step 2: Add previous year data
-        for _, row in self.previous_year_data.iterrows():
-            city = str(row.get('City', 'Unknown')).strip()
-            if not city or city == 'nan':
-                city = 'Unknown'
-
-            if city not in cities_data:
-                cities_data[city] = {
-                    'city': city,
-                    'total_accounts': 0,
-                    'total_units_cy': 0,
-                    'total_units_py': 0,
-                    'accounts_by_brand_cy': {},
-                    'accounts_by_brand_py': {},
-                    'accounts_by_color_group_cy': {},
-                    'accounts_by_color_group_py': {},
-                    'growing_accounts': [],
-                    'declining_accounts': [],
-                    'lost_accounts': [],
-                    'new_accounts': [],
-                    'account_numbers': set()
-                }
-
-            acct_num = row.get('Acct #')
-            if pd.notna(acct_num):
-                cities_data[city]['account_numbers'].add(int(acct_num))
-
-            # Sum units by brand for PY
-            for brand in self.brand_columns:
-                if brand in row and pd.notna(row[brand]):
-                    units = int(row[brand]) if isinstance(row[brand], (int, float)) else 0
-                    if units > 0:
-                        cities_data[city]['total_units_py'] += units
-
-                        if brand not in cities_data[city]['accounts_by_brand_py']:
-                            cities_data[city]['accounts_by_brand_py'][brand] = {
-                                'brand': brand,
-                                'color_group': self.BRAND_COLOR_MAP.get(brand, 'OTHER'),
-                                'accounts_buying_12_plus': 0,
-                                'total_accounts_buying': 0,
-                                'total_units': 0
-                            }
-
-                        cities_data[city]['accounts_by_brand_py'][brand]['total_accounts_buying'] += 1
-                        cities_data[city]['accounts_by_brand_py'][brand]['total_units'] += units
-                        if units >= 12:
-                            cities_data[city]['accounts_by_brand_py'][brand]['accounts_buying_12_plus'] += 1
-
-                        # Aggregate by color group
-                        color_group = self.BRAND_COLOR_MAP.get(brand, 'OTHER')
-                        if color_group not in cities_data[city]['accounts_by_color_group_py']:
-                            cities_data[city]['accounts_by_color_group_py'][color_group] = 0
-                        cities_data[city]['accounts_by_color_group_py'][color_group] += units
-
-        # Step 3: Calculate account changes by city
-        account_changes_by_city = {}
-        for change in all_changes:
-            city = change['city']
-            if not city or city == 'nan':
-                city = 'Unknown'
-            acct_num = change['account_number']
-            key = f"{city}_{acct_num}"
-
-            if key not in account_changes_by_city:
-                account_changes_by_city[key] = {
-                    'city': city,
-                    'account_number': acct_num,
-                    'account_name': change['account_name'],
-                    'total_py': 0,
-                    'total_cy': 0,
-                    'total_change': 0
-                }
-
-            account_changes_by_city[key]['total_py'] += change['previous_year_units']
-            account_changes_by_city[key]['total_cy'] += change['current_year_units']
-            account_changes_by_city[key]['total_change'] += change['change']
-
-        # Categorize accounts by city
-        for key, acct in account_changes_by_city.items():
-            city = acct['city']
-            if city not in cities_data:
+        self._add_city_units(aggregates.previous_year, cities_data, 'py')
+
+        # Step 3: Categorize accounts by city (active units summed per city and account)
+        names = self._get_merged_rows()['names']
+        account_totals = aggregates.account_totals
+        for (city, acct_num), first_row, total_py, total_cy, total_change, category in zip(
+            account_totals.index, account_totals['first_row'], account_totals['previous_year_units'],
+            account_totals['current_year_units'], account_totals['change'], account_totals['category']
+        ):
+            if not category or city not in cities_data:
                 continue
 
-            account_info = {
-                'account_number': acct['account_number'],
-                'account_name': acct['account_name'],
-                'previous_year_units': acct['total_py'],
-                'current_year_units': acct['total_cy'],
-                'change': acct['total_change']
-            }
-
-            if acct['total_py'] > 0 and acct['total_cy'] == 0:
-                cities_data[city]['lost_accounts'].append(account_info)
-            elif acct['total_py'] == 0 and acct['total_cy'] > 0:
-                cities_data[city]['new_accounts'].append(account_info)
-            elif acct['total_change'] > 0:
-                cities_data[city]['growing_accounts'].append(account_info)
-            elif acct['total_change'] < 0:
-                cities_data[city]['declining_accounts'].append(account_info)
+            cities_data[city][f'{category}_accounts'].append({
+                'account_number': int(acct_num),
+                'account_name': names[first_row],
+                'previous_year_units': int(total_py),
+                'current_year_units': int(total_cy),
+                'change': int(total_change)
+            })
 
         # Step 4: Finalize city data
         result = []
@@ -803,6 +1237,65 @@ class SalesComparisonParser:
             }
         }
 
+    def _add_city_units(self, aggregates: YearAggregates, cities_data: Dict, year: str):
+        """
+        Add one year's accounts, brand and color group units to the city entries
+
+        Brands and color groups are added in the order they first appear in the
+        city's rows, so ties keep the same order when the lists are sorted.
+
+        Args:
+            aggregates: Aggregates of the year grouped by city
+            cities_data: City name -> city entry (updated in place)
+            year: 'cy' or 'py'
+        """
+        matrix = aggregates.matrix
+        not_seen = aggregates.not_seen
+        first_seen = aggregates.group_brand_first_seen
+        group_first_seen = aggregates.group_color_first_seen
+
+        for code, city in enumerate(aggregates.groups):
+            if city not in cities_data:
+                cities_data[city] = {
+                    'city': city,
+                    'total_accounts': 0,
+                    'total_units_cy': 0,
+                    'total_units_py': 0,
+                    'accounts_by_brand_cy': {},
+                    'accounts_by_brand_py': {},
+                    'accounts_by_color_group_cy': {},
+                    'accounts_by_color_group_py': {},
+                    'growing_accounts': [],
+                    'declining_accounts': [],
+                    'lost_accounts': [],
+                    'new_accounts': [],
+                    'account_numbers': set()
+                }
+            data = cities_data[city]
+
+            data['account_numbers'].update(aggregates.group_accounts[code].tolist())
+            data[f'total_units_{year}'] += int(aggregates.group_brand_units[code].sum())
+
+            accounts_by_brand = data[f'accounts_by_brand_{year}']
+            for col in np.argsort(first_seen[code], kind='stable'):
+                if first_seen[code, col] == not_seen:
+                    break
+                brand = self.brand_columns[col]
+                accounts_by_brand[brand] = {
+                    'brand': brand,
+                    'color_group': self.BRAND_COLOR_MAP.get(brand, 'OTHER'),
+                    'accounts_buying_12_plus': int(aggregates.group_brand_qualifying[code, col]),
+                    'total_accounts_buying': int(aggregates.group_brand_accounts[code, col]),
+                    'total_units': int(aggregates.group_brand_units[code, col])
+                }
+
+            # Aggregate by color group
+            accounts_by_color_group = data[f'accounts_by_color_group_{year}']
+            for group in np.argsort(group_first_seen[code], kind='stable'):
+                if group_first_seen[code, group] == not_seen:
+                    break
+                accounts_by_color_group[matrix.color_groups[group]] = int(aggregates.group_color_units[code, group])
+
     def get_sales_per_working_day(self) -> Dict:
         """
         Calculate sales per working day excluding bank holidays
@@ -824,12 +1317,7 @@ class SalesComparisonParser:
         start_date, end_date = dates
         working_days = self._count_working_days(start_date, end_date)
 
-        # Import parser to get sales totals
-        from .sales_parser import SalesDashboardParser
-
-        current_parser = SalesDashboardParser(self.current_year_path)
-        current_parser.load_data()
-        summary = current_parser.summary_data
+        summary = self._get_current_parser(summary_only=True).summary_data
 
         total_sales_cy = summary.get('total_sales_cy', 0)
         total_sales_py = summary.get('total_sales_py', 0)
@@ -854,54 +1342,184 @@ class SalesComparisonParser:
             'pct_change_per_day': round(((total_sales_cy / working_days) / (total_sales_py / working_days) - 1) * 100, 2) if working_days > 0 and total_sales_py > 0 else 0
         }
 
-    def get_complete_comparison_summary(self) -> Dict:
+    def _get_current_parser(self, summary_only: bool = False):
         """
-        Generate complete dashboard data including brand-level comparisons
+        Load the current year file with the original parser (once per instance)
+
+        Args:
+            summary_only: Only the summary block is needed; skips the account
+                          details until a later call needs them
+        """
+        # Summary sections may ask for it from several threads; the workbook is read once
+        with self._current_parser_lock:
+            if self._current_parser is None:
+                # The original parser provides the aggregate metrics
+                self._current_parser = SalesDashboardParser(self.current_year_path)
+                if summary_only:
+                    self._current_parser.load_summary()
+
+            if not summary_only and self._current_parser.account_data is None:
+                self._current_parser.load_data()
+            return self._current_parser
+
+    def _resolve_sections(self, sections: Optional[List[str]] = None) -> List[str]:
+        """
+        Expand requested summary sections with the sections and inputs they depend on
+
+        Args:
+            sections: Section names from SUMMARY_SECTIONS (None for all sections)
 
         Returns:
-            Complete dashboard data structure
+            Section and input names in computation order (dependencies first)
         """
-        # Import the original parser for aggregate metrics
-        from .sales_parser import SalesDashboardParser
+        if sections is None:
+            sections = list(self.SUMMARY_SECTIONS)
+
+        unknown = [name for name in sections if name not in self.SUMMARY_SECTIONS]
+        if unknown:
+            raise ValueError(
+                f"Unknown summary section(s): {', '.join(unknown)}. "
+                f"Valid sections: {', '.join(self.SUMMARY_SECTIONS)}"
+            )
 
-        # Parse current year file for aggregate metrics (maintains compatibility)
-        current_parser = SalesDashboardParser(self.current_year_path)
-        current_parser.load_data()
-        base_summary = current_parser.get_dashboard_summary()
+        ordered = []
+
+        def visit(name):
+            if name in ordered:
+                return
+            dependencies = self.SUMMARY_SECTIONS.get(name, self.SUMMARY_INPUTS.get(name, ()))
+            for dependency in dependencies:
+                visit(dependency)
+            ordered.append(name)
+
+        for name in sections:
+            visit(name)
+
+        return ordered
+
+    def _compute_section(self, name: str):
+        """Compute a single summary section or shared input"""
+        if name == 'merged_rows':
+            return self._get_merged_rows()
+        if name == 'aggregator':
+            return self.aggregator
+        if name == 'color_group_matrix':
+            return self.color_group_matrix
+        if name == 'current_year_parser':
+            return self._get_current_parser()
+        if name == 'dashboard':
+            return self._get_current_parser().get_dashboard_summary()
+        if name == 'brand_changes':
+            return self.get_customer_brand_changes()
+        if name == 'color_group_drill_downs':
+            # Generate drill-downs for each color group
+            return self.get_color_group_drill_downs()
+        if name == 'accounts_per_brand':
+            return self.get_accounts_per_brand(threshold=12)
+        if name == 'sales_per_working_day':
+            return self.get_sales_per_working_day()
+        if name == 'city_insights':
+            return self.get_city_insights()
+        raise ValueError(f"Unknown summary section: {name}")
+
+    def _compute_sections(self, names: List[str], max_workers: int) -> Tuple[Dict, Dict[str, float]]:
+        """
+        Compute summary sections, running independent ones concurrently
 
-        # Add brand-level comparison data
-        all_brand_changes = self.get_customer_brand_changes()
+        A section is started as soon as every section and input it depends on
+        (see SUMMARY_SECTIONS and SUMMARY_INPUTS) has finished, so the total
+        time approaches the longest dependency chain rather than the sum of all
+        sections, and each shared input is built by one step of its own.
 
-        # Generate drill-downs for each color group
-        color_drill_downs = {}
-        for color in set(self.BRAND_COLOR_MAP.values()):
-            color_drill_downs[color] = self.get_color_group_drill_down(color)
+        Args:
+            names: Section and input names in dependency order (see _resolve_sections)
+            max_workers: Worker threads; 1 computes the sections in order on
+                         the calling thread
 
-        # NEW: Add accounts per brand analysis
-        accounts_per_brand = self.get_accounts_per_brand(threshold=12)
+        Returns:
+            Tuple of (results, timings): section values and the milliseconds
+            each section took
+        """
+        timings = {}
+
+        def run(name):
+            start = time.perf_counter()
+            value = self._compute_section(name)
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+            return value
+
+        if max_workers <= 1:
+            return {name: run(name) for name in names}, timings
+
+        results = {}
+        pending = {name: self.SUMMARY_SECTIONS.get(name, self.SUMMARY_INPUTS.get(name, ())) for name in names}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running = {}
+            while pending or running:
+                ready = [name for name, dependencies in pending.items()
+                         if all(dependency in results for dependency in dependencies)]
+                for name in ready:
+                    del pending[name]
+                    running[pool.submit(run, name)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+        return results, timings
+
+    def get_complete_comparison_summary(self, sections: Optional[List[str]] = None,
+                                        max_workers: Optional[int] = None) -> Dict:
+        """
+        Generate complete dashboard data including brand-level comparisons
 
-        # NEW: Add sales per working day metrics
-        sales_per_working_day = self.get_sales_per_working_day()
+        Only the requested sections (plus the sections they depend on) are
+        computed, so a screen that needs e.g. accounts per brand does not pay
+        for city insights or per-account brand changes. Sections that do not
+        depend on each other are computed concurrently on a thread pool.
 
-        # NEW: Add city-level insights
-        city_insights = self.get_city_insights()
+        Args:
+            sections: Optional list of section names from SUMMARY_SECTIONS.
+                      Defaults to every section.
+            max_workers: Threads used for independent sections. Defaults to the
+                         number of CPUs; 1 computes the sections one by one.
 
-        # Enhance base summary with comparison data
-        base_summary['brand_comparison'] = {
-            'all_customer_brand_changes': all_brand_changes,
-            'color_group_drill_downs': color_drill_downs,
-            'comparison_metadata': {
-                'previous_year_file': self.previous_year_path,
-                'current_year_file': self.current_year_path,
+        Returns:
+            Complete dashboard data structure (only the requested sections),
+            with the milliseconds each computed section and shared input took in
+            'section_timings'
+        """
+        requested = list(dict.fromkeys(sections)) if sections is not None else list(self.SUMMARY_SECTIONS)
+        names = self._resolve_sections(requested)
+        if max_workers is None:
+            max_workers = min(len(names), os.cpu_count() or 1)
+        results, timings = self._compute_sections(names, max_workers)
+
+        # Parse current year file for aggregate metrics (maintains compatibility)
+        base_summary = results['dashboard'] if 'dashboard' in requested else {}
+
+        # Add brand-level comparison data
+        if 'brand_changes' in requested or 'color_group_drill_downs' in requested:
+            brand_comparison = {}
+            if 'brand_changes' in requested:
+                brand_comparison['all_customer_brand_changes'] = results['brand_changes']
+            if 'color_group_drill_downs' in requested:
+                brand_comparison['color_group_drill_downs'] = results['color_group_drill_downs']
+            brand_comparison['comparison_metadata'] = {
+                'previous_year_file': source_name(self.previous_year_path),
+                'current_year_file': source_name(self.current_year_path),
                 'total_brands_tracked': len(self.brand_columns),
                 'total_color_groups': len(set(self.BRAND_COLOR_MAP.values()))
             }
-        }
+            base_summary['brand_comparison'] = brand_comparison
 
         # Add new features to base summary
-        base_summary['accounts_per_brand'] = accounts_per_brand
-        base_summary['sales_per_working_day'] = sales_per_working_day
-        base_summary['city_insights'] = city_insights
+        for name in ('accounts_per_brand', 'sales_per_working_day', 'city_insights'):
+            if name in requested:
+                base_summary[name] = results[name]
+
+        base_summary['sections'] = requested
+        base_summary['section_timings'] = {name: timings[name] for name in names}
 
         return base_summary
 
@@ -5,52 +5,539 @@ Extracts insights from YOY sales data for sales representatives
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import json
+import io
+import copy
+import functools
+import inspect
 from datetime import datetime
 
+try:
+    from .brand_matrix import BrandMatrix
+    from .account_diff import AccountDiff, diff_account_data
+except ImportError:
+    # Run as a script (python sales_parser.py) from the parsers directory
+    from brand_matrix import BrandMatrix
+    from account_diff import AccountDiff, diff_account_data
+
+
+class NamedWorkbook(io.BytesIO):
+    """In-memory workbook that keeps its original filename (e.g. an archive member)"""
+
+    def __init__(self, content: bytes = b'', name: str = 'workbook.xlsx'):
+        super().__init__(content)
+        self.name = name
+
+
+def rewind_source(source):
+    """Rewind in-memory workbooks so they can be read more than once"""
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def source_name(source) -> str:
+    """Filename of a workbook path or in-memory workbook"""
+    return getattr(source, 'name', source)
+
+
+def read_summary_block(source, nrows: int) -> pd.DataFrame:
+    """
+    Read the raw summary/frame block at the top of the first sheet
+
+    Args:
+        source: Workbook path or in-memory workbook
+        nrows: Number of header rows above the account details section
+
+    Returns:
+        Header-less DataFrame of the first nrows rows
+    """
+    return pd.read_excel(rewind_source(source), sheet_name=0, header=None, nrows=nrows)
+
+
+# Declared schema of the account details section
+ACCOUNT_NUMBER_DTYPE = np.int32
+UNIT_DTYPE = np.int32
+CURRENCY_COLUMNS = ('CY Total', 'PY Total', 'Difference')
+CATEGORY_COLUMNS = ('City',)
+
+
+def read_account_table(source, skiprows: int, columns, unit_columns,
+                       drop_invalid_accounts: bool = False) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Read the account details section, keeping only the columns an analysis needs
+
+    Args:
+        source: Path to the Excel file or a NamedWorkbook
+        skiprows: Rows above the account details header
+        columns: Column names to read (whitespace-stripped); every other column is skipped
+        unit_columns: Columns holding unit counts (int32, blanks become 0)
+        drop_invalid_accounts: Drop rows whose Acct # is not numeric (e.g. footer rows)
+
+    Returns:
+        Tuple of (DataFrame, names of the columns that were skipped)
+    """
+    wanted = set(columns)
+    skipped = []
+
+    def keep_column(name) -> bool:
+        if str(name).strip() in wanted:
+            return True
+        skipped.append(str(name).strip())
+        return False
+
+    df = pd.read_excel(rewind_source(source), sheet_name=0, skiprows=skiprows, usecols=keep_column)
+    df.columns = df.columns.str.strip()
+    df = df.dropna(how='all')
+
+    if 'Acct #' in df.columns:
+        account_numbers = pd.to_numeric(df['Acct #'], errors='coerce')
+        if drop_invalid_accounts:
+            df = df[account_numbers.notna()].copy()
+            account_numbers = account_numbers[account_numbers.notna()]
+        # Rows with a malformed account number keep their original value
+        if account_numbers.notna().all():
+            df['Acct #'] = account_numbers.astype(ACCOUNT_NUMBER_DTYPE)
+
+    for col in df.columns:
+        if col in unit_columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(UNIT_DTYPE)
+        elif col in CURRENCY_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+        elif col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype('category')
+
+    return df, list(dict.fromkeys(skipped))
+
+
+class TrackedData:
+    """Parser attribute that bumps a version counter whenever it is reassigned"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj.__dict__.get('_' + self.name)
+
+    def __set__(self, obj, value):
+        obj.__dict__['_' + self.name] = value
+        versions = obj.__dict__.setdefault('_data_versions', {})
+        versions[self.name] = versions.get(self.name, 0) + 1
+
+
+def detached(value):
+    """
+    Copy of a memoized value that callers may modify freely
+
+    DataFrames, arrays, lists, dicts and tuples of them are copied; anything
+    else (e.g. the BrandMatrix) is shared as is.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(detached(item) for item in value)
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value)
+    return value
+
+
+def memoized_section(section: str):
+    """
+    Memoize a derived section on the parser instance
+
+    The memo entry is keyed by the call arguments and is dropped automatically
+    when any of the section's dependencies (see SECTION_DEPENDENCIES) changes.
+    Each call returns its own copy (see detached), so callers that sort or
+    drop rows do not change what later calls see.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = (section,) + tuple(bound.arguments.items())[1:]
+            return self._memoized(key, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
+
 
 class SalesDashboardParser:
     """Parse Excel sales data and extract actionable insights"""
 
-    def __init__(self, excel_path: str):
+    # Loaded data each derived section is computed from. Reassigning (or, for
+    # the dicts, changing) any of these drops the memoized sections built on it.
+    SECTION_DEPENDENCIES = {
+        'declining_accounts': ('account_data',),
+        'increasing_accounts': ('account_data',),
+        'new_accounts': ('account_data',),
+        'reactivated_accounts': ('account_data',),
+        'account_lists': ('account_data',),
+        'brand_matrix': ('account_data',),
+        'brand_totals': ('account_data',),
+        'brand_performance': ('account_data',),
+        'frame_analysis': ('frame_data',),
+        'insights': ('account_data', 'summary_data', 'frame_data'),
+    }
+
+    # How each account list selects and orders its rows:
+    # (mask method, returned columns, sort column, ascending)
+    ACCOUNT_LISTS = {
+        'declining_accounts': ('_declining_mask', ['Acct #', 'Name', 'City', 'CY Total', 'PY Total', 'Difference'],
+                               'Difference', True),
+        'increasing_accounts': ('_increasing_mask', ['Acct #', 'Name', 'City', 'CY Total', 'PY Total', 'Difference'],
+                                'Difference', False),
+        'new_accounts': ('_new_mask', ['Acct #', 'Name', 'City', 'CY Total', 'Project Code'],
+                         'CY Total', False),
+        'reactivated_accounts': ('_reactivated_mask', ['Acct #', 'Name', 'City', 'CY Total', 'PY Total', 'Difference'],
+                                 'CY Total', False),
+    }
+
+    # Summary and frame blocks occupy the rows above the account details section
+    SUMMARY_ROWS = 24
+
+    # Account columns used by the dashboard (brand and frame columns are added to these)
+    ACCOUNT_COLUMNS = ['Acct #', 'Name', 'City', 'Project Code', 'CY Total', 'PY Total', 'Difference']
+
+    # Individual brand/product line columns
+    BRAND_COLUMNS = [
+        'MODERN ART', 'G.V.X.', 'MODZ TITANIUM', 'MODZFLEX', 'B.M.E.C.',
+        'GB+ COLLECTION', 'GENEVIEVE BOUTIQUE', 'FASHIONTABULOUS', 'UROCK',
+        'MODZ SUNZ', 'GENEVIEVE PARIS DESIGN', 'GIOVANI DI VENEZIA', 'MODZ',
+        'MODZ KIDS', 'MODERN TIMES', 'MODERN METALS', 'MODERN PLASTICS II',
+        'MODERN PLASTICS I', 'CASES - CLAMSHELL', 'CASES - SLIP IN',
+        'BRANDED CASES', 'CLEANING CLOTHS', 'NOSE PADS', 'PARTS',
+        'SUMMIT OPTICAL', 'TOOLS', 'SMART SHOPPER', 'CLOSE OUT',
+        'PERSONAL PPE', 'MODERN SERVICES'
+    ]
+
+    # Frame columns (columns after 'Total B Units')
+    FRAME_COLUMNS = [
+        'MODERN ART', 'G.V.X.', 'MODZ TITANIUM', 'MODZFLEX', 'B.M.E.C.',
+        'GB+ COLLECTION', 'GENEVIEVE BOUTIQUE', 'FASHIONTABULOUS', 'UROCK',
+        'MODZ SUNZ', 'GENEVIEVE PARIS DESIGN', 'GIOVANI DI VENEZIA', 'MODZ',
+        'MODZ KIDS', 'MODERN TIMES', 'MODERN METALS', 'MODERN PLASTICS II',
+        'MODERN PLASTICS I', 'CASES - CLAMSHELL', 'CASES - SLIP IN',
+        'BRANDED CASES', 'CLEANING CLOTHS', 'NOSE PADS', 'PARTS',
+        'SUMMIT OPTICAL', 'TOOLS'
+    ]
+
+    account_data = TrackedData()
+    summary_data = TrackedData()
+    frame_data = TrackedData()
+
+    def __init__(self, excel_path: str, sparse_units: bool = False):
         """
         Initialize the parser with an Excel file path
 
         Args:
-            excel_path: Path to the Excel file containing sales data
+            excel_path: Path to the Excel file containing sales data,
+                        or a NamedWorkbook holding its bytes
+            sparse_units: Keep brand units in sparse (CSR) form, for large
+                          mostly-zero roll-ups
         """
         self.excel_path = excel_path
+        self.sparse_units = sparse_units
         self.df = None
         self.summary_data = {}
         self.account_data = None
         self.frame_data = None
+        self.skipped_columns = []
+        self._memo = {}
+        # Section name -> whether its latest call was served from the memo
+        self._memo_hits = {}
 
     def load_data(self):
         """Load and parse the Excel file"""
-        # Read the raw data
-        raw_df = pd.read_excel(self.excel_path, sheet_name=0, header=None)
-
         # Extract summary data from the top section
-        self._extract_summary_data(raw_df)
+        self.load_summary()
+
+        self.account_data, self.skipped_columns = self._read_account_data()
 
-        # Find the account details section (starts at row 24)
-        account_start_row = 24
+        print(f"[OK] Loaded {len(self.account_data)} accounts")
+        if self.skipped_columns:
+            print(f"[INFO] Skipped {len(self.skipped_columns)} unused columns: {', '.join(self.skipped_columns)}")
 
-        # Read account data with proper headers
-        self.account_data = pd.read_excel(
+    def _read_account_data(self) -> Tuple[pd.DataFrame, List[str]]:
+        """Read account data with proper headers (only the columns the dashboard uses)"""
+        unit_columns = set(self.BRAND_COLUMNS) | set(self.FRAME_COLUMNS)
+        return read_account_table(
             self.excel_path,
-            sheet_name=0,
-            skiprows=account_start_row
+            skiprows=self.SUMMARY_ROWS,
+            columns=set(self.ACCOUNT_COLUMNS) | unit_columns,
+            unit_columns=unit_columns
         )
 
-        # Clean column names
-        self.account_data.columns = self.account_data.columns.str.strip()
+    def load_summary(self, summary_block: Optional[pd.DataFrame] = None):
+        """
+        Load only the summary and frame blocks at the top of the sheet
 
-        # Remove any empty rows
-        self.account_data = self.account_data.dropna(how='all')
+        Reading stops after the header block (the account details section is
+        never decoded), so totals are available in a fraction of a full parse.
+        account_data stays None until load_data is called.
 
-        print(f"[OK] Loaded {len(self.account_data)} accounts")
+        Args:
+            summary_block: Header block already read with read_summary_block
+                           (e.g. in a worker process); read from the file if None
+        """
+        if summary_block is None:
+            summary_block = read_summary_block(self.excel_path, self.SUMMARY_ROWS)
+
+        self._extract_summary_data(summary_block)
+
+    def _dependency_token(self, name: str) -> Tuple:
+        """Version of a tracked attribute plus a cheap fingerprint of its contents"""
+        value = getattr(self, name)
+        if isinstance(value, pd.DataFrame):
+            fingerprint = (value.shape, tuple(value.columns))
+        elif isinstance(value, dict):
+            fingerprint = repr(value)
+        else:
+            fingerprint = id(value)
+        return (self._data_versions.get(name, 0), fingerprint)
+
+    def _section_tokens(self, section: str) -> Tuple:
+        """Current dependency tokens of a section"""
+        return tuple(self._dependency_token(name) for name in self.SECTION_DEPENDENCIES[section])
+
+    def _memoized(self, key: Tuple, compute):
+        """
+        Return a copy of a memoized section value, recomputing it if its dependencies changed
+
+        Args:
+            key: Tuple starting with the section name, followed by call arguments
+            compute: Callable producing the section value
+        """
+        section = key[0]
+        tokens = self._section_tokens(section)
+
+        entry = self._memo.get(key)
+        if entry is not None and entry[0] == tokens:
+            self._record_memo_use(section, True)
+            return detached(entry[1])
+
+        value = compute()
+        self._memo[key] = (tokens, value)
+        self._record_memo_use(section, False)
+        return detached(value)
+
+    def _record_memo_use(self, section: str, hit: bool):
+        """Remember how a section's latest call was served (one entry per section)"""
+        self._memo_hits.pop(section, None)
+        self._memo_hits[section] = hit
+
+    def invalidate(self, *names: str):
+        """
+        Drop memoized sections after changing data in place (e.g. editing
+        account_data cells). With no names, everything is dropped.
+
+        Args:
+            names: Tracked attributes that changed ('account_data', 'summary_data', 'frame_data')
+        """
+        if not names:
+            self._memo.clear()
+            return
+
+        for name in names:
+            self._data_versions[name] = self._data_versions.get(name, 0) + 1
+
+    def get_memo_info(self) -> Dict:
+        """
+        Report whether the latest call of each section used since the last
+        get_dashboard_summary call (including that call's sections) was served
+        from the memo
+
+        Returns:
+            Dictionary with 'served_from_memo' and 'computed' section names
+        """
+        return {
+            'served_from_memo': [section for section, hit in self._memo_hits.items() if hit],
+            'computed': [section for section, hit in self._memo_hits.items() if not hit]
+        }
+
+    def apply_corrected_workbook(self, excel_path) -> AccountDiff:
+        """
+        Switch to a corrected export of the same report period
+
+        The summary block is re-read and only the accounts that changed are
+        pushed through the dashboard sections (see apply_diff). If the
+        workbooks cannot be diffed (different columns, repeated account
+        numbers), every section is rebuilt instead.
+
+        Args:
+            excel_path: Path to the corrected Excel file, or a NamedWorkbook
+
+        Returns:
+            AccountDiff between the previous and corrected account data
+            (None when the sections were rebuilt)
+        """
+        self.excel_path = excel_path
+        self.load_summary()
+        account_data, self.skipped_columns = self._read_account_data()
+
+        try:
+            diff = self.apply_diff(account_data)
+        except ValueError as e:
+            print(f"[INFO] Rebuilding dashboard sections: {e}")
+            self.account_data = account_data
+            return None
+
+        print(f"[OK] Applied correction: {len(diff.added)} added, "
+              f"{len(diff.removed)} removed, {len(diff.changed)} changed accounts")
+        return diff
+
+    def apply_diff(self, account_data: pd.DataFrame, diff: Optional[AccountDiff] = None) -> AccountDiff:
+        """
+        Replace account_data with a corrected snapshot, patching memoized sections
+
+        Account lists, their counts and totals and the brand totals are updated
+        from the added, removed and changed rows only, so a small correction
+        costs time in proportion to the rows that changed. Sections that cannot
+        be patched (the brand matrix, insights, top-N lists that lost a row) are
+        recomputed the next time they are requested. Patched totals match a full
+        recompute up to floating-point rounding; ties in an account list put
+        patched rows after unchanged ones.
+
+        Args:
+            account_data: Account data of the corrected workbook
+            diff: diff_account_data(self.account_data, account_data), if already computed
+
+        Returns:
+            The AccountDiff that was applied
+
+        Raises:
+            ValueError: If the snapshots cannot be diffed (see diff_account_data)
+        """
+        previous = self.account_data
+        if diff is None:
+            diff = diff_account_data(previous, account_data)
+
+        old_rows = previous.iloc[diff.old_rows]
+        new_rows = account_data.iloc[diff.new_rows]
+        touched = diff.touched
+
+        # Only entries that are still current can be patched
+        current = {
+            key: value for key, (tokens, value) in self._memo.items()
+            if tokens == self._section_tokens(key[0])
+        }
+
+        patched = {}
+        for key, value in current.items():
+            section = key[0]
+            if section in self.ACCOUNT_LISTS:
+                value = self._patch_account_list(section, value, dict(key[1:]), touched, new_rows, account_data)
+            elif section == 'brand_totals':
+                value = self._patch_brand_totals(value, old_rows, new_rows)
+            else:
+                continue
+            if value is not None:
+                patched[key] = value
+
+        self.account_data = account_data
+        for key, value in patched.items():
+            self._memo[key] = (self._section_tokens(key[0]), value)
+
+        # Account list totals need the patched lists stored above
+        for key, value in current.items():
+            if key[0] == 'account_lists':
+                self._memo[key] = (
+                    self._section_tokens('account_lists'),
+                    self._patch_account_lists(value, dict(key[1:])['limit'], touched, old_rows, new_rows)
+                )
+
+        return diff
+
+    def _patch_account_list(self, section: str, listed: pd.DataFrame, args: Dict, touched: np.ndarray,
+                            new_rows: pd.DataFrame, account_data: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Drop touched accounts from a memoized account list and merge in the
+        qualifying new rows, or None if the list must be recomputed
+        """
+        mask_method, columns, sort_column, ascending = self.ACCOUNT_LISTS[section]
+        limit = args.pop('limit')
+
+        stale = listed['Acct #'].isin(touched).to_numpy()
+        if limit is not None and stale.any() and len(listed) >= limit:
+            # The account just outside the top N is not known
+            return None
+
+        kept = listed[~stale]
+        candidates = new_rows.loc[getattr(self, mask_method)(accounts=new_rows, **args), columns]
+        candidates = candidates.sort_values(sort_column, ascending=ascending, kind='stable')
+
+        # Insert each candidate after the unchanged rows it ties with
+        kept_values = kept[sort_column].to_numpy()
+        candidate_values = candidates[sort_column].to_numpy()
+        if ascending:
+            positions = np.searchsorted(kept_values, candidate_values, side='right')
+        else:
+            positions = np.searchsorted(-kept_values, -candidate_values, side='right')
+        order = np.insert(np.arange(len(kept)), positions, len(kept) + np.arange(len(candidates)))
+
+        merged = pd.concat([kept, candidates]).iloc[order]
+        if limit is not None:
+            merged = merged.iloc[:limit]
+
+        # Match the dtypes a fresh selection would have (e.g. the new City categories)
+        return merged.astype({
+            col: account_data[col].dtype for col in columns if merged[col].dtype != account_data[col].dtype
+        })
+
+    def _patch_brand_totals(self, totals: Tuple, old_rows: pd.DataFrame, new_rows: pd.DataFrame) -> Tuple:
+        """Subtract the old touched rows from the brand totals and add the new ones"""
+        brands, brand_units, account_counts = totals
+
+        def units(rows):
+            # Same conversion as BrandMatrix.from_frame
+            values = rows[brands].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+            return np.trunc(values).astype(np.int64)
+
+        old_units, new_units = units(old_rows), units(new_rows)
+        return (
+            brands,
+            brand_units - old_units.sum(axis=0) + new_units.sum(axis=0),
+            account_counts - (old_units > 0).sum(axis=0) + (new_units > 0).sum(axis=0)
+        )
+
+    def _patch_account_lists(self, lists: Dict, limit: Optional[int], touched: np.ndarray,
+                             old_rows: pd.DataFrame, new_rows: pd.DataFrame) -> Dict:
+        """Update account list counts, totals and records from the touched rows"""
+        patched = dict(lists)
+        for kind, mask_method in (('decline', self._declining_mask), ('increase', self._increasing_mask)):
+            old_mask, new_mask = mask_method(accounts=old_rows), mask_method(accounts=new_rows)
+            count_key = 'declining_count' if kind == 'decline' else 'increasing_count'
+            total_key = f'total_{kind}_amount'
+
+            count = lists[count_key] - int(old_mask.sum()) + int(new_mask.sum())
+            total = (
+                lists[total_key]
+                - old_rows.loc[old_mask, 'Difference'].sum()
+                + new_rows.loc[new_mask, 'Difference'].sum()
+            )
+            patched[count_key] = count
+            # No matching accounts totals to 0, as in _get_account_lists
+            patched[total_key] = total if count > 0 else 0
+
+        # Unchanged accounts keep their records; only the others are converted
+        touched_accounts = set(touched.tolist())
+        for section, field in (('declining_accounts', 'top_declining'), ('increasing_accounts', 'top_increasing'),
+                               ('new_accounts', 'new_accounts'), ('reactivated_accounts', 'reactivated_accounts')):
+            listed = getattr(self, f'get_{section}')(limit=limit)
+            records = {
+                record['Acct #']: record for record in lists[field]
+                if record['Acct #'] not in touched_accounts
+            }
+            accounts = listed['Acct #'].tolist()
+            missing = [row for row, acct in enumerate(accounts) if acct not in records]
+            records.update(zip([accounts[row] for row in missing], listed.iloc[missing].to_dict('records')))
+            patched[field] = [records[acct] for acct in accounts]
+
+        return patched
 
     def _extract_summary_data(self, raw_df):
         """Extract summary metrics from the top of the spreadsheet"""
@@ -140,44 +627,95 @@ class SalesDashboardParser:
         except:
             return 0.0
 
-    def get_declining_accounts(self, threshold: float = 0) -> pd.DataFrame:
+    def _declining_mask(self, threshold: float = 0, accounts: Optional[pd.DataFrame] = None) -> pd.Series:
+        """Rows of account_data (or the given accounts) with declining sales"""
+        accounts = self.account_data if accounts is None else accounts
+        return (
+            (pd.notna(accounts['Difference'])) &
+            (accounts['Difference'] < threshold)
+        )
+
+    def _increasing_mask(self, threshold: float = 0, accounts: Optional[pd.DataFrame] = None) -> pd.Series:
+        """Rows of account_data (or the given accounts) with increasing sales"""
+        accounts = self.account_data if accounts is None else accounts
+        return (
+            (pd.notna(accounts['Difference'])) &
+            (accounts['Difference'] > threshold)
+        )
+
+    def _new_mask(self, accounts: Optional[pd.DataFrame] = None) -> pd.Series:
+        """Rows of account_data (or the given accounts) for new accounts"""
+        accounts = self.account_data if accounts is None else accounts
+        return (
+            (accounts['PY Total'] == 0) &
+            (accounts['CY Total'] > 0)
+        )
+
+    def _reactivated_mask(self, accounts: Optional[pd.DataFrame] = None) -> pd.Series:
+        """Rows of account_data (or the given accounts) for (approximately) reactivated accounts"""
+        accounts = self.account_data if accounts is None else accounts
+        return (
+            (accounts['PY Total'] > 0) &
+            (accounts['PY Total'] < 1000) &  # Small previous year
+            (accounts['CY Total'] > accounts['PY Total'] * 2)  # Doubled
+        )
+
+    def _select_accounts(self, mask: pd.Series, columns: List[str], sort_column: str,
+                         ascending: bool, limit: Optional[int]) -> pd.DataFrame:
+        """
+        Select and sort the rows in mask
+
+        With a limit, only the top rows are selected (partial selection) and
+        only the returned columns are copied, instead of sorting every row.
+        """
+        if limit is not None:
+            selected = self.account_data.loc[mask, columns]
+            if ascending:
+                return selected.nsmallest(limit, sort_column)
+            return selected.nlargest(limit, sort_column)
+
+        selected = self.account_data[mask].copy()
+        selected = selected.sort_values(sort_column, ascending=ascending)
+
+        return selected[columns]
+
+    def _account_list(self, section: str, limit: Optional[int], **mask_args) -> pd.DataFrame:
+        """Select one of the ACCOUNT_LISTS sections"""
+        mask_method, columns, sort_column, ascending = self.ACCOUNT_LISTS[section]
+        return self._select_accounts(
+            getattr(self, mask_method)(**mask_args), columns, sort_column,
+            ascending=ascending, limit=limit
+        )
+
+    @memoized_section('declining_accounts')
+    def get_declining_accounts(self, threshold: float = 0, limit: Optional[int] = None) -> pd.DataFrame:
         """
         Get accounts with declining sales
 
         Args:
             threshold: Minimum decline amount (negative number) to filter by
+            limit: Only return the N largest declines
 
         Returns:
             DataFrame of declining accounts sorted by decline amount
         """
-        declining = self.account_data[
-            (pd.notna(self.account_data['Difference'])) &
-            (self.account_data['Difference'] < threshold)
-        ].copy()
-
-        declining = declining.sort_values('Difference', ascending=True)
-
-        return declining[['Acct #', 'Name', 'City', 'CY Total', 'PY Total', 'Difference']]
+        return self._account_list('declining_accounts', limit, threshold=threshold)
 
-    def get_increasing_accounts(self, threshold: float = 0) -> pd.DataFrame:
+    @memoized_section('increasing_accounts')
+    def get_increasing_accounts(self, threshold: float = 0, limit: Optional[int] = None) -> pd.DataFrame:
         """
         Get accounts with increasing sales
 
         Args:
             threshold: Minimum increase amount to filter by
+            limit: Only return the N largest increases
 
         Returns:
             DataFrame of increasing accounts sorted by increase amount
         """
-        increasing = self.account_data[
-            (pd.notna(self.account_data['Difference'])) &
-            (self.account_data['Difference'] > threshold)
-        ].copy()
-
-        increasing = increasing.sort_values('Difference', ascending=False)
-
-        return increasing[['Acct #', 'Name', 'City', 'CY Total', 'PY Total', 'Difference']]
+        return self._account_list('increasing_accounts', limit, threshold=threshold)
 
+    @memoized_section('frame_analysis')
     def get_frame_analysis(self) -> Dict:
         """
         Analyze frame buying patterns YOY
@@ -230,19 +768,8 @@ class SalesDashboardParser:
         Returns:
             DataFrame with account and their frame purchases
         """
-        # Get frame columns (columns after 'Total B Units')
-        frame_columns = [
-            'MODERN ART', 'G.V.X.', 'MODZ TITANIUM', 'MODZFLEX', 'B.M.E.C.',
-            'GB+ COLLECTION', 'GENEVIEVE BOUTIQUE', 'FASHIONTABULOUS', 'UROCK',
-            'MODZ SUNZ', 'GENEVIEVE PARIS DESIGN', 'GIOVANI DI VENEZIA', 'MODZ',
-            'MODZ KIDS', 'MODERN TIMES', 'MODERN METALS', 'MODERN PLASTICS II',
-            'MODERN PLASTICS I', 'CASES - CLAMSHELL', 'CASES - SLIP IN',
-            'BRANDED CASES', 'CLEANING CLOTHS', 'NOSE PADS', 'PARTS',
-            'SUMMIT OPTICAL', 'TOOLS'
-        ]
-
         # Filter columns that exist in the dataframe
-        available_frame_cols = [col for col in frame_columns if col in self.account_data.columns]
+        available_frame_cols = [col for col in self.FRAME_COLUMNS if col in self.account_data.columns]
 
         base_cols = ['Acct #', 'Name', 'City', 'CY Total', 'PY Total', 'Difference']
         select_cols = base_cols + available_frame_cols
@@ -264,71 +791,115 @@ class SalesDashboardParser:
         # This would require historical frame data per account
         # For now, we'll return accounts with their current frame mix
         declining_accounts = self.get_declining_accounts()
+        declining_accounts = declining_accounts[pd.notna(declining_accounts['Acct #'])]
+
+        if declining_accounts.empty:
+            return []
+
+        matrix = self.get_brand_matrix()
+        frame_columns = [col for col in self.FRAME_COLUMNS if col in matrix.brands]
+
+        # One lookup for all declining accounts: each account's first row
+        # (the row get_account_frame_details would return)
+        first_rows = pd.Series(np.arange(len(self.account_data)), index=self.account_data['Acct #'])
+        first_rows = first_rows[~first_rows.index.duplicated()]
+        frame_rows = first_rows.reindex(declining_accounts['Acct #']).to_numpy()
+
+        # Frame purchases straight from the non-zero units, ordered by row then frame column
+        frame_position = np.full(len(matrix.brands), -1)
+        frame_position[matrix.brand_index(frame_columns)] = np.arange(len(frame_columns))
+        rows, cols, units = matrix.nonzero()
+        is_frame = frame_position[cols] >= 0
+        rows, cols, units = rows[is_frame], frame_position[cols[is_frame]], units[is_frame]
+        order = np.lexsort((cols, rows))
+        rows, cols, units = rows[order], cols[order], units[order]
+        row_starts = np.searchsorted(rows, np.arange(len(matrix.accounts) + 1))
+
+        frame_purchases = []
+        for row in frame_rows:
+            if pd.isna(row):
+                frame_purchases.append({})
+                continue
+            start, end = row_starts[int(row)], row_starts[int(row) + 1]
+            frame_purchases.append({
+                frame_columns[col]: int(units_bought)
+                for col, units_bought in zip(cols[start:end], units[start:end])
+            })
+
+        return [
+            {
+                'account_number': acct_num,
+                'account_name': name,
+                'city': city,
+                'total_decline': difference,
+                'current_year_total': cy_total,
+                'previous_year_total': py_total,
+                'frame_purchases': purchases
+            }
+            for acct_num, name, city, difference, cy_total, py_total, purchases in zip(
+                declining_accounts['Acct #'].tolist(),
+                declining_accounts['Name'].tolist(),
+                declining_accounts['City'].tolist(),
+                declining_accounts['Difference'].tolist(),
+                declining_accounts['CY Total'].tolist(),
+                declining_accounts['PY Total'].tolist(),
+                frame_purchases
+            )
+        ]
 
-        results = []
-        for _, account in declining_accounts.iterrows():
-            acct_num = account['Acct #']
-            acct_details = self.get_account_frame_details(acct_num)
-
-            if not acct_details.empty:
-                # Get non-zero frame purchases
-                frame_cols = acct_details.columns[6:]  # Columns after basic info
-                frame_purchases = {}
-
-                for col in frame_cols:
-                    val = acct_details.iloc[0][col]
-                    if pd.notna(val) and val != 0:
-                        frame_purchases[col] = val
-
-                results.append({
-                    'account_number': acct_num,
-                    'account_name': account['Name'],
-                    'city': account['City'],
-                    'total_decline': account['Difference'],
-                    'current_year_total': account['CY Total'],
-                    'previous_year_total': account['PY Total'],
-                    'frame_purchases': frame_purchases
-                })
-
-        return results
-
-    def get_new_accounts(self) -> pd.DataFrame:
+    @memoized_section('new_accounts')
+    def get_new_accounts(self, limit: Optional[int] = None) -> pd.DataFrame:
         """
         Get list of new accounts (PY Total = 0 and CY Total > 0)
 
+        Args:
+            limit: Only return the N new accounts with the highest CY Total
+
         Returns:
             DataFrame of new accounts
         """
-        new_accounts = self.account_data[
-            (self.account_data['PY Total'] == 0) &
-            (self.account_data['CY Total'] > 0)
-        ].copy()
-
-        new_accounts = new_accounts.sort_values('CY Total', ascending=False)
+        return self._account_list('new_accounts', limit)
 
-        return new_accounts[['Acct #', 'Name', 'City', 'CY Total', 'Project Code']]
-
-    def get_reactivated_accounts(self) -> pd.DataFrame:
+    @memoized_section('reactivated_accounts')
+    def get_reactivated_accounts(self, limit: Optional[int] = None) -> pd.DataFrame:
         """
         Get list of reactivated accounts (had sales before, gap, then sales again)
         These are accounts with previous sales but this would need historical data.
         For now, we identify them as accounts with positive difference and relatively small PY values.
 
+        Args:
+            limit: Only return the N reactivated accounts with the highest CY Total
+
         Returns:
             DataFrame of potentially reactivated accounts
         """
         # This is an approximation - true reactivated accounts need multi-year history
         # We'll identify accounts with small PY total but significant CY growth
-        reactivated = self.account_data[
-            (self.account_data['PY Total'] > 0) &
-            (self.account_data['PY Total'] < 1000) &  # Small previous year
-            (self.account_data['CY Total'] > self.account_data['PY Total'] * 2)  # Doubled
-        ].copy()
+        return self._account_list('reactivated_accounts', limit)
+
+    @memoized_section('brand_matrix')
+    def get_brand_matrix(self) -> BrandMatrix:
+        """
+        Brand units of every account row as a compact int32 matrix
+
+        Returns:
+            BrandMatrix over the brand columns present in the account data
+        """
+        brands = [brand for brand in self.BRAND_COLUMNS if brand in self.account_data.columns]
+        return BrandMatrix.from_frame(self.account_data, brands, {}, sparse=self.sparse_units)
 
-        reactivated = reactivated.sort_values('CY Total', ascending=False)
+    @memoized_section('brand_totals')
+    def _get_brand_totals(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Brands, total units and number of buying accounts per brand (int64)"""
+        matrix = self.get_brand_matrix()
 
-        return reactivated[['Acct #', 'Name', 'City', 'CY Total', 'PY Total', 'Difference']]
+        # One reduction per metric over the accounts x brands matrix
+        brand_units = matrix.brand_totals()
+        # Count how many accounts bought each brand
+        account_counts, _ = matrix.positive_totals()
+        return matrix.brands, brand_units, account_counts.astype(np.int64)
 
+    @memoized_section('brand_performance')
     def get_brand_performance(self) -> Dict:
         """
         Analyze sales performance by individual brand/product line
@@ -336,31 +907,21 @@ class SalesDashboardParser:
         Returns:
             Dictionary with brand sales totals and rankings
         """
-        brand_columns = [
-            'MODERN ART', 'G.V.X.', 'MODZ TITANIUM', 'MODZFLEX', 'B.M.E.C.',
-            'GB+ COLLECTION', 'GENEVIEVE BOUTIQUE', 'FASHIONTABULOUS', 'UROCK',
-            'MODZ SUNZ', 'GENEVIEVE PARIS DESIGN', 'GIOVANI DI VENEZIA', 'MODZ',
-            'MODZ KIDS', 'MODERN TIMES', 'MODERN METALS', 'MODERN PLASTICS II',
-            'MODERN PLASTICS I', 'CASES - CLAMSHELL', 'CASES - SLIP IN',
-            'BRANDED CASES', 'CLEANING CLOTHS', 'NOSE PADS', 'PARTS',
-            'SUMMIT OPTICAL', 'TOOLS', 'SMART SHOPPER', 'CLOSE OUT',
-            'PERSONAL PPE', 'MODERN SERVICES'
-        ]
+        brands, brand_units, account_counts = self._get_brand_totals()
 
         brand_totals = []
-        for brand in brand_columns:
-            if brand in self.account_data.columns:
-                total_units = self.account_data[brand].sum(skipna=True)
-                if total_units > 0:
-                    # Count how many accounts bought this brand
-                    account_count = (self.account_data[brand] > 0).sum()
-
-                    brand_totals.append({
-                        'brand': brand,
-                        'total_units': int(total_units) if pd.notna(total_units) else 0,
-                        'account_count': int(account_count),
-                        'avg_units_per_account': round(total_units / account_count, 2) if account_count > 0 else 0
-                    })
+        for col, brand in enumerate(brands):
+            total_units = int(brand_units[col])
+            if total_units > 0:
+                account_count = int(account_counts[col])
+
+                brand_totals.append({
+                    'brand': brand,
+                    'total_units': total_units,
+                    'account_count': account_count,
+                    # NumPy rounding, as the per-column float sums were rounded
+                    'avg_units_per_account': float(np.round(total_units / account_count, 2)) if account_count > 0 else 0
+                })
 
         # Sort by total units
         brand_totals.sort(key=lambda x: x['total_units'], reverse=True)
@@ -371,31 +932,28 @@ class SalesDashboardParser:
             'total_brands_sold': len(brand_totals)
         }
 
-    def get_dashboard_summary(self) -> Dict:
+    def get_dashboard_summary(self, limit: Optional[int] = None) -> Dict:
         """
         Generate comprehensive dashboard summary with key insights
 
+        Args:
+            limit: Only include the top N accounts in each account list.
+                   Counts and totals still cover every account.
+
         Returns:
             Dictionary containing all key metrics and insights
         """
-        declining_accounts = self.get_declining_accounts()
-        increasing_accounts = self.get_increasing_accounts()
+        # Start a fresh record of which sections come from the memo
+        self._memo_hits = {}
+
+        declining_accounts = self.get_declining_accounts(limit=limit)
+        increasing_accounts = self.get_increasing_accounts(limit=limit)
         frame_analysis = self.get_frame_analysis()
-        new_accounts = self.get_new_accounts()
-        reactivated_accounts = self.get_reactivated_accounts()
         brand_performance = self.get_brand_performance()
+        account_lists = self._get_account_lists(limit=limit)
 
-        # Calculate additional metrics
-        total_decline_amount = declining_accounts['Difference'].sum() if not declining_accounts.empty else 0
-        total_increase_amount = increasing_accounts['Difference'].sum() if not increasing_accounts.empty else 0
-
-        # All declining and increasing accounts (not limited to 10)
-        top_declining = declining_accounts.to_dict('records') if not declining_accounts.empty else []
-        top_increasing = increasing_accounts.to_dict('records') if not increasing_accounts.empty else []
-
-        # New and reactivated account details
-        new_accounts_list = new_accounts.to_dict('records') if not new_accounts.empty else []
-        reactivated_accounts_list = reactivated_accounts.to_dict('records') if not reactivated_accounts.empty else []
+        total_decline_amount = account_lists['total_decline_amount']
+        total_increase_amount = account_lists['total_increase_amount']
 
         # Account retention metrics
         retention_rate = ((self.summary_data.get('total_accounts', 0) -
@@ -412,23 +970,54 @@ class SalesDashboardParser:
                 'retention_rate': retention_rate
             },
             'accounts': {
-                'declining_count': len(declining_accounts),
-                'increasing_count': len(increasing_accounts),
-                'top_declining': top_declining,
-                'top_increasing': top_increasing,
-                'new_accounts': new_accounts_list,
-                'reactivated_accounts': reactivated_accounts_list
+                'declining_count': account_lists['declining_count'],
+                'increasing_count': account_lists['increasing_count'],
+                'top_declining': account_lists['top_declining'],
+                'top_increasing': account_lists['top_increasing'],
+                'new_accounts': account_lists['new_accounts'],
+                'reactivated_accounts': account_lists['reactivated_accounts']
             },
             'frames': frame_analysis,
             'brands': brand_performance,
-            'insights': self._generate_insights(
+            'insights': self._memoized(('insights',), lambda: self._generate_insights(
                 declining_accounts,
                 increasing_accounts,
-                frame_analysis
-            )
+                frame_analysis,
+                declining_count=account_lists['declining_count']
+            ))
+        }
+
+    @memoized_section('account_lists')
+    def _get_account_lists(self, limit: Optional[int] = None) -> Dict:
+        """Account totals and record lists (top N if limited) for the dashboard summary"""
+        declining_accounts = self.get_declining_accounts(limit=limit)
+        increasing_accounts = self.get_increasing_accounts(limit=limit)
+        new_accounts = self.get_new_accounts(limit=limit)
+        reactivated_accounts = self.get_reactivated_accounts(limit=limit)
+
+        # Counts and totals come from the masks so they cover every account
+        declining_mask = self._declining_mask()
+        increasing_mask = self._increasing_mask()
+
+        # Calculate additional metrics
+        total_decline_amount = self.account_data.loc[declining_mask, 'Difference'].sum() if declining_mask.any() else 0
+        total_increase_amount = self.account_data.loc[increasing_mask, 'Difference'].sum() if increasing_mask.any() else 0
+
+        return {
+            'total_decline_amount': total_decline_amount,
+            'total_increase_amount': total_increase_amount,
+            'declining_count': int(declining_mask.sum()),
+            'increasing_count': int(increasing_mask.sum()),
+            # All declining and increasing accounts (not limited to 10)
+            'top_declining': declining_accounts.to_dict('records') if not declining_accounts.empty else [],
+            'top_increasing': increasing_accounts.to_dict('records') if not increasing_accounts.empty else [],
+            # New and reactivated account details
+            'new_accounts': new_accounts.to_dict('records') if not new_accounts.empty else [],
+            'reactivated_accounts': reactivated_accounts.to_dict('records') if not reactivated_accounts.empty else []
         }
 
-    def _generate_insights(self, declining_accounts, increasing_accounts, frame_analysis) -> List[str]:
+    def _generate_insights(self, declining_accounts, increasing_accounts, frame_analysis,
+                           declining_count: Optional[int] = None) -> List[str]:
         """Generate actionable insights for the sales rep"""
         insights = []
 
@@ -464,7 +1053,8 @@ class SalesDashboardParser:
 
         # Summary insights
         total_accounts = self.summary_data.get('total_accounts', 0)
-        declining_count = len(declining_accounts)
+        if declining_count is None:
+            declining_count = len(declining_accounts)
         declining_pct = (declining_count / total_accounts * 100) if total_accounts > 0 else 0
 
         insights.append(
@@ -559,8 +1149,9 @@ def main():
     # Print comprehensive report
     parser.print_summary_report()
 
-    # Export to JSON
+    # Export to JSON (reuses the sections computed for the report)
     parser.export_to_json('sales_dashboard_data.json')
+    print(f"[OK] Sections reused from memo: {', '.join(parser.get_memo_info()['served_from_memo'])}")
 
     # Additional detailed exports
     print("Exporting detailed reports...")
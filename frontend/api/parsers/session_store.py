@@ -0,0 +1,151 @@
+"""
+Parsed Session Store
+Keeps a compact copy of a parsed comparison on local disk so follow-up
+requests (e.g. account breakdowns) are answered without re-uploading files
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_STORE_DIR = os.environ.get(
+    'SESSION_STORE_DIR',
+    os.path.join(tempfile.gettempdir(), 'sales_dashboard_sessions')
+)
+DEFAULT_TTL_SECONDS = int(os.environ.get('SESSION_TTL_SECONDS', 6 * 60 * 60))
+DEFAULT_MAX_SESSIONS = int(os.environ.get('SESSION_MAX_SESSIONS', 50))
+
+SESSION_ID_PATTERN = re.compile(r'^[0-9a-f]{16,64}$')
+
+
+class SessionStore:
+    """File-backed store of parsed sessions with TTL expiry and LRU eviction"""
+
+    def __init__(self, store_dir: str = None, ttl_seconds: int = None, max_sessions: int = None):
+        """
+        Initialize the store
+
+        Args:
+            store_dir: Directory holding one .npz file per session
+            ttl_seconds: Seconds a session stays valid after it was saved
+            max_sessions: Maximum sessions kept; least recently used are evicted first
+        """
+        self.store_dir = store_dir or DEFAULT_STORE_DIR
+        self.ttl_seconds = DEFAULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_sessions = DEFAULT_MAX_SESSIONS if max_sessions is None else max_sessions
+
+    def _session_path(self, session_id: str) -> str:
+        """Path of a session file (rejects ids that are not plain hex)"""
+        if not session_id or not SESSION_ID_PATTERN.match(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return os.path.join(self.store_dir, f'{session_id}.npz')
+
+    def save(self, session_id: str, arrays: Dict[str, np.ndarray], metadata: Dict) -> str:
+        """
+        Persist a session
+
+        Args:
+            session_id: Hex session id
+            arrays: Named numpy arrays (numeric or unicode, no objects)
+            metadata: JSON-serializable metadata
+
+        Returns:
+            The session id
+        """
+        path = self._session_path(session_id)
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        payload = dict(arrays)
+        payload['__metadata__'] = np.array(json.dumps(metadata, default=str))
+
+        # Write to a temp file first so readers never see a partial session
+        fd, temp_path = tempfile.mkstemp(dir=self.store_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **payload)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self._evict()
+        return session_id
+
+    def load(self, session_id: str) -> Optional[Tuple[Dict[str, np.ndarray], Dict]]:
+        """
+        Load a session
+
+        Args:
+            session_id: Hex session id
+
+        Returns:
+            Tuple of (arrays, metadata) or None if missing or expired
+        """
+        path = self._session_path(session_id)
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        now = time.time()
+        if now - stat.st_mtime > self.ttl_seconds:
+            self.delete(session_id)
+            return None
+
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files if key != '__metadata__'}
+            metadata = json.loads(str(data['__metadata__']))
+
+        # Record the access time for LRU eviction (mtime keeps the save time for TTL)
+        try:
+            os.utime(path, (now, stat.st_mtime))
+        except OSError:
+            pass
+
+        return arrays, metadata
+
+    def delete(self, session_id: str):
+        """Remove a session if it exists"""
+        path = self._session_path(session_id)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Drop expired sessions, then the least recently used ones beyond max_sessions"""
+        now = time.time()
+        sessions = []
+
+        for entry in os.scandir(self.store_dir):
+            if not entry.name.endswith('.npz'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+
+            if now - stat.st_mtime > self.ttl_seconds:
+                self._remove_quietly(entry.path)
+            else:
+                sessions.append((stat.st_atime, entry.path))
+
+        sessions.sort()
+        for _, path in sessions[:max(0, len(sessions) - self.max_sessions)]:
+            self._remove_quietly(path)
+
+    @staticmethod
+    def _remove_quietly(path: str):
+        """Remove a file that another request may already have removed"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
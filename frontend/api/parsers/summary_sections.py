@@ -0,0 +1,26 @@
+"""
+Comparison Summary Sections
+Names of the sections SalesComparisonParser can compute, kept apart from the
+parser so requests can be validated without importing pandas
+"""
+
+# Inputs shared by several sections, each mapped to the inputs it is built from.
+# They are computed as steps of their own before the sections that need them,
+# so concurrent sections never build them on their own
+SUMMARY_INPUTS = {
+    'merged_rows': (),
+    'aggregator': ('merged_rows',),
+    'color_group_matrix': (),
+    'current_year_parser': (),
+}
+
+# Sections of the comparison summary, each mapped to the sections and inputs it needs
+SUMMARY_SECTIONS = {
+    'dashboard': ('current_year_parser',),
+    'brand_changes': ('aggregator',),
+    'color_group_drill_downs': ('aggregator', 'color_group_matrix'),
+    'accounts_per_brand': ('aggregator',),
+    # Reads only the summary block, so it does not wait for the full current year parse
+    'sales_per_working_day': (),
+    'city_insights': ('aggregator',),
+}
@@ -0,0 +1,175 @@
+"""
+Upload Archives
+Reads YOY workbooks straight out of a zip, tar.gz or gzip upload (no
+extraction to disk) and orders them by the date range in their filenames
+"""
+
+import gzip
+import io
+import os
+import tarfile
+import zipfile
+from typing import Dict, List
+
+from .date_ranges import MAX_PERIOD_GAP_DAYS, extract_date_range, periods_follow, rep_key
+
+
+# Guard against archives that expand far beyond what a rep export can be
+MAX_UNCOMPRESSED_BYTES = 200 * 1024 * 1024
+
+WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm')
+
+ZIP_MAGIC = b'PK\x03\x04'
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _is_workbook_member(name: str) -> bool:
+    """True for workbook members (skips folders and macOS metadata files)"""
+    basename = os.path.basename(name)
+    return (
+        name.lower().endswith(WORKBOOK_EXTENSIONS)
+        and not name.startswith('__MACOSX/')
+        and not basename.startswith(('.', '~$'))
+    )
+
+
+def _is_workbook_zip(zip_file: zipfile.ZipFile) -> bool:
+    """An .xlsx file is itself a zip; tell it apart from an archive of workbooks"""
+    return '[Content_Types].xml' in zip_file.namelist()
+
+
+def _check_size(total: int):
+    if total > MAX_UNCOMPRESSED_BYTES:
+        raise ValueError(
+            f"Archive expands to more than {MAX_UNCOMPRESSED_BYTES // (1024 * 1024)} MB"
+        )
+
+
+def _read_zip(content: bytes) -> List[Dict]:
+    """Read workbook members from a zip archive"""
+    members = []
+    with zipfile.ZipFile(io.BytesIO(content)) as zip_file:
+        infos = [info for info in zip_file.infolist()
+                 if not info.is_dir() and _is_workbook_member(info.filename)]
+        _check_size(sum(info.file_size for info in infos))
+        for info in infos:
+            members.append({
+                'filename': os.path.basename(info.filename),
+                'content': zip_file.read(info)
+            })
+    return members
+
+
+def _read_tar(content: bytes) -> List[Dict]:
+    """Read workbook members from a (possibly compressed) tar archive"""
+    members = []
+    with tarfile.open(fileobj=io.BytesIO(content), mode='r:*') as tar_file:
+        infos = [info for info in tar_file.getmembers()
+                 if info.isfile() and _is_workbook_member(info.name)]
+        _check_size(sum(info.size for info in infos))
+        for info in infos:
+            members.append({
+                'filename': os.path.basename(info.name),
+                'content': tar_file.extractfile(info).read()
+            })
+    return members
+
+
+def read_archive_workbooks(content: bytes, filename: str = '') -> List[Dict]:
+    """
+    Read every workbook contained in an uploaded archive
+
+    Supports .zip, .tar.gz/.tgz and a single gzip-compressed workbook
+    (e.g. 'PAM 11-20-24 to 11-19-25.xlsx.gz').
+
+    Args:
+        content: Raw bytes of the uploaded archive
+        filename: Uploaded filename (used to name a gzip-compressed workbook)
+
+    Returns:
+        List of {'filename', 'content'} dictionaries
+
+    Raises:
+        ValueError: If the archive cannot be read or holds no workbooks
+    """
+    try:
+        if content.startswith(GZIP_MAGIC):
+            with gzip.GzipFile(fileobj=io.BytesIO(content)) as gz_file:
+                inner = gz_file.read(MAX_UNCOMPRESSED_BYTES + 1)
+            _check_size(len(inner))
+
+            if inner.startswith(ZIP_MAGIC):
+                with zipfile.ZipFile(io.BytesIO(inner)) as zip_file:
+                    is_workbook = _is_workbook_zip(zip_file)
+                if is_workbook:
+                    # A single gzip-compressed workbook
+                    name = filename[:-3] if filename.lower().endswith('.gz') else filename
+                    members = [{'filename': os.path.basename(name), 'content': inner}]
+                else:
+                    members = _read_zip(inner)
+            else:
+                members = _read_tar(content)
+        elif content.startswith(ZIP_MAGIC):
+            members = _read_zip(content)
+        else:
+            members = _read_tar(content)
+    except (zipfile.BadZipFile, tarfile.TarError, OSError, EOFError) as e:
+        raise ValueError(f"Could not read archive '{filename}': {e}")
+
+    if not members:
+        raise ValueError('Archive does not contain any .xlsx workbooks')
+
+    return members
+
+
+def order_workbooks_by_period(workbooks: List[Dict]) -> List[Dict]:
+    """
+    Order one rep's workbooks oldest to newest using the date range in their filenames
+
+    Args:
+        workbooks: List of {'filename', 'content'} dictionaries
+
+    Returns:
+        The same dictionaries with 'start_date'/'end_date' added, oldest first
+
+    Raises:
+        ValueError: If a filename has no date range, the workbooks belong to
+                    more than one rep (the filename text before the date range),
+                    or a period does not follow the one before it (they overlap,
+                    or leave a gap of more than MAX_PERIOD_GAP_DAYS)
+    """
+    undated = []
+    for workbook in workbooks:
+        dates = extract_date_range(workbook['filename'])
+        if dates is None:
+            undated.append(workbook['filename'])
+        else:
+            workbook['start_date'], workbook['end_date'] = dates
+
+    if undated:
+        raise ValueError(
+            "Could not infer the report period from: " + ', '.join(undated) +
+            " (expected e.g. 'PAM 11-20-24 to 11-19-25.xlsx')"
+        )
+
+    reps = sorted({rep_key(workbook['filename']) for workbook in workbooks})
+    if len(reps) > 1:
+        raise ValueError(
+            "Workbooks of more than one rep were uploaded (" + ', '.join(repr(rep) for rep in reps) +
+            "); upload one rep's workbooks at a time"
+        )
+
+    ordered = sorted(workbooks, key=lambda w: (w['end_date'], w['start_date']))
+
+    for older, newer in zip(ordered, ordered[1:]):
+        if (older['start_date'], older['end_date']) == (newer['start_date'], newer['end_date']):
+            raise ValueError(
+                f"'{older['filename']}' and '{newer['filename']}' cover the same period"
+            )
+        if not periods_follow((older['start_date'], older['end_date']), (newer['start_date'], newer['end_date'])):
+            raise ValueError(
+                f"'{newer['filename']}' does not follow '{older['filename']}' (periods must not overlap "
+                f"and the next must start within {MAX_PERIOD_GAP_DAYS} days of the previous end)"
+            )
+
+    return ordered
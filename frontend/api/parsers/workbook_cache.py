@@ -0,0 +1,68 @@
+"""
+Parsed Workbook Cache
+Keeps the parsed account data of each uploaded workbook (and the aggregates
+derived from it alone) keyed by a hash of the file contents, so a comparison
+whose previous year file did not change only parses the new file
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from .session_store import SessionStore
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'WORKBOOK_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), 'sales_dashboard_workbooks')
+)
+DEFAULT_CACHE_TTL_SECONDS = int(os.environ.get('WORKBOOK_CACHE_TTL_SECONDS', 35 * 24 * 60 * 60))
+DEFAULT_CACHE_MAX_WORKBOOKS = int(os.environ.get('WORKBOOK_CACHE_MAX_WORKBOOKS', 20))
+
+# Bump when the layout of cached entries changes, so older entries are ignored
+CACHE_VERSION = 1
+
+
+def workbook_bytes(source) -> bytes:
+    """Contents of a workbook path or in-memory workbook"""
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+class WorkbookCache(SessionStore):
+    """File-backed cache of parsed workbooks, one entry per content hash"""
+
+    def __init__(self, store_dir: str = None, ttl_seconds: int = None, max_workbooks: int = None):
+        """
+        Initialize the cache
+
+        Args:
+            store_dir: Directory holding one .npz file per workbook
+            ttl_seconds: Seconds an entry stays valid after it was saved
+            max_workbooks: Maximum entries kept; least recently used are evicted first
+        """
+        super().__init__(
+            store_dir=store_dir or DEFAULT_CACHE_DIR,
+            ttl_seconds=DEFAULT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds,
+            max_sessions=DEFAULT_CACHE_MAX_WORKBOOKS if max_workbooks is None else max_workbooks
+        )
+
+    def key_for(self, source, schema) -> str:
+        """
+        Cache key of a workbook
+
+        Args:
+            source: Workbook path or in-memory workbook
+            schema: JSON-serializable description of how the workbook is parsed
+                    (e.g. the columns read), so a parser change misses the cache
+
+        Returns:
+            Hex key derived from the file contents, the schema and CACHE_VERSION
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([CACHE_VERSION, schema], sort_keys=True).encode())
+        digest.update(hashlib.sha256(workbook_bytes(source)).digest())
+        return digest.hexdigest()
@@ -0,0 +1,88 @@
+from http.server import BaseHTTPRequestHandler
+import json
+import os
+import sys
+
+# Add the api directory to path to import parsers
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Largest request body read into memory (an exact snapshot of one rep is tens of KB)
+MAX_BODY_BYTES = int(os.environ.get('ROLLUP_MAX_BODY_BYTES', 32 * 1024 * 1024))
+
+def load_snapshot_module():
+    """Import the snapshot module (pandas/numpy) on first use"""
+    try:
+        from parsers.aggregate_snapshot import AggregateSnapshot, merge_snapshots
+    except ImportError:
+        return None, None
+    return AggregateSnapshot, merge_snapshots
+
+class handler(BaseHTTPRequestHandler):
+    def send_json(self, status, payload):
+        """Send a JSON response with CORS headers"""
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
+
+    def do_POST(self):
+        """
+        Roll up snapshots of many reps into one territory or region dashboard
+
+        Body: {"snapshots": [...]} with the ``snapshot`` objects returned by
+        parse-sales-data?snapshot=true (or by an earlier roll-up, so territory
+        roll-ups can be merged again into a region)
+        """
+        content_length = self.headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_BYTES:
+            self.send_json(413, {
+                'error': f'Request body is larger than {MAX_BODY_BYTES} bytes',
+                'message': 'Invalid roll-up request'
+            })
+            return
+
+        try:
+            if not content_length or not content_length.isdigit():
+                raise ValueError('Content-Length header is required')
+            body = json.loads(self.rfile.read(int(content_length)) or b'{}')
+            snapshots = body.get('snapshots') if isinstance(body, dict) else None
+            if not snapshots or not isinstance(snapshots, list):
+                raise ValueError('Expected a JSON body with a non-empty "snapshots" list')
+        except ValueError as e:
+            self.send_json(400, {
+                'error': str(e),
+                'message': 'Invalid roll-up request'
+            })
+            return
+
+        AggregateSnapshot, merge_snapshots = load_snapshot_module()
+        if AggregateSnapshot is None:
+            self.send_json(500, {
+                'error': 'Snapshot module not available',
+                'message': 'Parser module could not be imported'
+            })
+            return
+
+        try:
+            merged = merge_snapshots([AggregateSnapshot.from_dict(snapshot) for snapshot in snapshots])
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_json(400, {
+                'error': str(e),
+                'message': 'Snapshots could not be merged'
+            })
+            return
+
+        self.send_json(200, {
+            'success': True,
+            'data': merged.get_dashboard(),
+            'snapshot': merged.to_dict()
+        })
+
+    def do_OPTIONS(self):
+        """Handle CORS preflight requests"""
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
@@ -0,0 +1,143 @@
+"""
+Cold-Start Benchmark for the Python Serverless Functions
+Measures how long each module in frontend/api takes to import in a fresh
+interpreter, which is what a cold serverless invocation pays before it can
+handle its first request.
+
+Usage:
+    python scripts/benchmark_cold_start.py
+    python scripts/benchmark_cold_start.py --runs 5 --json cold_start.json
+
+Each module is imported in its own subprocess with `python -X importtime`,
+so nothing is shared between measurements. Reported times are the median
+over all runs.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+API_DIR = Path(__file__).parent.parent / 'frontend' / 'api'
+
+# (label, import statement run inside frontend/api)
+MODULES = [
+    ('numpy', 'import numpy'),
+    ('pandas', 'import pandas'),
+    ('openpyxl', 'import openpyxl'),
+    ('parsers.session_store', 'import parsers.session_store'),
+    ('parsers.sales_parser', 'import parsers.sales_parser'),
+    ('parsers.sales_comparison_parser', 'import parsers.sales_comparison_parser'),
+]
+
+# Handler files are not importable by name (dashes), so load them by path
+HANDLERS = ['parse-sales-data.py', 'get-account-breakdown.py', 'rollup-snapshots.py']
+
+HANDLER_TEMPLATE = (
+    "import importlib.util;"
+    "spec = importlib.util.spec_from_file_location('handler_module', {path!r});"
+    "module = importlib.util.module_from_spec(spec);"
+    "spec.loader.exec_module(module)"
+)
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(statement: str) -> Dict:
+    """
+    Import something in a fresh interpreter and collect -X importtime output
+
+    Args:
+        statement: Python statement to run
+
+    Returns:
+        Dictionary with total import time (ms) and which heavy modules were loaded
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=str(API_DIR),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total_us = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, module = int(match.group(2)), match.group(3), match.group(4)
+        # Top-level imports have a single space of indentation
+        if len(indent) == 1:
+            total_us += cumulative_us
+        root = module.split('.')[0]
+        if root in HEAVY_MODULES:
+            loaded.add(root)
+
+    return {'import_ms': total_us / 1000, 'heavy_modules': sorted(loaded)}
+
+
+def run_benchmark(runs: int) -> List[Dict]:
+    """Measure every module and handler `runs` times"""
+    targets = list(MODULES) + [
+        (name, HANDLER_TEMPLATE.format(path=str(API_DIR / name))) for name in HANDLERS
+    ]
+
+    results = []
+    for label, statement in targets:
+        try:
+            samples = [measure(statement) for _ in range(runs)]
+        except RuntimeError as e:
+            results.append({'module': label, 'error': str(e)})
+            continue
+
+        results.append({
+            'module': label,
+            'import_ms': round(statistics.median(s['import_ms'] for s in samples), 1),
+            'heavy_modules': samples[-1]['heavy_modules']
+        })
+
+    return results
+
+
+def print_report(results: List[Dict]):
+    """Print a formatted table of import times"""
+    print("\n" + "=" * 80)
+    print("COLD-START IMPORT TIMES".center(80))
+    print("=" * 80)
+    print(f"   {'Module':<36} {'Import (ms)':>12}   Heavy modules loaded")
+    for row in results:
+        if 'error' in row:
+            print(f"   {row['module']:<36} {'ERROR':>12}   {row['error']}")
+            continue
+        heavy = ', '.join(row['heavy_modules']) or '-'
+        print(f"   {row['module']:<36} {row['import_ms']:>12.1f}   {heavy}")
+    print("=" * 80 + "\n")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Measure cold-start import time of the API functions')
+    arg_parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters per module (default: 3)')
+    arg_parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+    args = arg_parser.parse_args()
+
+    results = run_benchmark(max(1, args.runs))
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+        print(f"[OK] Results written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+Shared fixtures: the frontend/api parsers on the import path and the sample
+workbooks in data/input
+"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+API_DIR = REPO_DIR / 'frontend' / 'api'
+INPUT_DIR = REPO_DIR / 'data' / 'input'
+
+sys.path.insert(0, str(API_DIR))
+
+
+def sample_workbook(filename: str) -> str:
+    """Path of a workbook in data/input (skips the test when it is missing)"""
+    path = INPUT_DIR / filename
+    if not path.exists():
+        pytest.skip(f'Sample workbook not available: {filename}')
+    return str(path)
+
+
+@pytest.fixture
+def quiet():
+    """Silence the parsers' progress output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
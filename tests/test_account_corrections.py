@@ -0,0 +1,88 @@
+"""
+Corrected workbooks patched into memoized dashboard sections
+"""
+
+import json
+import math
+
+import openpyxl
+import pytest
+
+from conftest import sample_workbook
+from parsers.sales_parser import SalesDashboardParser
+
+WORKBOOK = 'PAM 11-20-24 to 11-19-25.xlsx'
+
+
+def normalized(value):
+    """
+    Dashboard data with floats rounded and account records in a fixed order
+
+    Patched totals may differ from a recompute in the last bits, and accounts
+    with equal sort values may be listed in either order (see apply_diff).
+    Blank cells (NaN) compare equal.
+    """
+    if isinstance(value, dict):
+        return {key: normalized(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [normalized(item) for item in value]
+        if items and isinstance(items[0], dict) and 'Acct #' in items[0]:
+            items.sort(key=lambda record: json.dumps(record, sort_keys=True, default=str))
+        return items
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value, 6)
+    return value
+
+
+def write_corrected_workbook(path):
+    """Copy of the sample workbook with changed rows, one account added and one removed"""
+    workbook = openpyxl.load_workbook(sample_workbook(WORKBOOK))
+    sheet = workbook.active
+    header_row = next(row for row in range(1, sheet.max_row + 1) if sheet.cell(row, 1).value == 'Acct #')
+    columns = {sheet.cell(header_row, col).value: col for col in range(1, sheet.max_column + 1)}
+    rows = list(range(header_row + 1, sheet.max_row + 1))
+
+    # Changed rows: sales moved into and out of the account lists, and brand units
+    for row in rows[10:12]:
+        sheet.cell(row, columns['Difference']).value -= 5000
+    sheet.cell(rows[20], columns['Difference']).value += 3000
+    sheet.cell(rows[30], columns['CY Total']).value += 1.5
+    sheet.cell(rows[40], columns['MODZ']).value = (sheet.cell(rows[40], columns['MODZ']).value or 0) + 7
+
+    # Added account (new in the current year, at the top of the declining list)
+    added = [sheet.cell(rows[50], col).value for col in range(1, sheet.max_column + 1)]
+    added[columns['Acct #'] - 1] = 999991
+    added[columns['PY Total'] - 1] = 0
+    added[columns['Difference'] - 1] = -99999.0
+    sheet.append(added)
+
+    # Removed account
+    sheet.delete_rows(rows[60])
+
+    workbook.save(path)
+    return path
+
+
+@pytest.fixture
+def corrected_path(tmp_path):
+    return str(write_corrected_workbook(tmp_path / WORKBOOK))
+
+
+def test_patched_dashboard_equals_a_fresh_parse(corrected_path, quiet):
+    parser = SalesDashboardParser(sample_workbook(WORKBOOK))
+    parser.load_data()
+    for limit in (None, 5):
+        parser.get_dashboard_summary(limit=limit)
+
+    diff = parser.apply_corrected_workbook(corrected_path)
+
+    assert diff is not None
+    assert (len(diff.added), len(diff.removed), len(diff.changed)) == (1, 1, 5)
+
+    fresh = SalesDashboardParser(corrected_path)
+    fresh.load_data()
+    assert normalized(parser.get_dashboard_summary()) == normalized(fresh.get_dashboard_summary())
+    # The account lists were patched, not recomputed
+    patched = {'declining_accounts', 'increasing_accounts', 'account_lists'}
+    assert patched <= set(parser.get_memo_info()['served_from_memo'])
+    assert normalized(parser.get_dashboard_summary(limit=5)) == normalized(fresh.get_dashboard_summary(limit=5))
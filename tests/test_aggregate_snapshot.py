@@ -0,0 +1,108 @@
+"""
+Mergeable aggregate snapshots behind territory and region roll-ups
+"""
+
+import contextlib
+import io
+import json
+
+import pytest
+
+from conftest import sample_workbook
+from parsers.aggregate_snapshot import AggregateSnapshot, merge_snapshots
+from parsers.sales_comparison_parser import SalesComparisonParser
+
+
+@pytest.fixture(scope='module')
+def parser():
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser = SalesComparisonParser(
+            sample_workbook('PAM 11-20-23 to 11-19-24.xlsx'),
+            sample_workbook('PAM 11-20-24 to 11-19-25.xlsx')
+        )
+        parser.load_data()
+    return parser
+
+
+def partition_snapshots(parser, partitions, distinct_error=None):
+    """One snapshot per account partition of the comparison, each its own source"""
+    color_groups = [parser.BRAND_COLOR_MAP.get(brand, 'OTHER') for brand in parser.brand_columns]
+    return [
+        AggregateSnapshot.from_partition(
+            partition, parser.brand_columns, color_groups, parser._account_names(),
+            source=f'part {i}', distinct_error=distinct_error
+        )
+        for i, partition in enumerate(parser.aggregator.partition_inputs(partitions, group_by='city'))
+    ]
+
+
+def dashboard(snapshot):
+    """Dashboard without the source labels (which differ between partitions and the whole)"""
+    data = snapshot.get_dashboard()
+    data.pop('sources')
+    data['summary'] = {key: value for key, value in data['summary'].items() if key != 'sources'}
+    return json.dumps(data, sort_keys=True)
+
+
+@pytest.mark.parametrize('distinct_error', [None, 0.02])
+def test_merges_are_associative_and_commutative(parser, distinct_error):
+    a, b, c, d = partition_snapshots(parser, 4, distinct_error)
+
+    merged = dashboard(merge_snapshots([a, b, c, d]))
+
+    assert dashboard(a.merge(b).merge(c).merge(d)) == merged
+    assert dashboard(d.merge(b).merge(c.merge(a))) == merged
+    assert dashboard(merge_snapshots([c, a, d, b])) == merged
+
+
+def test_merged_partitions_equal_one_snapshot(parser):
+    assert dashboard(merge_snapshots(partition_snapshots(parser, 4))) == dashboard(parser.get_aggregate_snapshot())
+
+
+def test_repeated_source_is_rejected(parser):
+    snapshot = parser.get_aggregate_snapshot(source='PAM')
+    other = parser.get_aggregate_snapshot(source='Payton')
+
+    with pytest.raises(ValueError, match='already included'):
+        snapshot.merge(snapshot)
+    with pytest.raises(ValueError, match='already included'):
+        merge_snapshots([snapshot.merge(other), parser.get_aggregate_snapshot(source='Payton')])
+
+
+@pytest.mark.parametrize('distinct_error', [None, 0.02])
+def test_dict_round_trip_is_lossless(parser, distinct_error):
+    snapshot = merge_snapshots(partition_snapshots(parser, 3, distinct_error))
+
+    restored = AggregateSnapshot.from_dict(json.loads(json.dumps(snapshot.to_dict())))
+
+    assert restored.to_dict() == snapshot.to_dict()
+    assert restored.get_dashboard() == snapshot.get_dashboard()
+
+
+def test_single_source_dashboard_matches_the_comparison_summary(parser):
+    summary = parser.get_complete_comparison_summary(
+        sections=['accounts_per_brand', 'city_insights'], max_workers=1
+    )
+    data = parser.get_aggregate_snapshot().get_dashboard()
+
+    brands = {entry['brand']: entry for entry in data['brands']}
+    for year in ('cy', 'py'):
+        per_brand = summary['accounts_per_brand']['current_year' if year == 'cy' else 'previous_year']
+        for expected in per_brand:
+            entry = brands[expected['brand']]
+            assert entry[f'accounts_buying_12_plus_{year}'] == expected['accounts_buying_12_plus']
+            assert entry[f'total_accounts_buying_{year}'] == expected['total_accounts_buying']
+            assert entry[f'total_units_{year}'] == expected['total_units']
+
+    cities = {entry['city']: entry for entry in data['cities']}
+    assert set(cities) == {city['city'] for city in summary['city_insights']['cities']}
+    for expected in summary['city_insights']['cities']:
+        entry = cities[expected['city']]
+        for field in ('total_accounts', 'total_units_cy', 'total_units_py',
+                      'growing_count', 'declining_count', 'lost_count', 'new_count'):
+            assert entry[field] == expected[field]
+
+    totals = summary['city_insights']['summary']
+    assert data['summary']['total_accounts'] == totals['total_accounts']
+    assert data['summary']['total_units_cy'] == totals['total_units_cy']
+    assert data['summary']['total_units_py'] == totals['total_units_py']
@@ -0,0 +1,77 @@
+"""
+Color group breakdowns from the color group matrix against the per-change
+aggregation of get_customer_brand_changes()
+"""
+
+import pytest
+
+from conftest import sample_workbook
+from parsers.sales_comparison_parser import SalesComparisonParser
+
+
+def breakdowns_from_changes(parser):
+    """Breakdown of every account summed from the customer brand changes (one entry per active brand)"""
+    totals = {}
+    for change in parser.get_customer_brand_changes():
+        account = totals.setdefault(change['account_number'], {})
+        units = account.setdefault(change['color_group'], [0, 0])
+        units[0] += change['previous_year_units']
+        units[1] += change['current_year_units']
+
+    breakdowns = {}
+    for account_number, colors in totals.items():
+        total_py = sum(py for py, _ in colors.values())
+        total_cy = sum(cy for _, cy in colors.values())
+        breakdowns[account_number] = {
+            'color_groups_py': sorted(
+                (color, py, py / total_py * 100 if total_py > 0 else 0) for color, (py, _) in colors.items() if py > 0
+            ),
+            'color_groups_cy': sorted(
+                (color, cy, cy / total_cy * 100 if total_cy > 0 else 0) for color, (_, cy) in colors.items() if cy > 0
+            ),
+            'total_units_py': total_py,
+            'total_units_cy': total_cy
+        }
+    return breakdowns
+
+
+def as_comparable(breakdown):
+    return {
+        'color_groups_py': sorted((g['color_group'], g['units'], g['percentage']) for g in breakdown['color_groups_py']),
+        'color_groups_cy': sorted((g['color_group'], g['units'], g['percentage']) for g in breakdown['color_groups_cy']),
+        'total_units_py': breakdown.get('total_units_py'),
+        'total_units_cy': breakdown.get('total_units_cy')
+    }
+
+
+@pytest.fixture
+def parser(quiet):
+    # Different reps on purpose: many accounts return units in both years
+    parser = SalesComparisonParser(
+        sample_workbook('Payton YOY 8-18-24 to 8-19-25.xlsx'),
+        sample_workbook('PAM 11-20-24 to 11-19-25.xlsx')
+    )
+    parser.load_data()
+    return parser
+
+
+def test_breakdowns_match_brand_changes(parser):
+    expected = breakdowns_from_changes(parser)
+    actual = parser.get_account_color_breakdowns()
+
+    for account_number, breakdown in actual.items():
+        if account_number not in expected:
+            # No active brand in either year
+            assert breakdown['color_groups_py'] == [] and breakdown['color_groups_cy'] == []
+            assert 'total_units_py' not in breakdown
+            continue
+        assert as_comparable(breakdown) == pytest.approx(expected[account_number]), account_number
+    assert set(expected) <= set(actual)
+
+
+def test_equal_returns_in_both_years_are_ignored(parser):
+    # 73256 returned one unit of a brand in both years; that brand is not part of its breakdown
+    breakdown = parser.get_account_color_breakdown(73256)
+    assert [(g['color_group'], g['units']) for g in breakdown['color_groups_py']] == [('RED', 1)]
+    assert breakdown['total_units_py'] == 1
+    assert breakdown['total_units_cy'] == -2
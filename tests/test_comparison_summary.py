@@ -0,0 +1,62 @@
+"""
+Summary sections computed on the thread pool
+"""
+
+import json
+
+import pytest
+
+import parsers.sales_comparison_parser as comparison
+from conftest import sample_workbook
+from parsers.sales_comparison_parser import SalesComparisonParser
+
+
+def load_parser():
+    parser = SalesComparisonParser(
+        sample_workbook('PAM 11-20-23 to 11-19-24.xlsx'),
+        sample_workbook('PAM 11-20-24 to 11-19-25.xlsx')
+    )
+    parser.load_data()
+    return parser
+
+
+def summary(max_workers, sections=None):
+    result = load_parser().get_complete_comparison_summary(sections=sections, max_workers=max_workers)
+    result.pop('section_timings')
+    return json.dumps(result, sort_keys=True, default=str)
+
+
+def test_concurrent_summary_equals_sequential(quiet):
+    assert summary(max_workers=6) == summary(max_workers=1)
+
+
+def test_concurrent_sections_build_each_shared_input_once(quiet, monkeypatch):
+    builds = {'ComparisonAggregator': 0, 'ColorGroupMatrix': 0}
+    for name in builds:
+        original = getattr(comparison, name)
+
+        def counted(*args, _original=original, _name=name, **kwargs):
+            builds[_name] += 1
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(comparison, name, counted)
+
+    for _ in range(3):
+        load_parser().get_complete_comparison_summary(max_workers=6)
+
+    assert builds == {'ComparisonAggregator': 3, 'ColorGroupMatrix': 3}
+
+
+def test_sections_follow_their_inputs():
+    parser = SalesComparisonParser('previous.xlsx', 'current.xlsx')
+    order = parser._resolve_sections(['color_group_drill_downs', 'sales_per_working_day'])
+
+    assert order.index('merged_rows') < order.index('aggregator') < order.index('color_group_drill_downs')
+    assert order.index('color_group_matrix') < order.index('color_group_drill_downs')
+    assert 'current_year_parser' not in order
+
+
+def test_inputs_are_not_requestable_sections():
+    parser = SalesComparisonParser('previous.xlsx', 'current.xlsx')
+    with pytest.raises(ValueError, match='Unknown summary section'):
+        parser._resolve_sections(['aggregator'])
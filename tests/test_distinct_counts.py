@@ -0,0 +1,71 @@
+"""
+Exact and HyperLogLog distinct-account counts
+"""
+
+import numpy as np
+import pytest
+
+from parsers.distinct_counts import AccountSet, HyperLogLog, distinct_accounts, distinct_from_dict
+
+
+def account_numbers(cardinality: int, seed: int = 0) -> np.ndarray:
+    """Accounts drawn with repeats from cardinality distinct numbers"""
+    rng = np.random.default_rng(seed)
+    distinct = rng.choice(10_000_000, size=cardinality, replace=False)
+    return np.concatenate([distinct, rng.choice(distinct, size=cardinality // 2)])
+
+
+@pytest.mark.parametrize('precision', [8, 12, 14])
+@pytest.mark.parametrize('cardinality', [50, 2_000, 100_000])
+def test_estimate_is_within_four_standard_errors(cardinality, precision):
+    accounts = account_numbers(cardinality, seed=cardinality + precision)
+    exact = len(np.unique(accounts))
+
+    sketch = HyperLogLog(precision=precision).add(accounts)
+
+    assert abs(sketch.count() - exact) <= 4 * sketch.error * exact + 1
+
+
+def test_exact_set_counts_unique_accounts():
+    accounts = account_numbers(5_000)
+    assert AccountSet(accounts).count() == len(np.unique(accounts))
+
+
+@pytest.mark.parametrize('partitions', [2, 7])
+def test_merged_partitions_match_one_sketch(partitions):
+    accounts = account_numbers(20_000)
+    parts = np.array_split(accounts, partitions)
+    whole = HyperLogLog(precision=12).add(accounts)
+
+    sketches = [HyperLogLog(precision=12).add(part) for part in parts]
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged = merged.merge(sketch)
+
+    np.testing.assert_array_equal(merged.registers, whole.registers)
+    np.testing.assert_array_equal(HyperLogLog.merge_all(sketches).registers, whole.registers)
+    assert AccountSet.merge_all([AccountSet(part) for part in parts]).count() == AccountSet(accounts).count()
+
+
+def test_merge_rejects_different_precisions():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=10).merge(HyperLogLog(precision=12))
+
+
+@pytest.mark.parametrize('cardinality, stored', [(100, 'indices'), (50_000, 'registers')])
+def test_sketch_round_trips_through_dict(cardinality, stored):
+    sketch = HyperLogLog(precision=12).add(account_numbers(cardinality))
+
+    data = sketch.to_dict()
+    restored = HyperLogLog.from_dict(data)
+
+    assert stored in data
+    assert restored.precision == sketch.precision
+    np.testing.assert_array_equal(restored.registers, sketch.registers)
+    assert restored.count() == sketch.count()
+
+
+@pytest.mark.parametrize('error', [None, 0.02])
+def test_counter_round_trips_in_either_mode(error):
+    counter = distinct_accounts(account_numbers(1_000), error=error)
+    assert distinct_from_dict(counter.to_dict(), error=error).count() == counter.count()
@@ -0,0 +1,45 @@
+"""
+Period checks of the multi-period history engine
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from parsers.history import HistoryEngine
+
+
+def accounts(*numbers):
+    return pd.DataFrame({'Acct #': list(numbers), 'CY Total': 100.0, 'PY Total': 50.0})
+
+
+@pytest.fixture
+def history(quiet):
+    engine = HistoryEngine()
+    engine.add_period(accounts(1, 2), datetime(2023, 11, 20), datetime(2024, 11, 19), label='PAM 23-24')
+    return engine
+
+
+def test_adds_consecutive_periods_in_date_order(history, quiet):
+    history.add_period(accounts(2, 3), datetime(2024, 11, 20), datetime(2025, 11, 19), label='PAM 24-25')
+    history.add_period(accounts(1), datetime(2022, 11, 20), datetime(2023, 11, 19), label='PAM 22-23')
+    assert [period.label for period in history.periods] == ['PAM 22-23', 'PAM 23-24', 'PAM 24-25']
+
+
+@pytest.mark.parametrize('start_date, end_date', [
+    (datetime(2023, 11, 20), datetime(2024, 11, 19)),  # the same period
+    (datetime(2024, 8, 18), datetime(2025, 8, 19)),    # another rep's overlapping year
+    (datetime(2022, 11, 20), datetime(2023, 11, 20)),  # sharing one day
+])
+def test_rejects_overlapping_periods(history, start_date, end_date):
+    with pytest.raises(ValueError, match='overlaps'):
+        history.add_period(accounts(3), start_date, end_date)
+    assert len(history.periods) == 1
+
+
+def test_rejects_overlapping_workbooks_in_one_batch(quiet):
+    with pytest.raises(ValueError, match='overlaps'):
+        HistoryEngine().add_workbooks(
+            ['PAM 11-20-23 to 11-19-24.xlsx', 'Payton YOY 8-18-24 to 8-19-25.xlsx']
+        )
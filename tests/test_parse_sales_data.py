@@ -0,0 +1,65 @@
+"""
+Request validation of the parse-sales-data function
+"""
+
+import json
+import subprocess
+import sys
+import textwrap
+
+from conftest import API_DIR
+
+
+# Runs the handler on one request in a fresh interpreter and prints
+# the status, the response body and whether pandas was imported
+HANDLER_SCRIPT = textwrap.dedent('''
+    import email.message, importlib.util, io, json, sys
+
+    spec = importlib.util.spec_from_file_location('parse_sales_data', sys.argv[1])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    body = sys.argv[3].encode()
+    headers = email.message.Message()
+    headers['Content-Type'] = 'multipart/form-data; boundary=XyZ'
+    headers['Content-Length'] = str(len(body))
+
+    handler = module.handler.__new__(module.handler)
+    handler.path, handler.headers = sys.argv[2], headers
+    handler.rfile, handler.wfile = io.BytesIO(body), io.BytesIO()
+    status = []
+    handler.send_response = lambda code, message=None: status.append(code)
+    handler.send_header = lambda key, value: None
+    handler.end_headers = lambda: None
+    handler.do_POST()
+
+    print(json.dumps({'status': status[0], 'body': json.loads(handler.wfile.getvalue()),
+                      'pandas': 'pandas' in sys.modules}))
+''')
+
+
+def multipart(files):
+    parts = [
+        f'--XyZ\r\nContent-Disposition: form-data; name="{field}"; filename="{name}"\r\n\r\n{content}\r\n'
+        for field, (name, content) in files.items()
+    ]
+    return ''.join(parts) + '--XyZ--\r\n'
+
+
+def post(path, files):
+    result = subprocess.run(
+        [sys.executable, '-c', HANDLER_SCRIPT, str(API_DIR / 'parse-sales-data.py'), path, multipart(files)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_unknown_section_is_rejected_before_importing_the_parser():
+    response = post('/api/parse-sales-data?sections=bogus', {
+        'previousYearFile': ('PAM 11-20-23 to 11-19-24.xlsx', 'x'),
+        'currentYearFile': ('PAM 11-20-24 to 11-19-25.xlsx', 'y')
+    })
+    assert response['status'] == 400
+    assert response['body']['error'] == 'Unknown section(s): bogus'
+    assert 'sales_per_working_day' in response['body']['valid_sections']
+    assert not response['pandas']
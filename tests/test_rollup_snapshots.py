@@ -0,0 +1,65 @@
+"""
+Request handling of the rollup-snapshots function
+"""
+
+import email.message
+import importlib.util
+import io
+import json
+
+import pytest
+
+from conftest import API_DIR
+
+
+@pytest.fixture
+def rollup():
+    spec = importlib.util.spec_from_file_location('rollup_snapshots', API_DIR / 'rollup-snapshots.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def post(module, body: bytes, content_length=None):
+    """Run the handler on one POST request; returns (status, response body, request bytes read)"""
+    headers = email.message.Message()
+    headers['Content-Type'] = 'application/json'
+    headers['Content-Length'] = str(len(body) if content_length is None else content_length)
+
+    handler = module.handler.__new__(module.handler)
+    handler.headers = headers
+    handler.rfile, handler.wfile = io.BytesIO(body), io.BytesIO()
+    status = []
+    handler.send_response = lambda code, message=None: status.append(code)
+    handler.send_header = lambda key, value: None
+    handler.end_headers = lambda: None
+    handler.do_POST()
+    return status[0], json.loads(handler.wfile.getvalue()), handler.rfile.tell()
+
+
+def test_rolls_up_snapshots_of_two_reps(rollup):
+    from parsers.aggregate_snapshot import AggregateSnapshot
+
+    snapshots = [AggregateSnapshot(threshold=12, top_k=10, sources=[rep]).to_dict() for rep in ('PAM', 'Payton')]
+
+    status, response, _ = post(rollup, json.dumps({'snapshots': snapshots}).encode())
+
+    assert status == 200
+    assert response['data']['summary']['sources'] == 2
+
+
+def test_oversized_body_is_rejected_without_reading_it(rollup, monkeypatch):
+    monkeypatch.setattr(rollup, 'MAX_BODY_BYTES', 1024)
+    body = json.dumps({'snapshots': [{'padding': 'x' * 2048}]}).encode()
+
+    status, response, read = post(rollup, body)
+
+    assert status == 413
+    assert 'larger than 1024 bytes' in response['error']
+    assert read == 0
+
+
+def test_missing_snapshots_are_rejected(rollup):
+    status, response, _ = post(rollup, b'{"snapshots": []}')
+    assert status == 400
+    assert response['message'] == 'Invalid roll-up request'
@@ -0,0 +1,55 @@
+"""
+Memoized sections of SalesDashboardParser hand out copies
+"""
+
+import copy
+
+import pytest
+
+from conftest import sample_workbook
+from parsers.sales_parser import SalesDashboardParser
+
+
+@pytest.fixture
+def parser(quiet):
+    parser = SalesDashboardParser(sample_workbook('PAM 11-20-24 to 11-19-25.xlsx'))
+    parser.load_data()
+    return parser
+
+
+def test_modifying_a_result_does_not_change_later_calls(parser):
+    expected_summary = copy.deepcopy(parser.get_dashboard_summary())
+    expected_declining = parser.get_declining_accounts().copy()
+    expected_brands = copy.deepcopy(parser.get_brand_performance())
+
+    declining = parser.get_declining_accounts()
+    declining.sort_values('Name', inplace=True)
+    declining.drop(declining.index[:5], inplace=True)
+    parser.get_brand_performance().clear()
+    parser.get_dashboard_summary()['insights'].append('changed by a caller')
+
+    assert parser.get_declining_accounts().equals(expected_declining)
+    assert parser.get_brand_performance() == expected_brands
+    assert parser.get_dashboard_summary() == expected_summary
+    # The sections above were served from the memo, not recomputed
+    assert parser.get_memo_info()['served_from_memo']
+
+
+def test_memo_info_reports_the_latest_call_of_each_section(parser):
+    parser.get_brand_performance()
+    parser.get_frame_analysis()
+    recorded = len(parser._memo_hits)
+    for _ in range(50):
+        parser.get_brand_performance()
+        parser.get_frame_analysis()
+
+    info = parser.get_memo_info()
+    assert {'brand_performance', 'frame_analysis'} <= set(info['served_from_memo'])
+    assert not {'brand_performance', 'frame_analysis'} & set(info['computed'])
+    assert len(parser._memo_hits) == recorded
+
+    parser.invalidate('account_data')
+    parser.get_brand_performance()
+    info = parser.get_memo_info()
+    assert 'brand_performance' in info['computed']
+    assert 'brand_performance' not in info['served_from_memo']
@@ -0,0 +1,41 @@
+"""
+Period ordering of archive uploads (one rep, consecutive periods)
+"""
+
+import pytest
+
+from parsers.upload_archive import order_workbooks_by_period
+
+
+def workbooks(*filenames):
+    return [{'filename': filename, 'content': b''} for filename in filenames]
+
+
+def test_orders_one_reps_consecutive_periods():
+    ordered = order_workbooks_by_period(workbooks(
+        'PAM 11-20-24 to 11-19-25.xlsx', 'PAM 11-20-22 to 11-19-23.xlsx', 'PAM 11-20-23 to 11-19-24.xlsx'
+    ))
+    assert [w['filename'] for w in ordered] == [
+        'PAM 11-20-22 to 11-19-23.xlsx', 'PAM 11-20-23 to 11-19-24.xlsx', 'PAM 11-20-24 to 11-19-25.xlsx'
+    ]
+
+
+def test_rejects_workbooks_of_several_reps():
+    with pytest.raises(ValueError, match='more than one rep'):
+        order_workbooks_by_period(workbooks(
+            'PAM 11-20-23 to 11-19-24.xlsx', 'PAM 11-20-24 to 11-19-25.xlsx', 'Payton YOY 8-18-24 to 8-19-25.xlsx'
+        ))
+
+
+@pytest.mark.parametrize('older, newer', [
+    ('PAM 11-20-23 to 11-19-24.xlsx', 'PAM 8-18-24 to 8-19-25.xlsx'),   # overlapping
+    ('PAM 11-20-22 to 11-19-23.xlsx', 'PAM 11-20-24 to 11-19-25.xlsx'),  # a year missing
+])
+def test_rejects_periods_that_do_not_follow_each_other(older, newer):
+    with pytest.raises(ValueError, match='does not follow'):
+        order_workbooks_by_period(workbooks(older, newer))
+
+
+def test_rejects_the_same_period_twice():
+    with pytest.raises(ValueError, match='same period'):
+        order_workbooks_by_period(workbooks('PAM 11-20-24 to 11-19-25.xlsx', 'pam 11-20-24 to 11-19-25 (1).xlsx'))